@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Contrôle d'admission et délestage pour /chat
+
+Trois niveaux de protection, du moins coûteux au plus coûteux :
+- un seau à jetons par client (429 si le client dépasse son débit) ;
+- une limite globale de requêtes simultanées vers OpenRouter ;
+- une courte file d'attente bornée : au-delà, ou après un délai d'attente
+  trop long, la requête est refusée immédiatement (503).
+
+Les refus portent un en-tête Retry-After : le service se dégrade
+proprement au lieu d'accumuler des requêtes dans le pool de threads. Les
+requêtes /chat attendent leur place dans la boucle d'événements
+(admit_async) : une requête en file n'occupe aucun thread.
+
+Le client est identifié par l'adresse de la connexion ; X-Forwarded-For
+n'est lu que derrière un proxy de confiance (TRUSTED_PROXIES) et
+X-Client-Id seulement derrière un réseau listé explicitement (pas "*").
+"""
+
+import asyncio
+import ipaddress
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from app.config import settings
+
+# Nombre maximum de clients suivis. Seuls les seaux pleins (client inactif
+# depuis assez longtemps) sont oubliés : au-delà, les nouveaux clients
+# partagent un même seau, sans effacer l'historique des autres
+MAX_TRACKED_CLIENTS = 10000
+OVERFLOW_CLIENT = "*"
+
+class AdmissionRejected(Exception):
+    """Requête refusée par le contrôle d'admission"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """En-têtes HTTP à joindre à la réponse"""
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+class TokenBucket:
+    """Seau à jetons : `rate` jetons par seconde, au plus `capacity`"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def is_full(self) -> bool:
+        """Indique si le seau s'est entièrement rempli (l'oublier ne change rien)"""
+        return self.tokens + (time.monotonic() - self.updated) * self.rate >= self.capacity
+
+    def take(self) -> float:
+        """
+        Consomme un jeton si possible
+
+        Returns:
+            0 si un jeton a été consommé, sinon le délai avant le prochain jeton
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else 60.0
+
+class AdmissionController:
+    """Contrôleur d'admission partagé par les requêtes /chat"""
+
+    def __init__(
+        self,
+        client_rate: float,
+        client_burst: int,
+        max_concurrent: int,
+        max_queue: int,
+        queue_timeout: float
+    ):
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._buckets_lock = threading.Lock()
+        self._slots = threading.Lock()
+        # Requêtes en attente d'une place, servies dans leur ordre d'arrivée :
+        # (boucle, futur) pour /chat, threading.Event pour les appels synchrones
+        self._waiters: deque = deque()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_rate = 0
+        self.rejected_overload = 0
+
+    def check_rate(self, client_id: str) -> None:
+        """
+        Consomme un jeton du seau du client
+
+        Args:
+            client_id: Identifiant du client
+
+        Raises:
+            AdmissionRejected: 429 si le client dépasse son débit
+        """
+        if self.client_rate <= 0:
+            return
+        with self._buckets_lock:
+            bucket = self._buckets.get(client_id)
+            if bucket is None:
+                while len(self._buckets) >= MAX_TRACKED_CLIENTS:
+                    oldest = next(iter(self._buckets.values()))
+                    if not oldest.is_full():
+                        break
+                    self._buckets.popitem(last=False)
+                if len(self._buckets) >= MAX_TRACKED_CLIENTS:
+                    client_id = OVERFLOW_CLIENT
+                    bucket = self._buckets.get(client_id)
+                if bucket is None:
+                    bucket = TokenBucket(self.client_rate, self.client_burst)
+                    self._buckets[client_id] = bucket
+            self._buckets.move_to_end(client_id)
+            wait = bucket.take()
+        if wait > 0:
+            self.rejected_rate += 1
+            raise AdmissionRejected(429, "Trop de requêtes pour ce client, réessayez plus tard.", wait)
+
+    def _acquire_slot(self, timeout: float, bounded: bool) -> None:
+        with self._slots:
+            if self.active < self.max_concurrent and not self._waiters:
+                self.active += 1
+                return
+            if bounded and self.waiting >= self.max_queue:
+                self.rejected_overload += 1
+                raise AdmissionRejected(503, "Service surchargé, réessayez dans quelques instants.", self.queue_timeout)
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+            self.waiting += 1
+        waiter.wait(timeout)
+        with self._slots:
+            self.waiting -= 1
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                # Place accordée par _release_slot (éventuellement au même instant)
+                return
+            self.rejected_overload += 1
+        raise AdmissionRejected(503, "Service surchargé, réessayez dans quelques instants.", self.queue_timeout)
+
+    def _release_slot(self) -> None:
+        with self._slots:
+            # La place passe directement à la plus ancienne requête en file
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if isinstance(waiter, threading.Event):
+                    waiter.set()
+                    return
+                loop, future = waiter
+                try:
+                    loop.call_soon_threadsafe(self._grant, future)
+                    return
+                except RuntimeError:
+                    # Boucle fermée : requête suivante
+                    continue
+            self.active -= 1
+
+    def _grant(self, future: asyncio.Future) -> None:
+        if future.done():
+            # Attente abandonnée entre-temps : place rendue
+            self._release_slot()
+        else:
+            future.set_result(None)
+
+    async def _acquire_slot_async(self) -> None:
+        with self._slots:
+            if self.active < self.max_concurrent and not self._waiters:
+                self.active += 1
+                return
+            if self.waiting >= self.max_queue:
+                self.rejected_overload += 1
+                raise AdmissionRejected(503, "Service surchargé, réessayez dans quelques instants.", self.queue_timeout)
+            waiter = (asyncio.get_running_loop(), asyncio.get_running_loop().create_future())
+            self._waiters.append(waiter)
+            self.waiting += 1
+        try:
+            await asyncio.wait_for(waiter[1], self.queue_timeout)
+        except asyncio.TimeoutError:
+            with self._slots:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    # Place accordée au même instant : _grant la rendra
+                    pass
+            self.rejected_overload += 1
+            raise AdmissionRejected(503, "Service surchargé, réessayez dans quelques instants.", self.queue_timeout)
+        finally:
+            with self._slots:
+                self.waiting -= 1
+
+    @contextmanager
+    def upstream_slot(self, timeout: Optional[float] = None, bounded: bool = True) -> Iterator[None]:
+        """
+        Réserve une des CHAT_MAX_CONCURRENT places d'appel à OpenRouter
+
+        Args:
+            timeout: Attente maximale d'une place (CHAT_QUEUE_TIMEOUT par défaut)
+            bounded: Limite la file d'attente à CHAT_MAX_QUEUE ; les tâches
+                asynchrones, déjà bornées par leur pool, attendent sans limite
+        """
+        self._acquire_slot(self.queue_timeout if timeout is None else timeout, bounded)
+        try:
+            yield
+        finally:
+            self._release_slot()
+
+    @contextmanager
+    def admit(self, client_id: str) -> Iterator[None]:
+        """
+        Admet une requête ou lève AdmissionRejected
+
+        Args:
+            client_id: Identifiant du client (clé du seau à jetons)
+        """
+        self.check_rate(client_id)
+        with self.upstream_slot():
+            self.admitted += 1
+            yield
+
+    @asynccontextmanager
+    async def admit_async(self, client_id: str) -> AsyncIterator[None]:
+        """
+        Admet une requête depuis la boucle d'événements ou lève AdmissionRejected
+
+        L'attente d'une place n'occupe aucun thread : le traitement n'est
+        confié au pool de threads qu'une fois la requête admise.
+
+        Args:
+            client_id: Identifiant du client (clé du seau à jetons)
+        """
+        self.check_rate(client_id)
+        await self._acquire_slot_async()
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self._release_slot()
+
+    def stats(self) -> Dict:
+        """Statistiques du contrôle d'admission"""
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected_rate_limit": self.rejected_rate,
+            "rejected_overload": self.rejected_overload,
+            "tracked_clients": len(self._buckets)
+        }
+
+def parse_trusted_proxies(value: str) -> Tuple[List, bool]:
+    """
+    Lit la liste des proxys de confiance ("10.0.0.0/8,127.0.0.1" ou "*")
+
+    Args:
+        value: Valeur de TRUSTED_PROXIES
+
+    Returns:
+        Un tuple (réseaux listés explicitement, présence de "*")
+    """
+    networks = []
+    trust_any = False
+    for item in value.split(","):
+        item = item.strip()
+        if item == "*":
+            trust_any = True
+        elif item:
+            networks.append(ipaddress.ip_network(item, strict=False))
+    return networks, trust_any
+
+_trusted_proxies, _trust_any_proxy = parse_trusted_proxies(settings.TRUSTED_PROXIES)
+
+def _is_listed_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in _trusted_proxies)
+
+def client_id_from_request(request) -> str:
+    """
+    Identifie le client d'une requête HTTP
+
+    Les en-têtes fournis par le client ne sont pas crus : X-Forwarded-For
+    n'est lu que si la connexion vient d'un proxy de confiance
+    (TRUSTED_PROXIES), qui y ajoute l'adresse qu'il a vue. X-Client-Id,
+    qu'un proxy peut transmettre tel quel (Vercel), n'est lu que derrière
+    un réseau listé explicitement, jamais avec "*".
+
+    Args:
+        request: La requête FastAPI / Starlette
+
+    Returns:
+        L'adresse de la connexion ; derrière un proxy de confiance,
+        l'en-tête X-Client-Id (réseau listé) ou la dernière adresse de
+        X-Forwarded-For qui n'est pas celle d'un proxy listé
+    """
+    peer = request.client.host if request.client else "inconnu"
+    listed = _is_listed_proxy(peer)
+    if not (listed or _trust_any_proxy):
+        return peer
+    if listed:
+        client_id = request.headers.get("x-client-id")
+        if client_id:
+            return client_id.strip()[:128]
+    forwarded = [address.strip() for address in request.headers.get("x-forwarded-for", "").split(",")]
+    forwarded = [address for address in forwarded if address]
+    # De droite à gauche : les entrées de gauche peuvent venir du client
+    for address in reversed(forwarded):
+        if not _is_listed_proxy(address):
+            return address
+    return forwarded[0] if forwarded else peer
+
+# Instance globale du contrôleur d'admission
+admission_controller = AdmissionController(
+    client_rate=settings.CHAT_CLIENT_RATE,
+    client_burst=settings.CHAT_CLIENT_BURST,
+    max_concurrent=settings.CHAT_MAX_CONCURRENT,
+    max_queue=settings.CHAT_MAX_QUEUE,
+    queue_timeout=settings.CHAT_QUEUE_TIMEOUT
+)
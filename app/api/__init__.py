@@ -0,0 +1,9 @@
+"""
+Module API - Routers FastAPI de ChatRH
+"""
+
+from .articles import router as articles_router
+from .probes import router as probes_router
+from .profiling import router as profiling_router
+
+__all__ = ["articles_router", "probes_router", "profiling_router"]
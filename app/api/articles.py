@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Endpoints de consultation et d'export du corpus (sujets / articles)
+"""
+
+import itertools
+import json
+from typing import Iterator, List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.api.http_cache import cached_response
+from app.config import settings
+from app.db import (
+    get_all_sujets,
+    get_article_by_id,
+    get_sujet_by_id,
+    iter_articles,
+    list_articles
+)
+
+router = APIRouter(tags=["corpus"])
+
+class SujetOut(BaseModel):
+    """Sujet du corpus"""
+    id: int
+    titre_sujet: str
+    description: Optional[str] = None
+
+class ArticleOut(BaseModel):
+    """Article du corpus (contenu absent en mode métadonnées)"""
+    article_id: int
+    id_sujet: int
+    num_article: Optional[str] = None
+    source: Optional[str] = None
+    contenu: Optional[str] = None
+
+class ArticlePage(BaseModel):
+    """Page d'articles avec curseur de pagination"""
+    items: List[ArticleOut]
+    limit: int
+    next_after_id: Optional[int] = None
+
+# Types de paramètres partagés par les endpoints de liste
+Fields = Literal["metadata", "full"]
+
+def _page_limit(limit: Optional[int]) -> int:
+    return min(limit or settings.ARTICLES_PAGE_DEFAULT, settings.ARTICLES_PAGE_MAX)
+
+def _article_out(article, include_contenu: bool) -> ArticleOut:
+    data = article.to_dict()
+    if not include_contenu:
+        data["contenu"] = None
+    return ArticleOut(**data)
+
+def _build_page(
+    after_id: int,
+    limit: Optional[int],
+    fields: Fields,
+    id_sujet: Optional[int] = None,
+    source: Optional[str] = None
+) -> ArticlePage:
+    size = _page_limit(limit)
+    include_contenu = fields == "full"
+    articles = list_articles(
+        after_id, size, id_sujet=id_sujet, include_contenu=include_contenu, source=source, raise_errors=True
+    )
+    # Une page pleine indique qu'il peut rester des articles après le dernier ID
+    next_after_id = articles[-1].article_id if len(articles) == size else None
+    return ArticlePage(
+        items=[_article_out(article, include_contenu) for article in articles],
+        limit=size,
+        next_after_id=next_after_id
+    )
+
+@router.get("/sujets", response_model=List[SujetOut])
+def list_sujets(request: Request):
+    """Liste tous les sujets du corpus"""
+    return cached_response(
+        request,
+        lambda: [SujetOut(**sujet.to_dict()) for sujet in get_all_sujets(raise_errors=True)]
+    )
+
+@router.get("/articles", response_model=ArticlePage)
+def list_articles_page(
+    request: Request,
+    after_id: int = Query(0, ge=0, description="Dernier article_id de la page précédente"),
+    limit: Optional[int] = Query(None, ge=1, description="Taille de la page"),
+    fields: Fields = Query("metadata", description="metadata (sans contenu) ou full"),
+    sujet_id: Optional[int] = Query(None, description="Filtre sur un sujet"),
+    source: Optional[str] = Query(None, description="Filtre sur une source")
+):
+    """
+    Liste les articles par pagination keyset sur article_id
+
+    Passez `next_after_id` de la réponse comme `after_id` pour obtenir la
+    page suivante ; il vaut null sur la dernière page.
+    """
+    return cached_response(request, lambda: _build_page(after_id, limit, fields, id_sujet=sujet_id, source=source))
+
+@router.get("/sujets/{sujet_id}/articles", response_model=ArticlePage)
+def list_sujet_articles(
+    request: Request,
+    sujet_id: int,
+    after_id: int = Query(0, ge=0, description="Dernier article_id de la page précédente"),
+    limit: Optional[int] = Query(None, ge=1, description="Taille de la page"),
+    fields: Fields = Query("metadata", description="metadata (sans contenu) ou full"),
+    source: Optional[str] = Query(None, description="Filtre sur une source")
+):
+    """Liste les articles d'un sujet par pagination keyset"""
+    def build() -> ArticlePage:
+        page = _build_page(after_id, limit, fields, id_sujet=sujet_id, source=source)
+        # Vérification de l'existence du sujet uniquement si la page est vide
+        if not page.items and after_id == 0 and get_sujet_by_id(sujet_id, raise_errors=True) is None:
+            raise HTTPException(status_code=404, detail=f"Sujet {sujet_id} introuvable")
+        return page
+
+    return cached_response(request, build)
+
+@router.get("/articles/export")
+def export_articles(
+    request: Request,
+    fields: Fields = Query("full", description="metadata (sans contenu) ou full"),
+    sujet_id: Optional[int] = Query(None, description="Filtre sur un sujet"),
+    source: Optional[str] = Query(None, description="Filtre sur une source")
+):
+    """
+    Exporte les articles au format NDJSON (un objet JSON par ligne)
+
+    L'export est diffusé en continu depuis un curseur côté serveur : la
+    mémoire utilisée ne dépend pas de la taille du corpus.
+    """
+    include_contenu = fields == "full"
+
+    def generate(articles: Iterator) -> Iterator[str]:
+        for article in articles:
+            data = article.to_dict()
+            if not include_contenu:
+                del data["contenu"]
+            yield json.dumps(data, ensure_ascii=False) + "\n"
+
+    def build() -> StreamingResponse:
+        articles = iter_articles(
+            id_sujet=sujet_id, include_contenu=include_contenu, source=source, raise_errors=True
+        )
+        # Le premier article ouvre la connexion et exécute la requête : un
+        # échec lève DatabaseUnavailable avant l'envoi d'un statut 200
+        first = next(articles, None)
+        if first is not None:
+            articles = itertools.chain([first], articles)
+        return StreamingResponse(
+            generate(articles),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": 'attachment; filename="articles.ndjson"'}
+        )
+
+    return cached_response(request, build)
+
+@router.get("/articles/{article_id}", response_model=ArticleOut)
+def get_article(request: Request, article_id: int):
+    """Retourne un article complet"""
+    def build() -> ArticleOut:
+        article = get_article_by_id(article_id, raise_errors=True)
+        if article is None:
+            raise HTTPException(status_code=404, detail=f"Article {article_id} introuvable")
+        return _article_out(article, include_contenu=True)
+
+    return cached_response(request, build)
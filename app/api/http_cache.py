@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Cache HTTP des endpoints en lecture (ETag, Cache-Control, 304)
+
+L'ETag d'une réponse est dérivé de la version du corpus et de l'URL
+demandée : il peut donc être calculé, et comparé à If-None-Match, avant
+toute requête à la base de données.
+"""
+
+import hashlib
+from typing import Callable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+from app.db.corpus import get_corpus_version
+from app.db.db_postgres import DatabaseUnavailable
+
+def cache_control_header() -> str:
+    """
+    Construit l'en-tête Cache-Control des réponses en lecture
+
+    Returns:
+        La valeur de l'en-tête (navigateur, CDN et stale-while-revalidate)
+    """
+    return (
+        f"public, max-age={settings.HTTP_CACHE_MAX_AGE}, "
+        f"s-maxage={settings.HTTP_CACHE_S_MAXAGE}, "
+        f"stale-while-revalidate={settings.HTTP_CACHE_STALE_WHILE_REVALIDATE}"
+    )
+
+def make_etag(version: str, request: Request) -> str:
+    """
+    Calcule un ETag fort pour une ressource d'une version donnée
+
+    Args:
+        version: Version du corpus (ou de l'application)
+        request: La requête (chemin et paramètres)
+
+    Returns:
+        L'ETag entre guillemets
+    """
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{version}|{request.url.path}?{query}".encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Vérifie si l'en-tête If-None-Match de la requête correspond à l'ETag
+
+    Args:
+        request: La requête
+        etag: L'ETag courant de la ressource
+
+    Returns:
+        True si le client possède déjà cette version
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    if "*" in candidates:
+        return True
+    # If-None-Match utilise la comparaison faible (préfixe W/ ignoré)
+    return any((c[2:] if c.startswith("W/") else c) == etag for c in candidates)
+
+def unavailable_response() -> JSONResponse:
+    """
+    Réponse 503 renvoyée quand la base ne peut pas produire le contenu
+
+    Une page ou une liste vide servie en 200 serait mise en cache par le
+    CDN (ETag fort, s-maxage) : l'erreur n'est donc jamais mise en cache.
+
+    Returns:
+        La réponse 503 (Cache-Control: no-store)
+    """
+    return JSONResponse(
+        {"detail": "Base de données indisponible, réessayez plus tard."},
+        status_code=503,
+        headers={"Cache-Control": "no-store", "Retry-After": "5"}
+    )
+
+def validator_headers(etag: str) -> dict:
+    """En-têtes communs aux réponses 200 et 304"""
+    return {"ETag": etag, "Cache-Control": cache_control_header()}
+
+def cached_response(
+    request: Request,
+    build: Callable[[], object],
+    version: Optional[str] = None,
+    response_class=JSONResponse
+) -> Response:
+    """
+    Sert une réponse en lecture avec ETag et gestion de If-None-Match
+
+    Si le client possède déjà la version courante, une réponse 304 est
+    renvoyée sans appeler build (donc sans requête à la base).
+
+    Args:
+        request: La requête
+        build: Fonction produisant le contenu (ou une Response complète) ;
+            elle lève DatabaseUnavailable si la base ne répond pas
+        version: Version de la ressource (version du corpus par défaut)
+        response_class: Classe de réponse pour le contenu produit
+
+    Returns:
+        La réponse HTTP (200, 304 ou 503)
+    """
+    version = version or get_corpus_version()
+    if version is None:
+        # Base indisponible : pas de validateur fiable, on ne met pas en cache
+        try:
+            content = build()
+        except DatabaseUnavailable:
+            return unavailable_response()
+        if isinstance(content, Response):
+            content.headers["Cache-Control"] = "no-store"
+            return content
+        return response_class(jsonable_encoder(content), headers={"Cache-Control": "no-store"})
+
+    etag = make_etag(version, request)
+    headers = validator_headers(etag)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        content = build()
+    except DatabaseUnavailable:
+        return unavailable_response()
+    if isinstance(content, Response):
+        content.headers.update(headers)
+        return content
+    return response_class(jsonable_encoder(content), headers=headers)
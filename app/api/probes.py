@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Sondes de vivacité (liveness) et de disponibilité (readiness)
+
+Les deux endpoints sont asynchrones et sans entrée/sortie : ils sont
+servis directement par la boucle d'événements, même lorsque le pool de
+threads est saturé par des requêtes /chat. Seul /readyz sans thread
+d'échantillonnage interroge la base lui-même (au plus une fois par
+HEALTH_SAMPLE_INTERVAL).
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.monitoring import health_sampler
+
+router = APIRouter(tags=["health"])
+
+@router.get("/livez")
+async def livez():
+    """Le processus répond (aucune vérification externe)"""
+    return {"status": "ok"}
+
+@router.get("/readyz")
+async def readyz():
+    """
+    L'instance est prête à recevoir du trafic
+
+    Renvoie le dernier échantillon de santé (base de données, pools,
+    dernier appel OpenRouter) avec un statut 503 si la base n'était pas
+    accessible lors du dernier échantillonnage. Sans thread
+    d'échantillonnage, l'échantillon est pris à la demande.
+    """
+    if not health_sampler.running:
+        await run_in_threadpool(health_sampler.ensure_fresh)
+    snapshot = health_sampler.snapshot()
+    ready = health_sampler.is_ready(snapshot)
+    snapshot["status"] = "ready" if ready else "not_ready"
+    return JSONResponse(snapshot, status_code=200 if ready else 503)
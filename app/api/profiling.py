@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Consultation des profils de requêtes (voir app/monitoring/profiling.py)
+
+Endpoints protégés par le jeton de profilage (en-tête
+`Authorization: Bearer <PROFILING_TOKEN>`) ; ils répondent 404 lorsque le
+profilage est désactivé.
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.monitoring.profiling import request_profiler
+
+router = APIRouter(prefix="/admin/profiles", tags=["admin"])
+
+def _check_admin(authorization: Optional[str]) -> None:
+    if not request_profiler.enabled or not request_profiler.token:
+        raise HTTPException(status_code=404, detail="Profilage désactivé")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not request_profiler.check_token(token.strip()):
+        raise HTTPException(status_code=401, detail="Jeton d'administration invalide")
+
+def _load(profile_id: str) -> dict:
+    report = request_profiler.load_report(profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail=f"Profil {profile_id} introuvable")
+    return report
+
+@router.get("")
+def list_profiles(authorization: Optional[str] = Header(None)):
+    """Profils conservés, du plus récent au plus ancien"""
+    _check_admin(authorization)
+    return {"profiles": request_profiler.list_reports(), **request_profiler.stats()}
+
+@router.get("/{profile_id}")
+def get_profile(profile_id: str, authorization: Optional[str] = Header(None)):
+    """Rapport complet (CPU, piles agrégées, allocations mémoire)"""
+    _check_admin(authorization)
+    return _load(profile_id)
+
+@router.get("/{profile_id}/collapsed", response_class=PlainTextResponse)
+def get_profile_collapsed(profile_id: str, authorization: Optional[str] = Header(None)):
+    """Piles agrégées au format "collapsed" (flamegraph.pl, speedscope)"""
+    _check_admin(authorization)
+    report = _load(profile_id)
+    return PlainTextResponse(
+        "\n".join(report["cpu"]["collapsed"]) + "\n",
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.collapsed.txt"'}
+    )
@@ -4,6 +4,7 @@ Configuration de l'application ChatRH
 """
 
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Charger les variables d'environnement
@@ -23,6 +24,57 @@ class Settings:
     OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "openai/gpt-3.5-turbo")
     OPENROUTER_MAX_TOKENS = int(os.getenv("OPENROUTER_MAX_TOKENS", "1000"))
     OPENROUTER_TEMPERATURE = float(os.getenv("OPENROUTER_TEMPERATURE", "0.7"))
+    # Délai de l'appel synchrone (limite des fonctions Vercel : 10s gratuit, 60s pro)
+    OPENROUTER_TIMEOUT = float(os.getenv("OPENROUTER_TIMEOUT", "8"))
+    # Connexion ouverte pendant la recherche si inutilisée depuis ce délai (secondes)
+    OPENROUTER_PREWARM_IDLE = float(os.getenv("OPENROUTER_PREWARM_IDLE", "15"))
+    
+    # Routage par complexité : modèles par niveau (vide = OPENROUTER_MODEL)
+    # et table de règles JSON (vide = règles par défaut de model_router.py)
+    MODEL_ROUTING_ENABLED = os.getenv("MODEL_ROUTING_ENABLED", "True").lower() == "true"
+    OPENROUTER_MODEL_LIGHT = os.getenv("OPENROUTER_MODEL_LIGHT", "")
+    OPENROUTER_MODEL_HEAVY = os.getenv("OPENROUTER_MODEL_HEAVY", "")
+    MODEL_ROUTING_RULES = os.getenv("MODEL_ROUTING_RULES", "")
+    
+    # Étapes indépendantes du pipeline /chat exécutées en parallèle
+    # (recherche, contexte RH, connexion OpenRouter, recherches par mot)
+    PIPELINE_CONCURRENCY_ENABLED = os.getenv("PIPELINE_CONCURRENCY_ENABLED", "True").lower() == "true"
+    PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "16"))
+    
+    # Contrôle d'admission de /chat
+    CHAT_CLIENT_RATE = float(os.getenv("CHAT_CLIENT_RATE", "0.5"))  # requêtes / seconde / client
+    CHAT_CLIENT_BURST = int(os.getenv("CHAT_CLIENT_BURST", "10"))
+    CHAT_MAX_CONCURRENT = int(os.getenv("CHAT_MAX_CONCURRENT", "16"))
+    CHAT_MAX_QUEUE = int(os.getenv("CHAT_MAX_QUEUE", "8"))
+    CHAT_QUEUE_TIMEOUT = float(os.getenv("CHAT_QUEUE_TIMEOUT", "2"))
+    # Proxys dont l'en-tête X-Forwarded-For est cru (adresses ou réseaux
+    # séparés par des virgules, "*" derrière un proxy qui réécrit toujours
+    # X-Forwarded-For, comme celui de Vercel). X-Client-Id n'est cru que
+    # derrière un réseau listé explicitement
+    TRUSTED_PROXIES = os.getenv("TRUSTED_PROXIES", "")
+    
+    # Tâches /chat asynchrones (POST /chat/jobs) : magasin (memory ou
+    # postgres), délai de l'appel au LLM, délai total d'une tâche et
+    # attente maximale d'une interrogation longue. Sur Vercel (fonction gelée
+    # après la réponse), les tâches sont en file dans PostgreSQL et exécutées
+    # par chat_job_worker.py, pas par l'API
+    CHAT_JOB_STORE = os.getenv("CHAT_JOB_STORE", "postgres" if os.getenv("VERCEL") else "memory")
+    CHAT_JOB_WORKERS = int(os.getenv("CHAT_JOB_WORKERS", "0" if os.getenv("VERCEL") else "4"))
+    CHAT_JOB_LEASE = float(os.getenv("CHAT_JOB_LEASE", "120"))
+    CHAT_JOB_CLAIM_INTERVAL = float(os.getenv("CHAT_JOB_CLAIM_INTERVAL", "2"))
+    CHAT_JOB_MAX_PENDING = int(os.getenv("CHAT_JOB_MAX_PENDING", "100"))
+    CHAT_JOB_TIMEOUT = float(os.getenv("CHAT_JOB_TIMEOUT", "60"))
+    CHAT_JOB_DEADLINE = float(os.getenv("CHAT_JOB_DEADLINE", "300"))
+    CHAT_JOB_TTL = float(os.getenv("CHAT_JOB_TTL", "3600"))
+    CHAT_JOB_MAX_WAIT = float(os.getenv("CHAT_JOB_MAX_WAIT", "25"))
+    CHAT_JOB_POLL_INTERVAL = float(os.getenv("CHAT_JOB_POLL_INTERVAL", "0.5"))
+    
+    # Consommation de tokens : budgets quotidiens par client (0 = illimité)
+    # et prix en USD par million de tokens si OpenRouter ne renvoie pas le coût
+    CLIENT_DAILY_TOKEN_BUDGET = int(os.getenv("CLIENT_DAILY_TOKEN_BUDGET", "0"))
+    CLIENT_TOKEN_BUDGETS = os.getenv("CLIENT_TOKEN_BUDGETS", "")  # "client-a:200000,client-b:50000"
+    OPENROUTER_PROMPT_PRICE = float(os.getenv("OPENROUTER_PROMPT_PRICE", "0"))
+    OPENROUTER_COMPLETION_PRICE = float(os.getenv("OPENROUTER_COMPLETION_PRICE", "0"))
     
     # Base de données (optionnel)
     DB_HOST = os.getenv("DB_HOST", "localhost")
@@ -30,6 +82,118 @@ class Settings:
     DB_NAME = os.getenv("DB_NAME", "chatrh_db")
     DB_USER = os.getenv("DB_USER", "postgres")
     DB_PASSWORD = os.getenv("DB_PASSWORD", "")
+    
+    # Pool de connexions psycopg2 par processus (0 = une connexion par appel)
+    # et requêtes préparées (à désactiver derrière PgBouncer en mode transaction)
+    DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    # Désactivé par défaut : les poolers en mode transaction (PgBouncer de
+    # Supabase / Neon) ne conservent pas les requêtes préparées
+    DB_PREPARED_STATEMENTS = os.getenv("DB_PREPARED_STATEMENTS", "False").lower() == "true"
+    # Connexion du pool inutilisée depuis plus de N secondes : vérifiée
+    # (SELECT 1) avant d'être prêtée
+    DB_POOL_VALIDATE_IDLE = float(os.getenv("DB_POOL_VALIDATE_IDLE", "30"))
+    
+    # Réplicas en lecture ("hote1:5432,hote2:5432", mêmes base et identifiants) :
+    # retard maximum toléré, intervalle de vérification et stratégie de choix
+    # (round_robin ou least_latency)
+    DB_READ_REPLICAS = os.getenv("DB_READ_REPLICAS", "")
+    DB_REPLICA_STRATEGY = os.getenv("DB_REPLICA_STRATEGY", "round_robin")
+    DB_REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "30"))
+    DB_REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "10"))
+    DB_REPLICA_CONNECT_TIMEOUT = int(os.getenv("DB_REPLICA_CONNECT_TIMEOUT", "2"))
+    
+    # Cache LRU des articles (borné en octets de contenu)
+    ARTICLE_CACHE_ENABLED = os.getenv("ARTICLE_CACHE_ENABLED", "True").lower() == "true"
+    ARTICLE_CACHE_MAX_BYTES = int(os.getenv("ARTICLE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    
+    # Échantillonnage de santé en arrière-plan (/readyz, /health)
+    HEALTH_SAMPLER_ENABLED = os.getenv("HEALTH_SAMPLER_ENABLED", "True").lower() == "true"
+    HEALTH_SAMPLE_INTERVAL = float(os.getenv("HEALTH_SAMPLE_INTERVAL", "15"))
+    
+    # Version du corpus et cache HTTP des endpoints en lecture
+    CORPUS_VERSION_TTL = float(os.getenv("CORPUS_VERSION_TTL", "60"))
+    HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+    HTTP_CACHE_S_MAXAGE = int(os.getenv("HTTP_CACHE_S_MAXAGE", "300"))
+    HTTP_CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("HTTP_CACHE_STALE_WHILE_REVALIDATE", "600"))
+    
+    # Cache de recherche (message normalisé -> articles)
+    RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "512"))
+    
+    # Reclassement des articles candidats (pertinence lexicale + MMR)
+    RERANK_ENABLED = os.getenv("RERANK_ENABLED", "True").lower() == "true"
+    RERANK_TOP_K = int(os.getenv("RERANK_TOP_K", "6"))
+    RERANK_MIN_SCORE = float(os.getenv("RERANK_MIN_SCORE", "0.1"))
+    RERANK_MMR_LAMBDA = float(os.getenv("RERANK_MMR_LAMBDA", "0.7"))
+    
+    # Découpage des articles en passages (extraits transmis au prompt)
+    PASSAGES_ENABLED = os.getenv("PASSAGES_ENABLED", "True").lower() == "true"
+    PASSAGE_MAX_CHARS = int(os.getenv("PASSAGE_MAX_CHARS", "700"))
+    PASSAGE_OVERLAP_CHARS = int(os.getenv("PASSAGE_OVERLAP_CHARS", "150"))
+    PASSAGES_PER_ARTICLE = int(os.getenv("PASSAGES_PER_ARTICLE", "2"))
+    # Articles dont le découpage est gardé en mémoire (0 : pas de cache)
+    PASSAGE_CACHE_SIZE = int(os.getenv("PASSAGE_CACHE_SIZE", "4096"))
+    
+    # Correction orthographique des questions (index SymSpell)
+    FUZZY_ENABLED = os.getenv("FUZZY_ENABLED", "True").lower() == "true"
+    FUZZY_MIN_WORD_LENGTH = int(os.getenv("FUZZY_MIN_WORD_LENGTH", "5"))
+    FUZZY_MAX_VOCABULARY = int(os.getenv("FUZZY_MAX_VOCABULARY", "20000"))
+    
+    # Journal des requêtes et préchauffage des caches
+    # Désactivé par défaut : le journal conserve les questions des utilisateurs
+    QUERY_LOG_ENABLED = os.getenv("QUERY_LOG_ENABLED", "False").lower() == "true"
+    QUERY_LOG_SINK = os.getenv("QUERY_LOG_SINK", "file")  # file ou postgres
+    QUERY_LOG_PATH = os.getenv("QUERY_LOG_PATH", os.path.join(tempfile.gettempdir(), "chatrh_query_log.jsonl"))
+    QUERY_LOG_MAX_QUEUE = int(os.getenv("QUERY_LOG_MAX_QUEUE", "10000"))
+    # Taille maximale du fichier avant rotation, et anciens fichiers gardés
+    QUERY_LOG_MAX_BYTES = int(os.getenv("QUERY_LOG_MAX_BYTES", str(20 * 1024 * 1024)))
+    QUERY_LOG_BACKUPS = int(os.getenv("QUERY_LOG_BACKUPS", "1"))
+    WARMUP_TOP_N = int(os.getenv("WARMUP_TOP_N", "0"))
+    
+    # Journalisation structurée (file bornée, écriture par un thread dédié)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json ou text
+    LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")  # "DEBUG=0.01,INFO=0.1"
+    LOG_REPEAT_LIMIT = int(os.getenv("LOG_REPEAT_LIMIT", "10"))
+    LOG_REPEAT_WINDOW = float(os.getenv("LOG_REPEAT_WINDOW", "60"))
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    
+    # Traces distribuées (spans OpenTelemetry) : taux d'échantillonnage des
+    # requêtes sans traceparent entrant, exportateur (file ou log)
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "False").lower() == "true"
+    TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", "1.0"))
+    TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "file")
+    TRACING_FILE_PATH = os.getenv("TRACING_FILE_PATH", os.path.join(tempfile.gettempdir(), "chatrh_traces.jsonl"))
+    TRACING_QUEUE_SIZE = int(os.getenv("TRACING_QUEUE_SIZE", "10000"))
+    # Taille maximale du fichier de traces avant rotation, et anciens fichiers gardés
+    TRACING_FILE_MAX_BYTES = int(os.getenv("TRACING_FILE_MAX_BYTES", str(50 * 1024 * 1024)))
+    TRACING_FILE_BACKUPS = int(os.getenv("TRACING_FILE_BACKUPS", "3"))
+    # Suivre la décision d'échantillonnage du traceparent entrant (appelants de confiance)
+    TRACING_TRUST_UPSTREAM = os.getenv("TRACING_TRUST_UPSTREAM", "False").lower() == "true"
+    
+    # Profilage à la demande (en-tête X-Profile: <PROFILING_TOKEN> ou tirage
+    # au sort) ; le même jeton protège /admin/profiles
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False").lower() == "true"
+    PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+    PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+    PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+    PROFILING_DIR = os.getenv("PROFILING_DIR", os.path.join(tempfile.gettempdir(), "chatrh_profiles"))
+    PROFILING_MAX_REPORTS = int(os.getenv("PROFILING_MAX_REPORTS", "50"))
+    PROFILING_TOP_N = int(os.getenv("PROFILING_TOP_N", "25"))
+    
+    # Index du corpus partagé entre workers (fichier projeté en mémoire)
+    SHARED_INDEX_ENABLED = os.getenv("SHARED_INDEX_ENABLED", "False").lower() == "true"
+    SHARED_INDEX_DIR = os.getenv("SHARED_INDEX_DIR", os.path.join(tempfile.gettempdir(), "chatrh_index"))
+    SHARED_INDEX_CHECK_INTERVAL = float(os.getenv("SHARED_INDEX_CHECK_INTERVAL", "5"))
+    # Recherche par mots servie par l'index partagé (BM25) au lieu de LIKE
+    SHARED_INDEX_WORD_SEARCH = os.getenv("SHARED_INDEX_WORD_SEARCH", "False").lower() == "true"
+    
+    # Pagination des articles
+    ARTICLES_PAGE_DEFAULT = int(os.getenv("ARTICLES_PAGE_DEFAULT", "50"))
+    ARTICLES_PAGE_MAX = int(os.getenv("ARTICLES_PAGE_MAX", "500"))
+    
+    # Ingestion du corpus (CSV / XLSX)
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "5000"))
+    INGEST_DEFAULT_SOURCE = os.getenv("INGEST_DEFAULT_SOURCE", "Code du travail 1997")
 
 # Instance globale des paramètres
 settings = Settings()
@@ -3,21 +3,53 @@ Module DB - Gestion de la base de données PostgreSQL
 """
 
 from .db_postgres import (
+    DatabaseUnavailable,
     get_db_connection,
     get_articles_by_sujet,
     get_article_by_id,
     search_articles,
+    search_articles_fulltext,
+    get_articles_by_num_keys,
     get_all_sujets,
     get_sujet_by_id,
-    get_articles_count
+    get_articles_count,
+    get_sujets_with_counts,
+    run_batch,
+    list_articles,
+    iter_articles
 )
+from .models import Article, Sujet, Passage, normalize_source
+from .replicas import primary_reads, read_replicas
+from .article_cache import article_cache
+from .corpus import register_refresh_hook, notify_corpus_change
+from .passages import get_passages, index_passages
+from .ingestion import ingest_files
 
 __all__ = [
+    "Article",
+    "Sujet",
+    "Passage",
+    "normalize_source",
+    "DatabaseUnavailable",
     "get_db_connection",
     "get_articles_by_sujet",
     "get_article_by_id",
     "search_articles",
+    "search_articles_fulltext",
+    "get_articles_by_num_keys",
     "get_all_sujets",
     "get_sujet_by_id",
-    "get_articles_count"
+    "get_articles_count",
+    "get_sujets_with_counts",
+    "run_batch",
+    "list_articles",
+    "iter_articles",
+    "primary_reads",
+    "read_replicas",
+    "article_cache",
+    "register_refresh_hook",
+    "notify_corpus_change",
+    "get_passages",
+    "index_passages",
+    "ingest_files"
 ]
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Cache LRU des articles pour ChatRH
+
+Les articles ne changent qu'au chargement du corpus : ce cache en lecture
+directe (read-through) évite de retransférer le contenu complet depuis
+PostgreSQL. Il est borné par la taille totale du contenu en octets et non
+par le nombre d'entrées, car la longueur des articles varie énormément.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.db.corpus import register_refresh_hook
+
+# Surcoût estimé d'une entrée (clé, objet Article, chaînes courtes)
+ENTRY_OVERHEAD_BYTES = 200
+
+def estimate_article_size(article) -> int:
+    """
+    Estime la taille mémoire d'un article en octets
+
+    Args:
+        article: L'article (Article)
+
+    Returns:
+        Taille estimée en octets
+    """
+    contenu = article.contenu or ""
+    return len(contenu.encode("utf-8")) + ENTRY_OVERHEAD_BYTES
+
+class ArticleCache:
+    """Cache LRU borné en octets, indexé par article_id et par (id_sujet, source)"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.corpus_version: Optional[str] = None
+        # Clés ("article", article_id) -> (article, taille) et
+        # ("sujet", id_sujet, source) -> (tuple d'article_id, taille) ; la
+        # source None désigne le sujet toutes sources confondues
+        self._entries: "OrderedDict[Tuple, Tuple[object, int]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _store(self, key: Tuple, value, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.current_bytes -= previous[1]
+        self._entries[key] = (value, size)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.evictions += 1
+
+    def _remove(self, key: Tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+    def get_article(self, article_id: int):
+        """
+        Retourne un article du cache
+
+        Args:
+            article_id: L'ID de l'article
+
+        Returns:
+            L'article ou None en cas d'absence
+        """
+        with self._lock:
+            entry = self._entries.get(("article", article_id))
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(("article", article_id))
+            self.hits += 1
+            return entry[0]
+
+    def put_article(self, article) -> None:
+        """
+        Ajoute (ou remplace) un article dans le cache
+
+        Args:
+            article: L'article à mettre en cache
+        """
+        with self._lock:
+            self._store(("article", article.article_id), article, estimate_article_size(article))
+
+    def get_sujet_articles(self, id_sujet: int, source: Optional[str] = None) -> Optional[List]:
+        """
+        Retourne les articles d'un sujet si tous sont encore en cache
+
+        Args:
+            id_sujet: L'ID du sujet
+            source: La source des articles (None : toutes les sources)
+
+        Returns:
+            La liste des articles ou None en cas d'absence
+        """
+        with self._lock:
+            key = ("sujet", id_sujet, source)
+            entry = self._entries.get(key)
+            if entry is not None:
+                articles = []
+                for article_id in entry[0]:
+                    article_entry = self._entries.get(("article", article_id))
+                    if article_entry is None:
+                        # Un article du sujet a été évincé : l'entrée est incomplète
+                        self._remove(key)
+                        articles = None
+                        break
+                    self._entries.move_to_end(("article", article_id))
+                    articles.append(article_entry[0])
+                if articles is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return articles
+            self.misses += 1
+            return None
+
+    def put_sujet_articles(self, id_sujet: int, articles: List, source: Optional[str] = None) -> None:
+        """
+        Met en cache la liste des articles d'un sujet
+
+        Args:
+            id_sujet: L'ID du sujet
+            articles: Les articles du sujet, dans l'ordre
+            source: La source des articles (None : toutes les sources)
+        """
+        with self._lock:
+            article_ids = tuple(article.article_id for article in articles)
+            index_size = ENTRY_OVERHEAD_BYTES + 8 * len(article_ids)
+            total = index_size + sum(estimate_article_size(article) for article in articles)
+            if total > self.max_bytes:
+                # Sujet trop volumineux pour être servi depuis la mémoire
+                return
+            for article in articles:
+                self.put_article(article)
+            self._store(("sujet", id_sujet, source), article_ids, index_size)
+
+    def invalidate_sujets(self, sujet_ids: Iterable[int]) -> None:
+        """
+        Invalide les entrées liées aux sujets donnés
+
+        Args:
+            sujet_ids: IDs des sujets modifiés
+        """
+        sujet_ids: Set[int] = set(sujet_ids)
+        with self._lock:
+            stale = [
+                key for key, (value, _) in self._entries.items()
+                if (key[0] == "sujet" and key[1] in sujet_ids)
+                or (key[0] == "article" and value.id_sujet in sujet_ids)
+            ]
+            for key in stale:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """Vide entièrement le cache"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def set_corpus_version(self, version: Optional[str], invalidate: bool = True) -> None:
+        """
+        Associe le cache à une version du corpus, en le vidant si elle change
+
+        Args:
+            version: Identifiant de la version du corpus
+            invalidate: Faux si les entrées périmées ont déjà été invalidées
+                (sujets modifiés, voir app/db/corpus.py)
+        """
+        with self._lock:
+            if version != self.corpus_version:
+                if invalidate:
+                    self.clear()
+                self.corpus_version = version
+
+    def stats(self) -> Dict:
+        """
+        Retourne les statistiques du cache
+
+        Returns:
+            Un dictionnaire (hits, misses, évictions, occupation...)
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "corpus_version": self.corpus_version
+            }
+
+# Instance globale du cache
+article_cache = ArticleCache(settings.ARTICLE_CACHE_MAX_BYTES)
+
+@register_refresh_hook
+def _invalidate_on_corpus_change(sujet_ids: Optional[Set[int]]) -> None:
+    if sujet_ids is None:
+        article_cache.clear()
+    else:
+        article_cache.invalidate_sujets(sujet_ids)
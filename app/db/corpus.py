@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Suivi des changements du corpus (sujets / articles) pour ChatRH
+
+Les modules qui maintiennent des structures dérivées du corpus (caches,
+index de recherche...) s'enregistrent ici pour être rafraîchis après une
+ingestion, uniquement pour les sujets concernés.
+
+Le module calcule aussi une version (empreinte) du corpus, utilisée pour
+les ETags HTTP et pour invalider les caches en mémoire : un changement de
+version lu en base (ingestion faite par un autre processus) déclenche les
+hooks pour les sujets enregistrés avec la version, ou pour tout le corpus
+si des versions intermédiaires n'ont pas été vues.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Un hook reçoit l'ensemble des IDs de sujets modifiés, ou None pour
+# signifier que tout le corpus doit être considéré comme modifié
+RefreshHook = Callable[[Optional[Set[int]]], None]
+
+_refresh_hooks: List[RefreshHook] = []
+
+def register_refresh_hook(hook: RefreshHook) -> RefreshHook:
+    """
+    Enregistre une fonction appelée après chaque modification du corpus
+
+    Args:
+        hook: Fonction recevant les IDs des sujets modifiés (ou None)
+
+    Returns:
+        Le hook lui-même (utilisable comme décorateur)
+    """
+    if hook not in _refresh_hooks:
+        _refresh_hooks.append(hook)
+    return hook
+
+def notify_corpus_change(sujet_ids: Optional[Iterable[int]] = None) -> None:
+    """
+    Notifie les hooks enregistrés qu'une partie du corpus a changé
+
+    Args:
+        sujet_ids: IDs des sujets modifiés, None pour tout le corpus
+    """
+    affected = set(sujet_ids) if sujet_ids is not None else None
+    for hook in list(_refresh_hooks):
+        try:
+            hook(affected)
+        except Exception as e:
+            logger.error("Erreur lors du rafraîchissement après changement du corpus: %s", e)
+
+# Version courante du corpus, relue au plus une fois par TTL
+_version_lock = threading.Lock()
+_version: Optional[str] = None
+_version_computed_at = 0.0
+# Détenu par le thread qui relit la version (une seule lecture à la fois)
+_refresh_lock = threading.Lock()
+
+def read_corpus_version() -> Tuple[Optional[str], Optional[List[int]]]:
+    """
+    Lit la version du corpus et les sujets modifiés par la dernière ingestion
+
+    La version est un compteur de public.corpus_version incrémenté par
+    chaque ingestion, dans sa transaction. Si la table n'existe pas encore
+    (corpus chargé hors de l'ingestion), la version est dérivée du nombre
+    de lignes et de la plus récente transaction ayant écrit dans les tables.
+
+    Returns:
+        Un tuple (version ou None si la base est indisponible, IDs des
+        sujets modifiés pour atteindre cette version ou None si inconnus)
+    """
+    from app.db.db_postgres import PSYCOPG2_AVAILABLE, get_db_connection
+
+    if not PSYCOPG2_AVAILABLE:
+        return None, None
+
+    # Même serveur que les lectures servies (réplica éventuel)
+    connection = get_db_connection(read_only=True)
+    if not connection:
+        return None, None
+
+    cursor = None
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT to_regclass('public.corpus_version') IS NOT NULL")
+        if cursor.fetchone()[0]:
+            # to_jsonb : la colonne sujet_ids peut manquer (table créée
+            # avant son ajout, la prochaine ingestion la crée)
+            cursor.execute(
+                "SELECT version, to_jsonb(c) -> 'sujet_ids' FROM public.corpus_version c WHERE id = 1"
+            )
+            row = cursor.fetchone()
+            if row is not None:
+                return f"v{row[0]}", row[1]
+        cursor.execute(
+            "SELECT (SELECT count(*) FROM public.sujet),"
+            " (SELECT max(xmin::text::bigint) FROM public.sujet),"
+            " (SELECT count(*) FROM public.article),"
+            " (SELECT max(xmin::text::bigint) FROM public.article)"
+        )
+        return "x" + "-".join(str(value or 0) for value in cursor.fetchone()), None
+    except Exception as e:
+        logger.error("Erreur lors de la lecture de la version du corpus: %s", e)
+        return None, None
+    finally:
+        if cursor:
+            cursor.close()
+        connection.close()
+
+def _changed_sujets(previous: str, version: str, sujet_ids: Optional[List[int]]) -> Optional[List[int]]:
+    """
+    Sujets à rafraîchir pour passer de la version previous à version
+
+    Args:
+        previous: Version connue du processus
+        version: Version relue en base
+        sujet_ids: Sujets enregistrés avec version
+
+    Returns:
+        Les IDs des sujets, ou None (tout le corpus) si des versions
+        intermédiaires ont été manquées ou si les sujets sont inconnus
+    """
+    if sujet_ids is None or not (previous.startswith("v") and version.startswith("v")):
+        return None
+    try:
+        consecutive = int(version[1:]) == int(previous[1:]) + 1
+    except ValueError:
+        return None
+    return sujet_ids if consecutive else None
+
+def _refresh_version() -> None:
+    global _version, _version_computed_at
+    try:
+        version, sujet_ids = read_corpus_version()
+        if version is not None:
+            from app.db.article_cache import article_cache
+            if _version is not None and version != _version:
+                # Ingestion faite par un autre processus (CLI, migration) :
+                # les hooks locaux n'ont pas été appelés. Appelés avant la
+                # publication de la version, pour qu'un nouvel ETag ne soit
+                # jamais servi depuis des caches périmés (le verrou de
+                # lecture étant détenu, _expire_version ne relance rien)
+                changed = _changed_sujets(_version, version, sujet_ids)
+                logger.info(
+                    "Version du corpus modifiée (%s -> %s), sujets: %s",
+                    _version, version, "tous" if changed is None else changed
+                )
+                notify_corpus_change(changed)
+                article_cache.set_corpus_version(version, invalidate=False)
+            else:
+                article_cache.set_corpus_version(version)
+            with _version_lock:
+                _version = version
+                _version_computed_at = time.monotonic()
+    finally:
+        _refresh_lock.release()
+
+def refresh_corpus_version() -> None:
+    """Relit la version du corpus en arrière-plan (sans effet si une lecture est en cours)"""
+    if not _refresh_lock.acquire(blocking=False):
+        return
+    try:
+        threading.Thread(target=_refresh_version, name="corpus-version", daemon=True).start()
+    except Exception:
+        _refresh_lock.release()
+        raise
+
+def get_corpus_version() -> Optional[str]:
+    """
+    Retourne la version du corpus depuis la mémoire
+
+    La base n'est jamais interrogée sur le chemin de la requête : une
+    version absente (démarrage) ou expirée (CORPUS_VERSION_TTL) est relue
+    en arrière-plan et la valeur connue est renvoyée en attendant.
+
+    Returns:
+        La version du corpus, ou None tant qu'elle n'a pas été lue
+    """
+    if _version is None or time.monotonic() - _version_computed_at > settings.CORPUS_VERSION_TTL:
+        refresh_corpus_version()
+    return _version
+
+@register_refresh_hook
+def _expire_version(sujet_ids: Optional[Set[int]]) -> None:
+    global _version_computed_at
+    # Relit la version incrémentée par l'ingestion locale
+    _version_computed_at = 0.0
+    refresh_corpus_version()
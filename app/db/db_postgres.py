@@ -1,87 +1,444 @@
 #!/usr/bin/env python3
 """
 Fonctions de base de données PostgreSQL pour ChatRH
+
+Les connexions sont empruntées à un pool propre à chaque processus ; sur
+une connexion du pool, les requêtes fréquentes sont préparées une seule
+fois (PREPARE) puis exécutées par leur nom, sans nouvelle analyse ni
+planification. Plusieurs requêtes indépendantes peuvent être regroupées
+en un seul aller-retour (run_batch).
+
+Les fonctions de lecture demandent une connexion read_only, servie par un
+réplica sain s'il y en a (voir replicas.py) ; les écritures restent sur
+le primaire.
 """
 
-from typing import Dict, List, Optional
-import sys
+import logging
+import os
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Nom de la requête de PREPARED_STATEMENTS en cours d'exécution, repris par
+# les spans db.query y compris quand elle est envoyée en texte
+_statement_name: ContextVar[Optional[str]] = ContextVar("chatrh_statement_name", default=None)
 
 # Import optionnel de psycopg2 - gère l'absence gracieusement
 try:
     import psycopg2
+    import psycopg2.errors
+    import psycopg2.extensions
     import psycopg2.extras
+    import psycopg2.pool
     PSYCOPG2_AVAILABLE = True
 except ImportError:
     PSYCOPG2_AVAILABLE = False
-    if sys.stdout.encoding and sys.stdout.encoding.lower().startswith('utf'):
-        print("⚠️ psycopg2-binary non disponible - PostgreSQL désactivé")
-    else:
-        print("Warning: psycopg2-binary not available - PostgreSQL disabled")
+    logger.warning("psycopg2-binary non disponible - PostgreSQL désactivé")
 
 from app.config import settings
+from app.db.article_cache import article_cache
+from app.db.models import Article, Sujet, ARTICLE_COLUMNS, SUJET_COLUMNS
+from app.db.replicas import read_replicas
+from app.db.schema import ARTICLE_FULLTEXT_EXPRESSION, ARTICLE_NUM_KEY_EXPRESSION
+from app.monitoring.tracing import current_span, start_span
+
+# Passe à False si la colonne num_key n'existe pas encore (base non migrée)
+_num_key_column = True
+
 
-def get_db_connection():
+class DatabaseUnavailable(RuntimeError):
+    """Base injoignable ou requête en échec (lectures avec raise_errors=True)"""
+
+
+def _unavailable(raise_errors: bool, message: str, error: Optional[Exception] = None) -> None:
+    """
+    Lève DatabaseUnavailable si l'appelant ne veut pas d'un résultat vide
+
+    Args:
+        raise_errors: Valeur du paramètre raise_errors de la lecture
+        message: Description de l'échec
+        error: Exception d'origine (optionnel)
+    """
+    if raise_errors:
+        raise DatabaseUnavailable(message) from error
+
+# Requêtes fréquentes préparées une fois par connexion du pool :
+# nom -> (types des paramètres, requête avec paramètres $n)
+PREPARED_STATEMENTS = {
+    "chatrh_sujets": ("", f"SELECT {SUJET_COLUMNS} FROM public.sujet ORDER BY id ASC"),
+    # Sujets ayant au moins un article dans la source (index source, id_sujet)
+    "chatrh_sujets_source": (
+        "(text)",
+        f"SELECT {SUJET_COLUMNS} FROM public.sujet s "
+        "WHERE EXISTS (SELECT 1 FROM public.article a WHERE a.source = $1 AND a.id_sujet = s.id) "
+        "ORDER BY id ASC"
+    ),
+    "chatrh_sujet": ("(integer)", f"SELECT {SUJET_COLUMNS} FROM public.sujet WHERE id = $1"),
+    "chatrh_article": ("(integer)", f"SELECT {ARTICLE_COLUMNS} FROM public.article WHERE article_id = $1"),
+    "chatrh_sujet_articles": (
+        "(integer)",
+        f"SELECT {ARTICLE_COLUMNS} FROM public.article WHERE id_sujet = $1 ORDER BY article_id ASC"
+    ),
+    # Index (source, id_sujet, article_id) : seule la partition lue
+    "chatrh_sujet_source_articles": (
+        "(integer, text)",
+        f"SELECT {ARTICLE_COLUMNS} FROM public.article "
+        "WHERE id_sujet = $1 AND source = $2 ORDER BY article_id ASC"
+    ),
+    "chatrh_search": (
+        "(text, integer)",
+        f"SELECT {ARTICLE_COLUMNS} FROM public.article "
+        "WHERE (LOWER(contenu) LIKE $1 OR LOWER(num_article) LIKE $1) ORDER BY article_id ASC LIMIT $2"
+    ),
+    "chatrh_search_source": (
+        "(text, text, integer)",
+        f"SELECT {ARTICLE_COLUMNS} FROM public.article "
+        "WHERE (LOWER(contenu) LIKE $1 OR LOWER(num_article) LIKE $1) AND source = $2 "
+        "ORDER BY article_id ASC LIMIT $3"
+    ),
+}
+
+_PLACEHOLDER_RE = re.compile(r"\$(\d+)")
+
+if PSYCOPG2_AVAILABLE:
+    class _PreparingConnection(psycopg2.extensions.connection):
+        """Connexion du pool mémorisant les requêtes déjà préparées"""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.prepared = set()
+            # Passe à False si le serveur ne conserve pas les requêtes
+            # préparées (pooler en mode transaction)
+            self.preparing = True
+            self.returned_at = time.monotonic()
+
+    class _TracingCursor(psycopg2.extensions.cursor):
+        """Curseur qui ouvre un span par requête (tracing activé)"""
+
+        def execute(self, query, params=None):
+            if current_span() is None:
+                return super().execute(query, params)
+            statement = query.decode() if isinstance(query, bytes) else str(query)
+            operation, _, rest = statement.lstrip().partition(" ")
+            operation = operation.upper()
+            name = _statement_name.get()
+            if name is None and operation in ("PREPARE", "EXECUTE"):
+                name = rest.split(" ", 1)[0].split("(", 1)[0]
+            with start_span("db.query", kind="client") as span:
+                span.set_attributes({
+                    "db.system": "postgresql",
+                    "db.operation": operation,
+                    # Nom de la requête (voir PREPARED_STATEMENTS), préparée ou non
+                    "db.statement_name": name,
+                    "db.statement": statement[:300],
+                    "db.server": f"{self.connection.info.host}:{self.connection.info.port}"
+                })
+                result = super().execute(query, params)
+                span.set_attribute("db.rows", self.rowcount if self.rowcount >= 0 else None)
+                return result
+
+def _connect_params(replica=None) -> Dict:
+    params = {
+        "host": replica.host if replica else settings.DB_HOST,
+        "port": replica.port if replica else settings.DB_PORT,
+        "database": settings.DB_NAME,
+        "user": settings.DB_USER,
+        "password": settings.DB_PASSWORD,
+        "client_encoding": "UTF8"
+    }
+    if replica:
+        # Un réplica injoignable ne doit pas retenir la lecture
+        params["connect_timeout"] = settings.DB_REPLICA_CONNECT_TIMEOUT
+    if settings.TRACING_ENABLED:
+        params["cursor_factory"] = _TracingCursor
+    return params
+
+class PooledConnection:
+    """Connexion empruntée au pool : close() la rend au pool"""
+
+    __slots__ = ("_connection", "_pool")
+
+    def __init__(self, connection, pool):
+        self._connection = connection
+        self._pool = pool
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __setattr__(self, name, value):
+        if name in PooledConnection.__slots__:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._connection, name, value)
+
+    def close(self) -> None:
+        """Rend la connexion au pool (transaction en cours annulée)"""
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        with _pool_lock:
+            _pool_stats["in_use"] -= 1
+        try:
+            if not connection.closed and connection.autocommit:
+                connection.autocommit = False
+            connection.returned_at = time.monotonic()
+            self._pool.putconn(connection)
+        except Exception:
+            connection.close()
+
+# Un pool par serveur (primaire, réplicas), propre au processus courant
+_pools: Dict[str, object] = {}
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+_pool_stats = {"in_use": 0, "borrowed": 0, "direct": 0, "discarded": 0, "unprepared_fallbacks": 0}
+
+def _get_pool(replica=None):
+    """Pool du serveur dans le processus courant (recréé après un fork), ou None"""
+    global _pools, _pool_pid
+    if settings.DB_POOL_MAX_SIZE <= 0:
+        return None
+    key = replica.name if replica else "primary"
+    if _pool_pid == os.getpid():
+        pool = _pools.get(key)
+        if pool is not None:
+            return pool
+    with _pool_lock:
+        if _pool_pid != os.getpid():
+            # Les connexions héritées du parent ne sont pas réutilisées
+            _pools = {}
+            _pool_pid = os.getpid()
+        if key not in _pools:
+            _pools[key] = psycopg2.pool.ThreadedConnectionPool(
+                0,
+                settings.DB_POOL_MAX_SIZE,
+                connection_factory=_PreparingConnection,
+                **_connect_params(replica)
+            )
+        return _pools[key]
+
+def _is_usable(connection) -> bool:
+    """Vérifie une connexion du pool avant de la prêter"""
+    if connection.closed:
+        return False
+    try:
+        if connection.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            connection.rollback()
+        if time.monotonic() - connection.returned_at > settings.DB_POOL_VALIDATE_IDLE:
+            # Connexion coupée par le serveur, un pare-feu ou un redémarrage
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+        return True
+    except Exception:
+        return False
+
+def _open_connection(replica=None):
+    pool = _get_pool(replica)
+    if pool is not None:
+        try:
+            # Au plus une tentative par connexion du pool, puis une neuve
+            for _ in range(settings.DB_POOL_MAX_SIZE + 1):
+                raw = pool.getconn()
+                if _is_usable(raw):
+                    break
+                with _pool_lock:
+                    _pool_stats["discarded"] += 1
+                pool.putconn(raw, close=True)
+            else:
+                raise psycopg2.pool.PoolError("aucune connexion valide")
+            connection = PooledConnection(raw, pool)
+            with _pool_lock:
+                _pool_stats["in_use"] += 1
+                _pool_stats["borrowed"] += 1
+            return connection
+        except psycopg2.pool.PoolError:
+            pass
+    with _pool_lock:
+        _pool_stats["direct"] += 1
+    return psycopg2.connect(**_connect_params(replica))
+
+def get_db_connection(read_only: bool = False):
     """
     Obtient une connexion à la base de données PostgreSQL
     
+    La connexion est empruntée au pool du processus ; si le pool est
+    épuisé, une connexion directe est ouverte. Dans les deux cas,
+    close() libère la connexion.
+    
+    Args:
+        read_only: La connexion ne sert qu'à lire : elle est ouverte sur un
+            réplica sain s'il y en a (DB_READ_REPLICAS), sinon sur le primaire
+    
     Returns:
         Connection object ou None si la connexion échoue
     """
     if not PSYCOPG2_AVAILABLE:
         return None
     
+    replica = read_replicas.choose() if read_only else None
+    if replica is not None:
+        try:
+            return _open_connection(replica)
+        except Exception as e:
+            read_replicas.mark_failed(replica, str(e).strip().splitlines()[0])
+    
     try:
-        connection = psycopg2.connect(
-            host=settings.DB_HOST,
-            port=settings.DB_PORT,
-            database=settings.DB_NAME,
-            user=settings.DB_USER,
-            password=settings.DB_PASSWORD,
-            client_encoding='UTF8'
-        )
-        return connection
+        return _open_connection()
     except Exception as e:
-        print(f"Erreur de connexion à PostgreSQL: {e}")
+        logger.error("Erreur de connexion à PostgreSQL: %s", e)
         return None
 
-def get_articles_by_sujet(id_sujet: int) -> List[Dict]:
+def close_db_pool() -> None:
+    """Ferme les connexions des pools (arrêt de l'application)"""
+    global _pools
+    with _pool_lock:
+        if _pool_pid == os.getpid():
+            for pool in _pools.values():
+                pool.closeall()
+        _pools = {}
+
+def db_pool_stats() -> Dict:
+    """Statistiques des pools de connexions et des réplicas"""
+    with _pool_lock:
+        stats = {"max_size": settings.DB_POOL_MAX_SIZE, "servers": sorted(_pools), **_pool_stats}
+    if read_replicas:
+        stats["read_replicas"] = read_replicas.stats()
+    return stats
+
+def execute_prepared(cursor, name: str, params: Sequence = ()) -> None:
+    """
+    Exécute une requête de PREPARED_STATEMENTS
+    
+    Avec DB_PREPARED_STATEMENTS, sur une connexion du pool, la requête est
+    préparée au premier appel puis exécutée par son nom ; sinon elle est
+    envoyée en texte. Si le serveur a perdu ou déjà la requête préparée
+    (pooler en mode transaction), elle est renvoyée en texte et la
+    préparation est abandonnée pour cette connexion. Réservé aux lectures :
+    la transaction en cours est alors annulée.
+    
+    Args:
+        cursor: Curseur psycopg2
+        name: Nom de la requête
+        params: Paramètres, dans l'ordre $1, $2...
+    """
+    token = _statement_name.set(name)
+    try:
+        _execute_prepared(cursor, name, params)
+    finally:
+        _statement_name.reset(token)
+
+def _execute_prepared(cursor, name: str, params: Sequence) -> None:
+    types, sql = PREPARED_STATEMENTS[name]
+    connection = cursor.connection
+    if settings.DB_PREPARED_STATEMENTS and getattr(connection, "preparing", False):
+        try:
+            if name not in connection.prepared:
+                cursor.execute(f"PREPARE {name} {types} AS {sql}")
+                connection.prepared.add(name)
+            if params:
+                cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", list(params))
+            else:
+                cursor.execute(f"EXECUTE {name}")
+            return
+        except (psycopg2.errors.InvalidSqlStatementName, psycopg2.errors.DuplicatePreparedStatement) as e:
+            logger.warning("Requêtes préparées non conservées par le serveur, envoi en texte: %s", e)
+            connection.rollback()
+            connection.preparing = False
+            connection.prepared.clear()
+            with _pool_lock:
+                _pool_stats["unprepared_fallbacks"] += 1
+    cursor.execute(
+        _PLACEHOLDER_RE.sub(r"%(p\1)s", sql),
+        {f"p{i}": value for i, value in enumerate(params, 1)}
+    )
+
+def run_batch(queries: Dict[str, Tuple[str, Sequence, Sequence[str]]]) -> Dict[str, List[tuple]]:
+    """
+    Exécute plusieurs requêtes indépendantes en un seul aller-retour
+    
+    Chaque requête devient une sous-requête agrégée en JSON d'un même
+    SELECT : une seule requête réseau quel que soit leur nombre.
+    
+    Args:
+        queries: Nom -> (requête avec paramètres %s, paramètres, noms des
+            colonnes à renvoyer)
+    
+    Returns:
+        Nom -> lignes (tuples, dans l'ordre des colonnes demandées) ;
+        listes vides si la base est indisponible
+    """
+    results: Dict[str, List[tuple]] = {name: [] for name in queries}
+    if not queries or not PSYCOPG2_AVAILABLE:
+        return results
+    
+    connection = get_db_connection(read_only=True)
+    if not connection:
+        return results
+    
+    names = list(queries)
+    # Chaque ligne devient un tableau JSON dans l'ordre des colonnes demandées
+    selects = ", ".join(
+        "(SELECT coalesce(json_agg(json_build_array({columns})), '[]'::json) FROM ({sql}) t)".format(
+            columns=", ".join(f"t.{column}" for column in queries[name][2]),
+            sql=queries[name][0]
+        )
+        for name in names
+    )
+    params = [value for name in names for value in queries[name][1]]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT {selects}", params)
+            row = cursor.fetchone()
+        for name, rows in zip(names, row):
+            results[name] = [tuple(item) for item in rows]
+    except Exception as e:
+        logger.error("Erreur lors de l'exécution groupée: %s", e)
+    finally:
+        connection.close()
+    
+    return results
+
+def get_articles_by_sujet(id_sujet: int, source: Optional[str] = None) -> List[Article]:
     """
     Récupère tous les articles d'un sujet donné
     
     Args:
         id_sujet: L'ID du sujet
+        source: Restreint les articles à une source (optionnel)
     
     Returns:
-        Liste de dictionnaires contenant les articles
+        Liste des articles (Article)
     """
+    if settings.ARTICLE_CACHE_ENABLED:
+        cached = article_cache.get_sujet_articles(id_sujet, source)
+        if cached is not None:
+            return list(cached)
+    
     if not PSYCOPG2_AVAILABLE:
         return []
     
-    connection = get_db_connection()
+    connection = get_db_connection(read_only=True)
     if not connection:
         return []
     
     articles = []
     try:
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cursor.execute(
-            "SELECT article_id, id_sujet, num_article, source, contenu "
-            "FROM public.article "
-            "WHERE id_sujet = %s "
-            "ORDER BY article_id ASC",
-            (id_sujet,)
-        )
+        cursor = connection.cursor()
+        if source is not None:
+            execute_prepared(cursor, "chatrh_sujet_source_articles", (id_sujet, source))
+        else:
+            execute_prepared(cursor, "chatrh_sujet_articles", (id_sujet,))
+        
+        articles = [Article(*row) for row in cursor.fetchall()]
         
-        for row in cursor.fetchall():
-            articles.append({
-                "article_id": row['article_id'],
-                "id_sujet": row['id_sujet'],
-                "num_article": row['num_article'],
-                "source": row['source'],
-                "contenu": row['contenu']
-            })
+        if settings.ARTICLE_CACHE_ENABLED:
+            article_cache.put_sujet_articles(id_sujet, articles, source)
     except Exception as e:
-        print(f"Erreur lors de la récupération des articles: {e}")
+        logger.error("Erreur lors de la récupération des articles: %s", e)
     finally:
         if connection:
             cursor.close()
@@ -89,43 +446,45 @@ def get_articles_by_sujet(id_sujet: int) -> List[Dict]:
     
     return articles
 
-def get_article_by_id(article_id: int) -> Optional[Dict]:
+def get_article_by_id(article_id: int, raise_errors: bool = False) -> Optional[Article]:
     """
     Récupère un article par son ID
     
     Args:
         article_id: L'ID de l'article
+        raise_errors: Lève DatabaseUnavailable au lieu de retourner None
+            si la base est injoignable ou la requête échoue
     
     Returns:
-        Dictionnaire contenant l'article ou None
+        L'article (Article) ou None
     """
+    if settings.ARTICLE_CACHE_ENABLED:
+        cached = article_cache.get_article(article_id)
+        if cached is not None:
+            return cached
+    
     if not PSYCOPG2_AVAILABLE:
+        _unavailable(raise_errors, "psycopg2 non disponible")
         return None
     
-    connection = get_db_connection()
+    connection = get_db_connection(read_only=True)
     if not connection:
+        _unavailable(raise_errors, "connexion PostgreSQL impossible")
         return None
     
     try:
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cursor.execute(
-            "SELECT article_id, id_sujet, num_article, source, contenu "
-            "FROM public.article "
-            "WHERE article_id = %s",
-            (article_id,)
-        )
+        cursor = connection.cursor()
+        execute_prepared(cursor, "chatrh_article", (article_id,))
         
         row = cursor.fetchone()
         if row:
-            return {
-                "article_id": row['article_id'],
-                "id_sujet": row['id_sujet'],
-                "num_article": row['num_article'],
-                "source": row['source'],
-                "contenu": row['contenu']
-            }
+            article = Article(*row)
+            if settings.ARTICLE_CACHE_ENABLED:
+                article_cache.put_article(article)
+            return article
     except Exception as e:
-        print(f"Erreur lors de la récupération de l'article: {e}")
+        logger.error("Erreur lors de la récupération de l'article: %s", e)
+        _unavailable(raise_errors, "lecture de l'article impossible", e)
     finally:
         if connection:
             cursor.close()
@@ -133,46 +492,37 @@ def get_article_by_id(article_id: int) -> Optional[Dict]:
     
     return None
 
-def search_articles(keyword: str, limit: int = 10) -> List[Dict]:
+def search_articles(keyword: str, limit: int = 10, source: Optional[str] = None) -> List[Article]:
     """
     Recherche des articles par mot-clé dans le contenu
     
     Args:
         keyword: Mot-clé à rechercher
         limit: Nombre maximum de résultats
+        source: Restreint la recherche à une source (optionnel)
     
     Returns:
-        Liste de dictionnaires contenant les articles correspondants
+        Liste des articles correspondants
     """
     if not PSYCOPG2_AVAILABLE:
         return []
     
-    connection = get_db_connection()
+    connection = get_db_connection(read_only=True)
     if not connection:
         return []
     
     articles = []
     try:
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cursor.execute(
-            "SELECT article_id, id_sujet, num_article, source, contenu "
-            "FROM public.article "
-            "WHERE LOWER(contenu) LIKE %s OR LOWER(num_article) LIKE %s "
-            "ORDER BY article_id ASC "
-            "LIMIT %s",
-            (f"%{keyword.lower()}%", f"%{keyword.lower()}%", limit)
-        )
+        cursor = connection.cursor()
+        pattern = f"%{keyword.lower()}%"
+        if source is not None:
+            execute_prepared(cursor, "chatrh_search_source", (pattern, source, limit))
+        else:
+            execute_prepared(cursor, "chatrh_search", (pattern, limit))
         
-        for row in cursor.fetchall():
-            articles.append({
-                "article_id": row['article_id'],
-                "id_sujet": row['id_sujet'],
-                "num_article": row['num_article'],
-                "source": row['source'],
-                "contenu": row['contenu']
-            })
+        articles = [Article(*row) for row in cursor.fetchall()]
     except Exception as e:
-        print(f"Erreur lors de la recherche d'articles: {e}")
+        logger.error("Erreur lors de la recherche d'articles: %s", e)
     finally:
         if connection:
             cursor.close()
@@ -180,37 +530,130 @@ def search_articles(keyword: str, limit: int = 10) -> List[Dict]:
     
     return articles
 
-def get_all_sujets() -> List[Dict]:
+def search_articles_fulltext(text: str, limit: int = 10, source: Optional[str] = None) -> List[Article]:
+    """
+    Recherche plein texte (PostgreSQL, configuration française)
+    
+    Les termes de la question sont combinés en OU puis les articles
+    classés par ts_rank_cd.
+    
+    Args:
+        text: La question ou les mots recherchés
+        limit: Nombre maximum de résultats
+        source: Restreint la recherche à une source (optionnel)
+    
+    Returns:
+        Liste des articles, du plus au moins pertinent
+    """
+    if not PSYCOPG2_AVAILABLE:
+        return []
+    
+    connection = get_db_connection(read_only=True)
+    if not connection:
+        return []
+    
+    articles = []
+    try:
+        with connection.cursor() as cursor:
+            query = (
+                f"SELECT {ARTICLE_COLUMNS} FROM public.article, "
+                "to_tsquery('french', replace(plainto_tsquery('french', %s)::text, '&', '|')) AS q "
+                f"WHERE {ARTICLE_FULLTEXT_EXPRESSION} @@ q "
+            )
+            params = [text]
+            if source is not None:
+                query += "AND source = %s "
+                params.append(source)
+            cursor.execute(
+                query + f"ORDER BY ts_rank_cd({ARTICLE_FULLTEXT_EXPRESSION}, q) DESC, article_id LIMIT %s",
+                params + [limit]
+            )
+            articles = [Article(*row) for row in cursor.fetchall()]
+    except Exception as e:
+        logger.error("Erreur lors de la recherche plein texte: %s", e)
+    finally:
+        connection.close()
+    
+    return articles
+
+def get_articles_by_num_keys(keys: List[str], source: Optional[str] = None) -> List[Article]:
+    """
+    Récupère les articles par clé canonique de numéro (recherche exacte)
+    
+    Args:
+        keys: Clés canoniques ("l148", "l148-2"...), voir article_refs
+        source: Restreint la recherche à une source (optionnel)
+    
+    Returns:
+        Liste des articles trouvés, dans l'ordre des clés
+    """
+    global _num_key_column
+    if not keys or not PSYCOPG2_AVAILABLE:
+        return []
+    
+    connection = get_db_connection(read_only=True)
+    if not connection:
+        return []
+    
+    def query(key_column: str) -> str:
+        sql = f"SELECT {key_column}, {ARTICLE_COLUMNS} FROM public.article WHERE {key_column} = ANY(%s) "
+        return sql + ("AND source = %s" if source is not None else "")
+    
+    params = [list(keys)] + ([source] if source is not None else [])
+    rows = []
+    try:
+        with connection.cursor() as cursor:
+            try:
+                # Index (num_key, source) : une lecture d'index par clé
+                cursor.execute(query("num_key" if _num_key_column else ARTICLE_NUM_KEY_EXPRESSION), params)
+            except psycopg2.errors.UndefinedColumn:
+                # Base non migrée : même règle, calculée à la volée
+                connection.rollback()
+                _num_key_column = False
+                cursor.execute(query(ARTICLE_NUM_KEY_EXPRESSION), params)
+            rows = cursor.fetchall()
+    except Exception as e:
+        logger.error("Erreur lors de la recherche d'articles par numéro: %s", e)
+    finally:
+        connection.close()
+    
+    order = {key: i for i, key in enumerate(keys)}
+    rows.sort(key=lambda row: (order.get(row[0], len(order)), row[1]))
+    return [Article(*row[1:]) for row in rows]
+
+def get_all_sujets(source: Optional[str] = None, raise_errors: bool = False) -> List[Sujet]:
     """
     Récupère tous les sujets
     
+    Args:
+        source: Ne garder que les sujets ayant des articles dans cette source
+        raise_errors: Lève DatabaseUnavailable au lieu de retourner une liste
+            vide si la base est injoignable ou la requête échoue
+    
     Returns:
-        Liste de dictionnaires contenant les sujets
+        Liste des sujets (Sujet)
     """
     if not PSYCOPG2_AVAILABLE:
+        _unavailable(raise_errors, "psycopg2 non disponible")
         return []
     
-    connection = get_db_connection()
+    connection = get_db_connection(read_only=True)
     if not connection:
+        _unavailable(raise_errors, "connexion PostgreSQL impossible")
         return []
     
     sujets = []
     try:
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cursor.execute(
-            "SELECT id, titre_sujet, description "
-            "FROM public.sujet "
-            "ORDER BY id ASC"
-        )
+        cursor = connection.cursor()
+        if source:
+            execute_prepared(cursor, "chatrh_sujets_source", (source,))
+        else:
+            execute_prepared(cursor, "chatrh_sujets")
         
-        for row in cursor.fetchall():
-            sujets.append({
-                "id": row['id'],
-                "titre_sujet": row['titre_sujet'],
-                "description": row['description']
-            })
+        sujets = [Sujet(*row) for row in cursor.fetchall()]
     except Exception as e:
-        print(f"Erreur lors de la récupération des sujets: {e}")
+        logger.error("Erreur lors de la récupération des sujets: %s", e)
+        _unavailable(raise_errors, "lecture des sujets impossible", e)
     finally:
         if connection:
             cursor.close()
@@ -218,41 +661,37 @@ def get_all_sujets() -> List[Dict]:
     
     return sujets
 
-def get_sujet_by_id(sujet_id: int) -> Optional[Dict]:
+def get_sujet_by_id(sujet_id: int, raise_errors: bool = False) -> Optional[Sujet]:
     """
     Récupère un sujet par son ID
     
     Args:
         sujet_id: L'ID du sujet
+        raise_errors: Lève DatabaseUnavailable au lieu de retourner None
+            si la base est injoignable ou la requête échoue
     
     Returns:
-        Dictionnaire contenant le sujet ou None
+        Le sujet (Sujet) ou None
     """
     if not PSYCOPG2_AVAILABLE:
+        _unavailable(raise_errors, "psycopg2 non disponible")
         return None
     
-    connection = get_db_connection()
+    connection = get_db_connection(read_only=True)
     if not connection:
+        _unavailable(raise_errors, "connexion PostgreSQL impossible")
         return None
     
     try:
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cursor.execute(
-            "SELECT id, titre_sujet, description "
-            "FROM public.sujet "
-            "WHERE id = %s",
-            (sujet_id,)
-        )
+        cursor = connection.cursor()
+        execute_prepared(cursor, "chatrh_sujet", (sujet_id,))
         
         row = cursor.fetchone()
         if row:
-            return {
-                "id": row['id'],
-                "titre_sujet": row['titre_sujet'],
-                "description": row['description']
-            }
+            return Sujet(*row)
     except Exception as e:
-        print(f"Erreur lors de la récupération du sujet: {e}")
+        logger.error("Erreur lors de la récupération du sujet: %s", e)
+        _unavailable(raise_errors, "lecture du sujet impossible", e)
     finally:
         if connection:
             cursor.close()
@@ -270,7 +709,7 @@ def get_articles_count() -> int:
     if not PSYCOPG2_AVAILABLE:
         return 0
     
-    connection = get_db_connection()
+    connection = get_db_connection(read_only=True)
     if not connection:
         return 0
     
@@ -280,9 +719,167 @@ def get_articles_count() -> int:
         count = cursor.fetchone()[0]
         return count
     except Exception as e:
-        print(f"Erreur lors du comptage des articles: {e}")
+        logger.error("Erreur lors du comptage des articles: %s", e)
         return 0
     finally:
         if connection:
             cursor.close()
             connection.close()
+
+def get_sujets_with_counts(topic: Optional[str] = None) -> Tuple[List[Sujet], Dict[int, int]]:
+    """
+    Récupère les sujets et le nombre d'articles des sujets d'un thème,
+    en un seul aller-retour
+    
+    Args:
+        topic: ID de sujet ou mot du titre (optionnel) ; le nombre
+            d'articles n'est compté que pour les sujets correspondants
+    
+    Returns:
+        Tuple (sujets, nombre d'articles par ID de sujet)
+    """
+    queries = {
+        "sujets": (
+            f"SELECT {SUJET_COLUMNS} FROM public.sujet ORDER BY id ASC", (), SUJET_COLUMNS.split(", ")
+        )
+    }
+    if topic:
+        queries["counts"] = (
+            "SELECT s.id, COUNT(a.article_id) AS articles "
+            "FROM public.sujet s JOIN public.article a ON a.id_sujet = s.id "
+            "WHERE s.id::text = %s OR position(lower(%s) in lower(s.titre_sujet)) > 0 "
+            "GROUP BY s.id",
+            (topic, topic),
+            ("id", "articles")
+        )
+    results = run_batch(queries)
+    sujets = [Sujet(*row) for row in results["sujets"]]
+    counts = {id_sujet: count for id_sujet, count in results.get("counts", [])}
+    return sujets, counts
+
+def _article_columns(include_contenu: bool) -> str:
+    """Colonnes à sélectionner (sans le contenu pour les métadonnées seules)"""
+    if include_contenu:
+        return ARTICLE_COLUMNS
+    return "article_id, id_sujet, num_article, source, NULL::text AS contenu"
+
+def list_articles(
+    after_id: int = 0,
+    limit: int = 50,
+    id_sujet: Optional[int] = None,
+    include_contenu: bool = True,
+    source: Optional[str] = None,
+    raise_errors: bool = False
+) -> List[Article]:
+    """
+    Liste une page d'articles par pagination "keyset" sur article_id
+    
+    Contrairement à OFFSET, le coût d'une page ne dépend pas de sa position :
+    la requête reprend directement après le dernier article_id vu.
+    
+    Args:
+        after_id: Dernier article_id de la page précédente (0 pour la première)
+        limit: Nombre maximum d'articles
+        id_sujet: Restreint la liste à un sujet (optionnel)
+        include_contenu: Inclut le contenu complet des articles
+        source: Restreint la liste à une source (optionnel)
+        raise_errors: Lève DatabaseUnavailable au lieu de retourner une page
+            vide si la base est injoignable ou la requête échoue
+    
+    Returns:
+        Liste des articles de la page (contenu à None si non demandé)
+    """
+    if not PSYCOPG2_AVAILABLE:
+        _unavailable(raise_errors, "psycopg2 non disponible")
+        return []
+    
+    connection = get_db_connection(read_only=True)
+    if not connection:
+        _unavailable(raise_errors, "connexion PostgreSQL impossible")
+        return []
+    
+    articles = []
+    cursor = None
+    try:
+        cursor = connection.cursor()
+        query = f"SELECT {_article_columns(include_contenu)} FROM public.article WHERE article_id > %s "
+        params = [after_id]
+        if id_sujet is not None:
+            query += "AND id_sujet = %s "
+            params.append(id_sujet)
+        if source is not None:
+            query += "AND source = %s "
+            params.append(source)
+        query += "ORDER BY article_id ASC LIMIT %s"
+        params.append(limit)
+        cursor.execute(query, params)
+        articles = [Article(*row) for row in cursor.fetchall()]
+    except Exception as e:
+        logger.error("Erreur lors de la pagination des articles: %s", e)
+        _unavailable(raise_errors, "pagination des articles impossible", e)
+    finally:
+        if cursor:
+            cursor.close()
+        connection.close()
+    
+    return articles
+
+def iter_articles(
+    id_sujet: Optional[int] = None,
+    include_contenu: bool = True,
+    batch_size: int = 500,
+    source: Optional[str] = None,
+    raise_errors: bool = False
+) -> Iterator[Article]:
+    """
+    Parcourt les articles via un curseur côté serveur
+    
+    Seuls batch_size articles sont en mémoire à un instant donné, quelle
+    que soit la taille du corpus.
+    
+    Args:
+        id_sujet: Restreint le parcours à un sujet (optionnel)
+        include_contenu: Inclut le contenu complet des articles
+        batch_size: Nombre de lignes récupérées par aller-retour
+        source: Restreint le parcours à une source (optionnel)
+        raise_errors: Lève DatabaseUnavailable au lieu d'un parcours vide
+            si la base est injoignable
+    
+    Returns:
+        Un itérateur d'articles, dans l'ordre de article_id
+    """
+    if not PSYCOPG2_AVAILABLE:
+        _unavailable(raise_errors, "psycopg2 non disponible")
+        return
+    
+    connection = get_db_connection(read_only=True)
+    if not connection:
+        _unavailable(raise_errors, "connexion PostgreSQL impossible")
+        return
+    
+    try:
+        # Un curseur nommé est un curseur côté serveur (DECLARE ... CURSOR)
+        with connection.cursor(name="iter_articles") as cursor:
+            cursor.itersize = batch_size
+            query = f"SELECT {_article_columns(include_contenu)} FROM public.article "
+            conditions = []
+            params = []
+            if id_sujet is not None:
+                conditions.append("id_sujet = %s")
+                params.append(id_sujet)
+            if source is not None:
+                conditions.append("source = %s")
+                params.append(source)
+            if conditions:
+                query += "WHERE " + " AND ".join(conditions) + " "
+            query += "ORDER BY article_id ASC"
+            try:
+                cursor.execute(query, params)
+            except Exception as e:
+                logger.error("Erreur lors du parcours des articles: %s", e)
+                _unavailable(raise_errors, "parcours des articles impossible", e)
+                raise
+            for row in cursor:
+                yield Article(*row)
+    finally:
+        connection.close()
@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+Ingestion en masse de corpus juridiques (CSV / XLSX) dans PostgreSQL
+
+Les fichiers sont lus ligne par ligne (mémoire constante), chaque ligne est
+validée et normalisée, puis les articles sont chargés par lots via COPY
+dans une table temporaire avant d'être fusionnés (upsert) dans
+public.sujet / public.article.
+"""
+
+import csv
+import io
+import logging
+import os
+import re
+import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Import optionnel d'openpyxl - nécessaire uniquement pour les fichiers .xlsx
+try:
+    import openpyxl
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+from app.config import settings
+from app.db.corpus import notify_corpus_change
+from app.db.db_postgres import PSYCOPG2_AVAILABLE, get_db_connection
+from app.db.models import normalize_source
+from app.db.passages import index_passages
+from app.db.replicas import primary_reads
+from app.db.schema import (
+    ARTICLE_NUM_KEY_DDL,
+    ARTICLE_NUM_KEY_EXPRESSION,
+    ARTICLE_SOURCE_DDL,
+    CORPUS_VERSION_BUMP,
+    CORPUS_VERSION_DDL,
+    ensure_schema,
+)
+
+# Noms de colonnes acceptés dans les fichiers sources
+COLUMN_ALIASES = {
+    "sujet": "sujet",
+    "titre_sujet": "sujet",
+    "theme": "sujet",
+    "id_sujet": "id_sujet",
+    "description": "description",
+    "description_sujet": "description",
+    "num_article": "num_article",
+    "numero": "num_article",
+    "article": "num_article",
+    "source": "source",
+    "contenu": "contenu",
+    "texte": "contenu",
+}
+
+MAX_REPORTED_ERRORS = 20
+
+_ARTICLE_NUMBER_RE = re.compile(
+    r"^(?:art(?:icle)?\b\.?)?\s*([A-Za-z]{1,2}(?=[\s.\-]*\d))?[\s.\-]*(\d+(?:[.\-/]\d+)*)\s*([A-Za-z]{0,3})$",
+    re.IGNORECASE
+)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_num_article(value: Optional[str]) -> Optional[str]:
+    """
+    Normalise un numéro d'article vers la forme canonique "Art.L.148"
+
+    Args:
+        value: Numéro brut ("L 148", "article L.148", "Art.148"...)
+
+    Returns:
+        Le numéro normalisé, ou None si la valeur est vide
+    """
+    if value is None:
+        return None
+    text = _WHITESPACE_RE.sub(" ", str(value)).strip()
+    if not text:
+        return None
+    # Les tableurs renvoient parfois "148.0" pour une cellule numérique
+    if re.fullmatch(r"\d+\.0", text):
+        text = text[:-2]
+    match = _ARTICLE_NUMBER_RE.match(text)
+    if not match:
+        return text
+    prefix, number, suffix = match.groups()
+    canonical = "Art."
+    if prefix:
+        canonical += f"{prefix.upper()}."
+    canonical += number.replace("/", "-")
+    if suffix:
+        canonical += f" {suffix.lower()}"
+    return canonical
+
+def _normalize_header(name) -> Optional[str]:
+    key = _WHITESPACE_RE.sub("_", str(name or "").strip().lower())
+    return COLUMN_ALIASES.get(key)
+
+def _iter_csv_rows(path: str) -> Iterator[Dict[str, str]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(f, dialect)
+        header = [_normalize_header(h) for h in next(reader, [])]
+        for row in reader:
+            yield {col: value for col, value in zip(header, row) if col}
+
+def _iter_xlsx_rows(path: str) -> Iterator[Dict[str, str]]:
+    if not OPENPYXL_AVAILABLE:
+        raise RuntimeError("openpyxl n'est pas installé - impossible de lire les fichiers .xlsx")
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_normalize_header(h) for h in next(rows, ())]
+        for row in rows:
+            yield {col: value for col, value in zip(header, row) if col and value is not None}
+    finally:
+        workbook.close()
+
+def iter_source_rows(path: str) -> Iterator[Dict[str, str]]:
+    """
+    Lit un fichier CSV ou XLSX ligne par ligne
+
+    Args:
+        path: Chemin du fichier
+
+    Returns:
+        Un itérateur de dictionnaires (colonnes normalisées)
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".xlsx", ".xlsm"):
+        return _iter_xlsx_rows(path)
+    if extension in (".csv", ".tsv", ".txt"):
+        return _iter_csv_rows(path)
+    raise ValueError(f"Format de fichier non supporté: {extension}")
+
+def validate_row(
+    raw: Dict[str, str],
+    default_source: Optional[str] = None,
+    default_sujet: Optional[str] = None,
+    known_sujet_ids: Optional[Set[int]] = None
+) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Valide et normalise une ligne du fichier source
+
+    Args:
+        raw: Ligne brute (colonnes normalisées)
+        default_source: Source à utiliser si la colonne est absente
+        default_sujet: Sujet à utiliser si la colonne est absente
+        known_sujet_ids: Sujets existants en base (None : non vérifié)
+
+    Returns:
+        Un tuple (ligne normalisée, message d'erreur)
+    """
+    contenu = str(raw.get("contenu") or "").strip()
+    if not contenu:
+        return None, "contenu vide"
+
+    num_article = normalize_num_article(raw.get("num_article"))
+    if not num_article:
+        return None, "num_article manquant"
+
+    source = normalize_source(raw.get("source"), default_source)
+    if not source:
+        return None, "source manquante"
+
+    id_sujet = None
+    if raw.get("id_sujet") not in (None, ""):
+        try:
+            id_sujet = int(float(raw["id_sujet"]))
+        except (TypeError, ValueError):
+            return None, f"id_sujet invalide: {raw['id_sujet']!r}"
+        if known_sujet_ids is not None and id_sujet not in known_sujet_ids:
+            return None, f"id_sujet {id_sujet} inexistant"
+
+    sujet = _WHITESPACE_RE.sub(" ", str(raw.get("sujet") or default_sujet or "")).strip()
+    if id_sujet is None and not sujet:
+        return None, "sujet manquant"
+
+    description = str(raw.get("description") or "").strip() or None
+    return {
+        "id_sujet": id_sujet,
+        "sujet": sujet,
+        "description": description,
+        "num_article": num_article,
+        "source": source,
+        "contenu": contenu,
+    }, None
+
+def _copy_escape(value) -> str:
+    """Échappe une valeur pour le format texte de COPY"""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+class CorpusIngestor:
+    """Charge des articles par lots dans public.sujet / public.article"""
+
+    def __init__(self, connection, batch_size: Optional[int] = None):
+        self.connection = connection
+        self.batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        # Faux si la colonne num_key n'a pas pu être créée : la clé est
+        # alors calculée à la volée (même expression)
+        self.num_key_column = True
+        # Faux si public.corpus_version n'a pas pu être créée : la version
+        # du corpus est alors calculée à partir des tables
+        self.version_table = True
+        self.sujet_ids: Dict[str, int] = {}
+        self.sujet_descriptions: Dict[int, Optional[str]] = {}
+        self.known_sujet_ids: Set[int] = set()
+        self.affected_sujets: Set[int] = set()
+        self.inserted = 0
+        self.updated = 0
+        self.sujets_created = 0
+        self._seq = 0
+
+    def prepare_schema(self) -> None:
+        """
+        Crée les index et tables annexes de l'ingestion
+
+        Chaque groupe est créé séparément : un échec (droits insuffisants,
+        verrou) est journalisé et l'ingestion continue sans lui.
+        """
+        try:
+            ensure_schema(self.connection, ARTICLE_SOURCE_DDL)
+        except Exception as e:
+            self.connection.rollback()
+            logger.warning("Index par source non créé: %s", e)
+        try:
+            ensure_schema(self.connection, CORPUS_VERSION_DDL)
+        except Exception as e:
+            self.connection.rollback()
+            self.version_table = False
+            logger.warning("Table corpus_version non créée, version calculée à partir des tables: %s", e)
+        try:
+            # Colonne num_key et index de la recherche par numéro
+            ensure_schema(self.connection, ARTICLE_NUM_KEY_DDL)
+        except Exception as e:
+            self.connection.rollback()
+            self.num_key_column = False
+            logger.warning("Colonne num_key non créée, clé calculée à la volée: %s", e)
+
+    def prepare(self) -> None:
+        """Crée la table de transit et resynchronise les séquences"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS ingest_article ("
+                " seq BIGINT, id_sujet INTEGER, num_article TEXT, source TEXT, contenu TEXT"
+                ") ON COMMIT DROP"
+            )
+            # Les scripts SQL historiques insèrent des IDs explicites :
+            # on recale les séquences pour éviter les conflits de clé
+            for table, column in (("public.sujet", "id"), ("public.article", "article_id")):
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), "
+                    f"GREATEST((SELECT MAX({column}) FROM {table}), 1))"
+                )
+            cursor.execute("SELECT id, titre_sujet, description FROM public.sujet")
+            for sujet_id, titre, description in cursor.fetchall():
+                self.sujet_ids[titre.lower()] = sujet_id
+                self.sujet_descriptions[sujet_id] = description
+                self.known_sujet_ids.add(sujet_id)
+
+    def _resolve_sujets(self, cursor, rows: List[Dict]) -> List[int]:
+        """
+        Résout les sujets d'un lot en une seule passe : création groupée des
+        sujets inconnus et mise à jour groupée des descriptions modifiées
+
+        Args:
+            cursor: Curseur de la transaction d'ingestion
+            rows: Lignes normalisées du lot
+
+        Returns:
+            L'ID du sujet de chaque ligne, dans l'ordre du lot
+        """
+        titles: Dict[str, str] = {}
+        descriptions: Dict[str, str] = {}
+        for row in rows:
+            # id_sujet explicite : existence vérifiée par validate_row
+            if row["id_sujet"] is not None:
+                continue
+            key = row["sujet"].lower()
+            titles.setdefault(key, row["sujet"])
+            if row["description"]:
+                # La dernière description du lot l'emporte
+                descriptions[key] = row["description"]
+
+        missing = [key for key in titles if key not in self.sujet_ids]
+        if missing:
+            cursor.execute(
+                "INSERT INTO public.sujet (titre_sujet, description) "
+                "SELECT * FROM unnest(%s::text[], %s::text[]) "
+                "RETURNING id, titre_sujet, description",
+                ([titles[key] for key in missing], [descriptions.get(key) for key in missing])
+            )
+            for sujet_id, titre, description in cursor.fetchall():
+                key = titre.lower()
+                self.sujet_ids[key] = sujet_id
+                self.sujet_descriptions[sujet_id] = description
+                self.known_sujet_ids.add(sujet_id)
+                self.sujets_created += 1
+
+        changed = {
+            self.sujet_ids[key]: description
+            for key, description in descriptions.items()
+            if self.sujet_descriptions.get(self.sujet_ids[key]) != description
+        }
+        if changed:
+            cursor.execute(
+                "UPDATE public.sujet s SET description = v.description "
+                "FROM unnest(%s::int[], %s::text[]) AS v(id, description) "
+                "WHERE s.id = v.id",
+                (list(changed), list(changed.values()))
+            )
+            self.sujet_descriptions.update(changed)
+
+        return [
+            row["id_sujet"] if row["id_sujet"] is not None else self.sujet_ids[row["sujet"].lower()]
+            for row in rows
+        ]
+
+    def load_batch(self, rows: List[Dict]) -> None:
+        """
+        Charge un lot de lignes validées via COPY puis fusionne dans public.article
+
+        Args:
+            rows: Lignes normalisées par validate_row
+        """
+        if not rows:
+            return
+
+        buffer = io.StringIO()
+        with self.connection.cursor() as cursor:
+            # Sujets résolus une fois par lot, avant le COPY
+            sujet_ids = self._resolve_sujets(cursor, rows)
+            for row, sujet_id in zip(rows, sujet_ids):
+                self._seq += 1
+                buffer.write("\t".join((
+                    str(self._seq),
+                    str(sujet_id),
+                    _copy_escape(row["num_article"]),
+                    _copy_escape(row["source"]),
+                    _copy_escape(row["contenu"]),
+                )))
+                buffer.write("\n")
+            buffer.seek(0)
+
+            cursor.execute("TRUNCATE ingest_article")
+            cursor.copy_expert(
+                "COPY ingest_article (seq, id_sujet, num_article, source, contenu) FROM STDIN",
+                buffer
+            )
+
+            # Les articles sont identifiés par (source, num_key) : "L.148" et
+            # "Art.L.148" désignent le même article. Une même clé peut
+            # apparaître plusieurs fois dans un lot : la dernière occurrence
+            # l'emporte
+            staged = (
+                "SELECT DISTINCT ON (source, num_key) id_sujet, num_article, num_key, source, contenu "
+                f"FROM (SELECT *, {ARTICLE_NUM_KEY_EXPRESSION} AS num_key FROM ingest_article) i "
+                "ORDER BY source, num_key, seq DESC"
+            )
+            if self.num_key_column:
+                existing_key = "o.num_key"
+            else:
+                existing_key = ARTICLE_NUM_KEY_EXPRESSION.replace("num_article", "o.num_article")
+
+            cursor.execute(
+                f"WITH s AS ({staged}), "
+                "upd AS ("
+                " UPDATE public.article a"
+                " SET id_sujet = s.id_sujet, num_article = s.num_article, contenu = s.contenu"
+                f" FROM s JOIN public.article o ON o.source = s.source AND {existing_key} = s.num_key"
+                " WHERE a.article_id = o.article_id"
+                " AND (a.id_sujet, a.num_article, a.contenu) IS DISTINCT FROM (s.id_sujet, s.num_article, s.contenu)"
+                " RETURNING o.id_sujet AS old_sujet, a.id_sujet AS new_sujet"
+                ") "
+                "SELECT old_sujet, new_sujet, COUNT(*) FROM upd GROUP BY old_sujet, new_sujet"
+            )
+            for old_sujet, new_sujet, count in cursor.fetchall():
+                self.affected_sujets.update((old_sujet, new_sujet))
+                self.updated += count
+
+            cursor.execute(
+                f"WITH s AS ({staged}), "
+                "ins AS ("
+                " INSERT INTO public.article (id_sujet, num_article, source, contenu)"
+                " SELECT s.id_sujet, s.num_article, s.source, s.contenu FROM s"
+                " WHERE NOT EXISTS ("
+                "  SELECT 1 FROM public.article o"
+                f"  WHERE o.source = s.source AND {existing_key} = s.num_key"
+                " )"
+                " RETURNING id_sujet"
+                ") "
+                "SELECT id_sujet, COUNT(*) FROM ins GROUP BY id_sujet"
+            )
+            for sujet_id, count in cursor.fetchall():
+                self.affected_sujets.add(sujet_id)
+                self.inserted += count
+
+def ingest_files(
+    paths: List[str],
+    default_source: Optional[str] = None,
+    default_sujet: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    dry_run: bool = False
+) -> Dict:
+    """
+    Ingère un ou plusieurs fichiers CSV / XLSX dans la base de données
+
+    Args:
+        paths: Fichiers à charger
+        default_source: Source utilisée si la colonne "source" est absente
+        default_sujet: Sujet utilisé si la colonne "sujet" est absente
+        batch_size: Taille des lots envoyés via COPY
+        dry_run: Valide les fichiers sans rien écrire en base
+
+    Returns:
+        Un dictionnaire récapitulatif de l'ingestion
+    """
+    started = time.perf_counter()
+    default_source = default_source or settings.INGEST_DEFAULT_SOURCE
+    summary = {
+        "rows_read": 0,
+        "rows_valid": 0,
+        "rejected": 0,
+        "inserted": 0,
+        "updated": 0,
+        "sujets_created": 0,
+        "affected_sujets": [],
+        "errors": [],
+    }
+
+    def record_error(path: str, line: int, message: str) -> None:
+        summary["rejected"] += 1
+        if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+            summary["errors"].append(f"{os.path.basename(path)}:{line}: {message}")
+
+    connection = None
+    ingestor = None
+    if not dry_run:
+        if not PSYCOPG2_AVAILABLE:
+            raise RuntimeError("psycopg2 n'est pas disponible - ingestion impossible")
+        connection = get_db_connection()
+        if not connection:
+            raise RuntimeError("Connexion à PostgreSQL impossible")
+        ingestor = CorpusIngestor(connection, batch_size)
+
+    try:
+        if ingestor:
+            ingestor.prepare_schema()
+            ingestor.prepare()
+        size = batch_size or settings.INGEST_BATCH_SIZE
+        batch: List[Dict] = []
+        for path in paths:
+            # La ligne 1 est l'en-tête pour les deux formats
+            for line, raw in enumerate(iter_source_rows(path), start=2):
+                summary["rows_read"] += 1
+                row, error = validate_row(
+                    raw, default_source, default_sujet,
+                    ingestor.known_sujet_ids if ingestor else None
+                )
+                if error:
+                    record_error(path, line, error)
+                    continue
+                summary["rows_valid"] += 1
+                if ingestor:
+                    batch.append(row)
+                    if len(batch) >= size:
+                        ingestor.load_batch(batch)
+                        batch = []
+        if ingestor:
+            ingestor.load_batch(batch)
+            if ingestor.affected_sujets and ingestor.version_table:
+                # Nouvelle version du corpus, visible avec les lignes chargées ;
+                # les serveurs ne rafraîchissent que ces sujets en la relisant
+                with connection.cursor() as cursor:
+                    cursor.execute(CORPUS_VERSION_BUMP, (sorted(ingestor.affected_sujets),))
+            connection.commit()
+    except Exception:
+        if connection:
+            connection.rollback()
+        raise
+    finally:
+        if connection:
+            connection.close()
+
+    if ingestor:
+        summary["inserted"] = ingestor.inserted
+        summary["updated"] = ingestor.updated
+        summary["sujets_created"] = ingestor.sujets_created
+        summary["affected_sujets"] = sorted(ingestor.affected_sujets)
+        if ingestor.affected_sujets:
+            refresh_after_ingestion(ingestor.affected_sujets)
+
+    summary["duration_seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+def refresh_after_ingestion(sujet_ids: Set[int]) -> None:
+    """
+    Met à jour les statistiques des index puis rafraîchit caches et index
+    dérivés pour les seuls sujets modifiés
+
+    Seuls les caches de ce processus sont rafraîchis ici : les serveurs
+    appliquent les mêmes sujets en relisant public.corpus_version.
+
+    Args:
+        sujet_ids: IDs des sujets touchés par l'ingestion
+    """
+    connection = get_db_connection()
+    if connection:
+        try:
+            # ANALYZE met à jour les statistiques utilisées par le planificateur
+            # pour les index sur les lignes fraîchement chargées
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE public.sujet")
+                cursor.execute("ANALYZE public.article")
+        except Exception as e:
+            logger.error("Erreur lors de la mise à jour des statistiques: %s", e)
+        finally:
+            connection.close()
+
+    # Les index dérivés relisent le primaire : un réplica peut ne pas avoir
+    # encore rejoué les lignes qui viennent d'être chargées
+    with primary_reads():
+        if settings.PASSAGES_ENABLED and sujet_ids:
+            try:
+                index_passages(sujet_ids)
+            except Exception as e:
+                # /chat découpe les articles en mémoire : seule la table est en retard
+                logger.error("Erreur lors de l'indexation des passages: %s", e)
+
+        notify_corpus_change(sujet_ids)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Représentation compacte des lignes de la base de données pour ChatRH
+
+Les articles et sujets sont construits directement à partir des tuples
+renvoyés par le curseur, dans des classes à __slots__ (pas de __dict__
+par instance). Ils restent utilisables comme des dictionnaires en lecture
+(article["contenu"], article.get("source")) pour le code existant.
+"""
+
+import re
+import sys
+from typing import Dict, Optional
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_source(value: Optional[str], default: Optional[str] = None) -> Optional[str]:
+    """
+    Normalise le libellé de la source (espaces superflus, valeur par défaut)
+
+    Args:
+        value: Source brute
+        default: Source utilisée si la valeur est vide
+
+    Returns:
+        La source normalisée (internée) ou None
+    """
+    text = _WHITESPACE_RE.sub(" ", str(value)).strip() if value is not None else ""
+    if not text:
+        text = default or ""
+    return sys.intern(text) if text else None
+
+class _Row:
+    """Base commune : accès par attribut et protocole de mapping en lecture"""
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __contains__(self, key) -> bool:
+        return key in self.__slots__
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self) -> int:
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r:.40}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def get(self, key: str, default=None):
+        """Équivalent de dict.get"""
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def keys(self):
+        """Noms des champs (permet dict(row))"""
+        return self.__slots__
+
+    def to_dict(self) -> Dict:
+        """
+        Convertit la ligne en dictionnaire (sérialisation JSON)
+
+        Returns:
+            Un nouveau dictionnaire avec tous les champs
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+class Article(_Row):
+    """Article du Code du travail"""
+
+    __slots__ = ("article_id", "id_sujet", "num_article", "source", "contenu")
+
+    def __init__(
+        self,
+        article_id: int,
+        id_sujet: int,
+        num_article: Optional[str],
+        source: Optional[str],
+        contenu: Optional[str]
+    ):
+        self.article_id = article_id
+        self.id_sujet = id_sujet
+        self.num_article = num_article
+        # Quelques sources distinctes pour des milliers d'articles :
+        # l'internement partage une seule chaîne par source
+        self.source = sys.intern(source) if source else source
+        self.contenu = contenu
+
+class Sujet(_Row):
+    """Sujet (thème) regroupant des articles"""
+
+    __slots__ = ("id", "titre_sujet", "description")
+
+    def __init__(self, id: int, titre_sujet: str, description: Optional[str]):
+        self.id = id
+        self.titre_sujet = titre_sujet
+        self.description = description
+
+class Passage(_Row):
+    """Passage (extrait contigu) d'un article, repéré par ses positions"""
+
+    __slots__ = (
+        "article_id", "position", "start_offset", "end_offset", "contenu",
+        "id_sujet", "num_article", "source"
+    )
+
+    def __init__(
+        self,
+        article_id: int,
+        position: int,
+        start_offset: int,
+        end_offset: int,
+        contenu: str,
+        id_sujet: Optional[int] = None,
+        num_article: Optional[str] = None,
+        source: Optional[str] = None
+    ):
+        self.article_id = article_id
+        self.position = position
+        self.start_offset = start_offset
+        self.end_offset = end_offset
+        self.contenu = contenu
+        # Référence de l'article parent, pour le score et les citations
+        self.id_sujet = id_sujet
+        self.num_article = num_article
+        self.source = sys.intern(source) if source else source
+
+# Colonnes à sélectionner, dans l'ordre attendu par les constructeurs
+ARTICLE_COLUMNS = "article_id, id_sujet, num_article, source, contenu"
+SUJET_COLUMNS = "id, titre_sujet, description"
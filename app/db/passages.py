@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Découpage des articles en passages pour la recherche
+
+Les articles longs sont découpés en passages qui se chevauchent, en
+respectant les alinéas et les phrases : seul l'extrait utile est transmis
+au prompt, et la citation (numéro d'article) reste celle de l'article.
+
+Pour /chat, le découpage est fait en mémoire à partir du contenu déjà
+chargé, et mis en cache par (article_id, empreinte du contenu) : un
+article modifié change d'empreinte, son ancien découpage n'est plus
+jamais servi. public.article_passage conserve les passages avec leurs
+positions et l'empreinte (md5) du contenu découpé, pour les traitements
+hors ligne ; un passage dont l'empreinte diffère de md5(article.contenu)
+est périmé.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.db.db_postgres import PSYCOPG2_AVAILABLE, get_db_connection, iter_articles
+from app.db.models import Passage
+from app.db.replicas import primary_reads
+from app.db.schema import ARTICLE_PASSAGE_DDL, ensure_schema
+
+logger = logging.getLogger(__name__)
+
+# Fin d'alinéa, ou espace suivant une ponctuation de fin de phrase
+_BOUNDARY_RE = re.compile(r"\s*\n\s*|(?<=[.;!?])\s+")
+
+# Nombre de passages insérés par requête lors de l'indexation
+INSERT_BATCH_SIZE = 1000
+
+def _split_units(text: str, max_chars: int) -> List[Tuple[int, int]]:
+    """Positions des alinéas / phrases, les trop longs coupés à un espace"""
+    spans = []
+    start = 0
+    for match in _BOUNDARY_RE.finditer(text):
+        if match.start() > start:
+            spans.append((start, match.start()))
+        start = match.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+
+    units = []
+    for start, end in spans:
+        while end - start > max_chars:
+            cut = text.rfind(" ", start + 1, start + max_chars)
+            if cut <= start:
+                cut = start + max_chars
+            units.append((start, cut))
+            start = cut
+            while start < end and text[start].isspace():
+                start += 1
+        if end > start:
+            units.append((start, end))
+    return units
+
+def split_passages(
+    text: Optional[str],
+    max_chars: Optional[int] = None,
+    overlap_chars: Optional[int] = None
+) -> List[Tuple[int, int]]:
+    """
+    Découpe un texte en passages qui se chevauchent
+
+    Les alinéas et phrases sont regroupés tant que le passage ne dépasse pas
+    max_chars ; le passage suivant reprend les dernières phrases du
+    précédent dans la limite de overlap_chars.
+
+    Args:
+        text: Le contenu de l'article
+        max_chars: Taille maximale d'un passage (caractères)
+        overlap_chars: Taille maximale du chevauchement entre deux passages
+
+    Returns:
+        Liste de positions (début, fin) dans le texte
+    """
+    if not text:
+        return []
+    max_chars = max_chars or settings.PASSAGE_MAX_CHARS
+    overlap_chars = settings.PASSAGE_OVERLAP_CHARS if overlap_chars is None else overlap_chars
+    if len(text) <= max_chars:
+        return [(0, len(text))]
+
+    units = _split_units(text, max_chars)
+    passages = []
+    i = 0
+    while i < len(units):
+        start = units[i][0]
+        j = i
+        while j + 1 < len(units) and units[j + 1][1] - start <= max_chars:
+            j += 1
+        end = units[j][1]
+        passages.append((start, end))
+        if j + 1 >= len(units):
+            break
+        # Le passage suivant reprend les dernières unités (chevauchement)
+        k = j + 1
+        while k - 1 > i and end - units[k - 1][0] <= overlap_chars:
+            k -= 1
+        i = k
+    return passages
+
+def article_passages(article) -> List[Passage]:
+    """
+    Découpe un article en passages, sans accès à la base
+
+    Args:
+        article: L'article (Article) avec son contenu
+
+    Returns:
+        Les passages de l'article, dans l'ordre
+    """
+    text = article.contenu or ""
+    return [
+        Passage(
+            article.article_id, position, start, end, text[start:end],
+            article.id_sujet, article.num_article, article.source
+        )
+        for position, (start, end) in enumerate(split_passages(text))
+    ]
+
+def content_hash(text: Optional[str]) -> str:
+    """
+    Empreinte du contenu d'un article (identique à md5(contenu) en SQL)
+
+    Args:
+        text: Le contenu de l'article
+
+    Returns:
+        L'empreinte hexadécimale
+    """
+    return hashlib.md5((text or "").encode("utf-8")).hexdigest()
+
+class PassageCache:
+    """Cache LRU (nombre d'articles) (article_id, empreinte) -> passages"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, str], Tuple[Passage, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[int, str]) -> Optional[List[Passage]]:
+        """Retourne les passages en cache pour une clé, ou None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return list(entry)
+
+    def put(self, key: Tuple[int, str], passages: List[Passage]) -> None:
+        """Met en cache le découpage d'un article"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = tuple(passages)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Vide le cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Statistiques du cache"""
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+# Instance globale du cache des passages
+passage_cache = PassageCache(settings.PASSAGE_CACHE_SIZE)
+
+def get_passages(articles: Iterable) -> Dict[int, List[Passage]]:
+    """
+    Découpe des articles en passages, sans accès à la base
+
+    Le contenu des articles est déjà en mémoire : le découpage est fait
+    dans le processus et mis en cache par empreinte du contenu (un article
+    modifié est redécoupé).
+
+    Args:
+        articles: Les articles (Article) avec leur contenu
+
+    Returns:
+        Dictionnaire article_id -> passages, dans l'ordre
+    """
+    passages = {}
+    for article in articles:
+        key = (article.article_id, content_hash(article.contenu))
+        candidates = passage_cache.get(key)
+        if candidates is None:
+            candidates = article_passages(article)
+            passage_cache.put(key, candidates)
+        passages[article.article_id] = candidates
+    return passages
+
+def index_passages(sujet_ids: Optional[Set[int]] = None) -> Dict:
+    """
+    (Re)construit les passages des articles dans public.article_passage
+
+    Les anciens passages sont remplacés dans la même transaction : les
+    lecteurs voient l'ancien ou le nouveau découpage, jamais un mélange.
+
+    Args:
+        sujet_ids: Restreint l'indexation à ces sujets (tous par défaut)
+
+    Returns:
+        Résumé (articles, passages, durée)
+    """
+    started = time.perf_counter()
+    summary = {"articles": 0, "passages": 0, "duration_seconds": 0.0}
+    if not PSYCOPG2_AVAILABLE:
+        raise RuntimeError("psycopg2 non disponible")
+    connection = get_db_connection()
+    if not connection:
+        raise RuntimeError("Connexion à PostgreSQL impossible")
+
+    import psycopg2.extras
+
+    def flush(cursor, rows: List[Tuple]) -> None:
+        psycopg2.extras.execute_values(
+            cursor,
+            "INSERT INTO public.article_passage "
+            "(article_id, position, start_offset, end_offset, contenu, content_hash) VALUES %s",
+            rows,
+            page_size=INSERT_BATCH_SIZE
+        )
+        summary["passages"] += len(rows)
+        rows.clear()
+
+    try:
+        ensure_schema(connection, ARTICLE_PASSAGE_DDL)
+        with connection.cursor() as cursor:
+            if sujet_ids is None:
+                cursor.execute("DELETE FROM public.article_passage")
+                sujets = [None]
+            else:
+                cursor.execute(
+                    "DELETE FROM public.article_passage p USING public.article a "
+                    "WHERE a.article_id = p.article_id AND a.id_sujet = ANY(%s)",
+                    (list(sujet_ids),)
+                )
+                sujets = sorted(sujet_ids)
+
+            rows: List[Tuple] = []
+            # Les articles sont relus sur le primaire (pas de réplica en retard)
+            with primary_reads():
+                for id_sujet in sujets:
+                    for article in iter_articles(id_sujet=id_sujet):
+                        summary["articles"] += 1
+                        text = article.contenu or ""
+                        digest = content_hash(text)
+                        for position, (start, end) in enumerate(split_passages(text)):
+                            rows.append((article.article_id, position, start, end, text[start:end], digest))
+                        if len(rows) >= INSERT_BATCH_SIZE:
+                            flush(cursor, rows)
+            if rows:
+                flush(cursor, rows)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    summary["duration_seconds"] = round(time.perf_counter() - started, 2)
+    return summary
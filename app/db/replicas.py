@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Répartition des lectures sur des réplicas PostgreSQL
+
+Les fonctions de lecture (recherche d'articles, sujets, pagination)
+peuvent être servies par un ou plusieurs réplicas (DB_READ_REPLICAS) pour
+que les chargements et exports sur le primaire ne concurrencent pas la
+recherche de /chat. L'état des réplicas (joignable, retard de réplication,
+latence) est vérifié en arrière-plan toutes les DB_REPLICA_CHECK_INTERVAL
+secondes ; un réplica injoignable ou en retard de plus de
+DB_REPLICA_MAX_LAG secondes est écarté et la lecture part sur le primaire.
+
+Les écritures (ingestion, journal des requêtes, tâches) restent sur le
+primaire, de même que les lectures faites sous primary_reads() (index
+reconstruits juste après une ingestion).
+"""
+
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psycopg2
+    PSYCOPG2_AVAILABLE = True
+except ImportError:
+    PSYCOPG2_AVAILABLE = False
+
+STRATEGIES = ("round_robin", "least_latency")
+
+# Retard de réplication en secondes (0 hors réplication ou si le réplica a
+# rejoué tout ce qu'il a reçu, même sans écriture récente sur le primaire)
+REPLICA_LAG_QUERY = (
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+# Lectures forcées sur le primaire dans le contexte courant
+_primary_reads: ContextVar[bool] = ContextVar("primary_reads", default=False)
+
+@contextmanager
+def primary_reads() -> Iterator[None]:
+    """Envoie au primaire toutes les lectures du bloc (lecture de ses écritures)"""
+    token = _primary_reads.set(True)
+    try:
+        yield
+    finally:
+        _primary_reads.reset(token)
+
+def parse_replicas(value: str) -> List[Tuple[str, str]]:
+    """
+    Lit la liste des réplicas ("replica1:5432,replica2")
+
+    Args:
+        value: Valeur de DB_READ_REPLICAS
+
+    Returns:
+        Liste de (hôte, port) ; le port par défaut est DB_PORT
+    """
+    replicas = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.partition(":")
+        replicas.append((host, port or settings.DB_PORT))
+    return replicas
+
+class Replica:
+    """Un réplica et son dernier état connu"""
+
+    __slots__ = ("host", "port", "healthy", "lag_seconds", "latency_ms", "checked_at", "error", "reads", "failures")
+
+    def __init__(self, host: str, port: str):
+        self.host = host
+        self.port = port
+        # Écarté tant qu'il n'a pas été vérifié
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.latency_ms: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.reads = 0
+        self.failures = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    def to_dict(self) -> Dict:
+        """État du réplica (diagnostic)"""
+        return {
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "latency_ms": self.latency_ms,
+            "checked_at": self.checked_at,
+            "error": self.error,
+            "reads": self.reads,
+            "failures": self.failures
+        }
+
+class ReplicaSet:
+    """Choix d'un réplica sain pour chaque lecture"""
+
+    def __init__(self, replicas: List[Tuple[str, str]], strategy: str, max_lag: float, check_interval: float):
+        self.replicas = [Replica(host, port) for host, port in replicas]
+        if strategy not in STRATEGIES:
+            logger.warning("Stratégie de réplicas inconnue %r, round_robin utilisée", strategy)
+            strategy = "round_robin"
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._checking = False
+        self._checked_at = 0.0
+        self.fallback_reads = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Optional[Replica]:
+        """
+        Choisit le réplica d'une lecture
+
+        Déclenche au besoin une vérification en arrière-plan ; la lecture
+        en cours ne l'attend jamais.
+
+        Returns:
+            Le réplica, ou None pour lire sur le primaire
+        """
+        if not self.replicas or _primary_reads.get():
+            return None
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self._start_check()
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            self.fallback_reads += 1
+            return None
+        if self.strategy == "least_latency":
+            replica = min(healthy, key=lambda r: r.latency_ms)
+        else:
+            replica = healthy[next(self._counter) % len(healthy)]
+        replica.reads += 1
+        return replica
+
+    def mark_failed(self, replica: Replica, error: str) -> None:
+        """Écarte un réplica jusqu'à sa prochaine vérification réussie"""
+        replica.healthy = False
+        replica.error = error
+        replica.failures += 1
+        logger.warning("Réplica %s écarté: %s", replica.name, error)
+
+    def _start_check(self) -> None:
+        with self._lock:
+            if self._checking:
+                return
+            self._checking = True
+            self._checked_at = time.monotonic()
+        threading.Thread(target=self._run_check, name="replica-check", daemon=True).start()
+
+    def _run_check(self) -> None:
+        try:
+            self.check()
+        finally:
+            self._checking = False
+
+    def check(self) -> None:
+        """Vérifie maintenant chaque réplica (joignable, retard, latence)"""
+        for replica in self.replicas:
+            self._check_replica(replica)
+        self._checked_at = time.monotonic()
+
+    def _check_replica(self, replica: Replica) -> None:
+        if not PSYCOPG2_AVAILABLE:
+            replica.healthy = False
+            replica.error = "psycopg2 non disponible"
+            return
+        started = time.perf_counter()
+        connection = None
+        try:
+            connection = psycopg2.connect(
+                host=replica.host,
+                port=replica.port,
+                database=settings.DB_NAME,
+                user=settings.DB_USER,
+                password=settings.DB_PASSWORD,
+                connect_timeout=settings.DB_REPLICA_CONNECT_TIMEOUT
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(REPLICA_LAG_QUERY)
+                lag = float(cursor.fetchone()[0])
+            latency_ms = (time.perf_counter() - started) * 1000
+            # Moyenne glissante : un pic isolé ne fait pas basculer le choix
+            if replica.latency_ms is not None:
+                latency_ms = 0.7 * replica.latency_ms + 0.3 * latency_ms
+            replica.latency_ms = round(latency_ms, 1)
+            replica.lag_seconds = round(lag, 3)
+            replica.healthy = lag <= self.max_lag
+            replica.error = None if replica.healthy else f"retard de réplication {lag:.1f}s"
+        except Exception as e:
+            replica.healthy = False
+            replica.error = str(e).strip().splitlines()[0]
+        finally:
+            replica.checked_at = time.time()
+            if connection is not None:
+                connection.close()
+
+    def stats(self) -> Dict:
+        """État des réplicas et répartition des lectures"""
+        return {
+            "strategy": self.strategy,
+            "max_lag_seconds": self.max_lag,
+            "primary_fallback_reads": self.fallback_reads,
+            "replicas": {replica.name: replica.to_dict() for replica in self.replicas}
+        }
+
+# Instance globale (vide si DB_READ_REPLICAS n'est pas configuré)
+read_replicas = ReplicaSet(
+    parse_replicas(settings.DB_READ_REPLICAS),
+    strategy=settings.DB_REPLICA_STRATEGY,
+    max_lag=settings.DB_REPLICA_MAX_LAG,
+    check_interval=settings.DB_REPLICA_CHECK_INTERVAL
+)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Définitions SQL (DDL) des tables et index annexes de ChatRH
+
+Les tables principales (public.sujet, public.article) sont décrites dans
+create_and_load_from_excel.sql.example ; ce module regroupe les objets
+créés par l'application elle-même, de manière idempotente.
+"""
+
+# Journal des requêtes (/chat)
+QUERY_LOG_DDL = (
+    "CREATE TABLE IF NOT EXISTS public.query_log ("
+    " id BIGSERIAL PRIMARY KEY,"
+    " logged_at TIMESTAMPTZ NOT NULL DEFAULT now(),"
+    " query TEXT NOT NULL,"
+    " sujet TEXT,"
+    " article_ids INTEGER[],"
+    " timings JSONB,"
+    " cache JSONB,"
+    " status TEXT,"
+    " usage JSONB,"
+    " route JSONB"
+    ")",
+    "ALTER TABLE public.query_log ADD COLUMN IF NOT EXISTS usage JSONB",
+    "ALTER TABLE public.query_log ADD COLUMN IF NOT EXISTS route JSONB",
+    "CREATE INDEX IF NOT EXISTS query_log_query_idx ON public.query_log (query)",
+)
+
+# Tâches /chat asynchrones (CHAT_JOB_STORE=postgres, voir app/jobs.py)
+CHAT_JOB_DDL = (
+    "CREATE TABLE IF NOT EXISTS public.chat_job ("
+    " job_id TEXT PRIMARY KEY,"
+    " client_id TEXT,"
+    " status TEXT NOT NULL,"
+    " request JSONB NOT NULL,"
+    " result JSONB,"
+    " error JSONB,"
+    " created_at TIMESTAMPTZ NOT NULL DEFAULT now(),"
+    " started_at TIMESTAMPTZ,"
+    " finished_at TIMESTAMPTZ"
+    ")",
+    "ALTER TABLE public.chat_job ADD COLUMN IF NOT EXISTS claim_id TEXT",
+    "ALTER TABLE public.chat_job ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0",
+    "CREATE INDEX IF NOT EXISTS chat_job_created_at_idx ON public.chat_job (created_at)",
+    # File des tâches à réclamer (voir PostgresJobStore.claim)
+    "CREATE INDEX IF NOT EXISTS chat_job_queue_idx ON public.chat_job (created_at) "
+    "WHERE status IN ('pending', 'running')",
+)
+
+# Version du corpus (ETags, caches en mémoire) : une seule ligne, incrémentée
+# par chaque ingestion dans sa transaction avec les IDs des sujets modifiés,
+# que les serveurs appliquent en relisant la version (voir app/db/corpus.py)
+CORPUS_VERSION_DDL = (
+    "CREATE TABLE IF NOT EXISTS public.corpus_version ("
+    " id SMALLINT PRIMARY KEY CHECK (id = 1),"
+    " version BIGINT NOT NULL,"
+    " updated_at TIMESTAMPTZ NOT NULL DEFAULT now()"
+    ")",
+    "ALTER TABLE public.corpus_version ADD COLUMN IF NOT EXISTS sujet_ids INTEGER[]",
+)
+# Paramètre : IDs des sujets modifiés par l'ingestion
+CORPUS_VERSION_BUMP = (
+    "INSERT INTO public.corpus_version (id, version, sujet_ids) VALUES (1, 1, %s) "
+    "ON CONFLICT (id) DO UPDATE SET version = public.corpus_version.version + 1,"
+    " sujet_ids = EXCLUDED.sujet_ids, updated_at = now()"
+)
+
+# Clé canonique des numéros d'articles ("Art.L.148" -> "l148"), même règle
+# que app/tools/article_refs.article_ref_key ; l'index sert la recherche
+# exacte des articles cités dans une question et la fusion de l'ingestion.
+# Non unique : des graphies historiques ("L.148" / "Art.L.148") peuvent
+# donner la même clé dans une base existante
+ARTICLE_NUM_KEY_EXPRESSION = (
+    "regexp_replace(regexp_replace(regexp_replace(lower(num_article),"
+    " '([0-9])[^a-z0-9]+(?=[0-9])', '\\1-', 'g'),"
+    " '[^a-z0-9-]', '', 'g'),"
+    " '^art(icle)?', '')"
+)
+ARTICLE_NUM_KEY_DDL = (
+    "ALTER TABLE public.article ADD COLUMN IF NOT EXISTS num_key TEXT "
+    f"GENERATED ALWAYS AS ({ARTICLE_NUM_KEY_EXPRESSION}) STORED",
+    "CREATE INDEX IF NOT EXISTS article_num_key_source_idx "
+    "ON public.article (num_key, source)",
+)
+
+# Recherche plein texte (configuration française) ; l'index GIN sur la même
+# expression est facultatif (voir create_and_load_from_excel.sql.example)
+ARTICLE_FULLTEXT_EXPRESSION = "to_tsvector('french', coalesce(contenu, ''))"
+
+# Partitionnement logique par source (Code du travail, conventions
+# collectives, décrets) : le filtre de source des requêtes ne lit que
+# l'intervalle d'index de la source demandée
+ARTICLE_SOURCE_DDL = (
+    "CREATE INDEX IF NOT EXISTS article_source_sujet_idx "
+    "ON public.article (source, id_sujet, article_id)",
+)
+
+# Passages des articles (découpage pour la recherche, voir passages.py)
+ARTICLE_PASSAGE_DDL = (
+    "CREATE TABLE IF NOT EXISTS public.article_passage ("
+    " article_id INTEGER NOT NULL REFERENCES public.article (article_id) ON DELETE CASCADE,"
+    " position SMALLINT NOT NULL,"
+    " start_offset INTEGER NOT NULL,"
+    " end_offset INTEGER NOT NULL,"
+    " contenu TEXT NOT NULL,"
+    " content_hash TEXT,"
+    " PRIMARY KEY (article_id, position)"
+    ")",
+    # Empreinte md5 du contenu découpé (détection des passages périmés)
+    "ALTER TABLE public.article_passage ADD COLUMN IF NOT EXISTS content_hash TEXT",
+)
+
+def ensure_schema(connection, statements) -> None:
+    """
+    Exécute des instructions DDL idempotentes et valide la transaction
+
+    Args:
+        connection: Connexion psycopg2 ouverte
+        statements: Instructions SQL (CREATE ... IF NOT EXISTS)
+    """
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+    connection.commit()
@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""
+Traitements /chat asynchrones (POST /chat/jobs)
+
+Sur une fonction serverless, l'appel à OpenRouter est borné à quelques
+secondes : une question lourde échoue en 504. En mode tâche, la requête
+HTTP se contente d'enregistrer la tâche et de renvoyer son identifiant ;
+la recherche et la génération s'exécutent avec leur propre délai
+(CHAT_JOB_TIMEOUT) et le résultat est déposé dans un magasin où le client
+le récupère par interrogation, éventuellement longue (GET /chat/jobs/{id}).
+
+- CHAT_JOB_STORE=memory : tâches exécutées par le pool du processus qui
+  les a reçues (serveur unique qui reste actif après la réponse) ;
+- CHAT_JOB_STORE=postgres : tâches en file dans public.chat_job, réclamées
+  par les workers (SELECT ... FOR UPDATE SKIP LOCKED) du serveur ou d'un
+  processus dédié (chat_job_worker.py). Une tâche dont le worker s'est
+  arrêté est réclamée de nouveau à l'expiration de son bail
+  (CHAT_JOB_LEASE), au plus MAX_ATTEMPTS fois. Sur une fonction serverless,
+  gelée après la réponse, les tâches sont exécutées par le processus dédié
+  (CHAT_JOB_WORKERS=0 côté API).
+"""
+
+import contextvars
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from app.admission import AdmissionRejected
+from app.config import settings
+from app.monitoring.tracing import start_span
+
+logger = logging.getLogger(__name__)
+
+# États d'une tâche ; les deux derniers sont définitifs
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+FINISHED = (DONE, ERROR)
+
+# Intervalle minimum entre deux purges des tâches expirées (secondes)
+PURGE_INTERVAL = 60
+
+# Nombre maximum d'exécutions d'une même tâche (reprises après un arrêt)
+MAX_ATTEMPTS = 2
+
+class MemoryJobStore:
+    """Tâches conservées dans la mémoire du processus (un seul worker)"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, job: Dict) -> None:
+        """Enregistre une nouvelle tâche (et oublie les tâches expirées)"""
+        with self._lock:
+            expired_before = time.time() - self.ttl
+            while self._jobs:
+                oldest = next(iter(self._jobs.values()))
+                if oldest["created_at"] >= expired_before:
+                    break
+                self._jobs.popitem(last=False)
+            self._jobs[job["job_id"]] = dict(job)
+
+    def update(self, job_id: str, claim_id: Optional[str] = None, **fields) -> None:
+        """Met à jour les champs d'une tâche"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Retourne une copie de la tâche, ou None si inconnue ou expirée"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def stats(self) -> Dict:
+        """Nombre de tâches conservées"""
+        return {"stored": len(self._jobs)}
+
+class PostgresJobStore:
+    """Tâches conservées dans la table public.chat_job (partagée entre workers)"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._schema_ready = False
+        self._purged_at = 0.0
+
+    def _connection(self):
+        from app.db.db_postgres import get_db_connection
+        from app.db.schema import CHAT_JOB_DDL, ensure_schema
+
+        connection = get_db_connection()
+        if not connection:
+            raise RuntimeError("Connexion à PostgreSQL impossible")
+        if not self._schema_ready:
+            ensure_schema(connection, CHAT_JOB_DDL)
+            self._schema_ready = True
+        return connection
+
+    def create(self, job: Dict) -> None:
+        """Enregistre une nouvelle tâche (et supprime les tâches expirées)"""
+        connection = self._connection()
+        try:
+            with connection.cursor() as cursor:
+                if time.time() - self._purged_at >= PURGE_INTERVAL:
+                    cursor.execute(
+                        "DELETE FROM public.chat_job WHERE created_at < now() - make_interval(secs => %s)",
+                        (self.ttl,)
+                    )
+                    self._purged_at = time.time()
+                cursor.execute(
+                    "INSERT INTO public.chat_job (job_id, client_id, status, request, created_at) "
+                    "VALUES (%s, %s, %s, %s::jsonb, to_timestamp(%s))",
+                    (job["job_id"], job["client_id"], job["status"], json.dumps(job["request"]), job["created_at"])
+                )
+            connection.commit()
+        finally:
+            connection.close()
+
+    def claim(self, limit: int, lease: float) -> List[Dict]:
+        """
+        Réclame des tâches en attente pour ce processus
+
+        Les lignes verrouillées par un autre worker sont ignorées (SKIP
+        LOCKED) ; une tâche en cours depuis plus de `lease` secondes (worker
+        arrêté) est réclamée de nouveau, au plus MAX_ATTEMPTS fois.
+
+        Args:
+            limit: Nombre maximum de tâches
+            lease: Durée du bail d'exécution (secondes)
+
+        Returns:
+            Les tâches réclamées (statut running), avec leur claim_id
+        """
+        claim_id = uuid.uuid4().hex
+        connection = self._connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "UPDATE public.chat_job j"
+                    " SET status = %s, started_at = now(), claim_id = %s, attempts = j.attempts + 1"
+                    " FROM ("
+                    "  SELECT job_id FROM public.chat_job"
+                    "  WHERE (status = %s OR (status = %s AND started_at < now() - make_interval(secs => %s)))"
+                    "  AND attempts < %s"
+                    "  ORDER BY created_at LIMIT %s"
+                    "  FOR UPDATE SKIP LOCKED"
+                    " ) c"
+                    " WHERE j.job_id = c.job_id"
+                    " RETURNING j.job_id, j.client_id, j.request, extract(epoch FROM j.created_at)",
+                    (RUNNING, claim_id, PENDING, RUNNING, lease, MAX_ATTEMPTS, limit)
+                )
+                rows = cursor.fetchall()
+            connection.commit()
+        finally:
+            connection.close()
+        return [
+            {
+                "job_id": row[0],
+                "client_id": row[1],
+                "request": row[2],
+                "created_at": float(row[3]),
+                "claim_id": claim_id
+            }
+            for row in rows
+        ]
+
+    def count_unfinished(self) -> int:
+        """Nombre de tâches en attente ou en cours (tous workers)"""
+        connection = self._connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT count(*) FROM public.chat_job WHERE status IN (%s, %s)"
+                    " AND created_at >= now() - make_interval(secs => %s)",
+                    (PENDING, RUNNING, self.ttl)
+                )
+                return cursor.fetchone()[0]
+        finally:
+            connection.close()
+
+    def update(self, job_id: str, claim_id: Optional[str] = None, **fields) -> None:
+        """
+        Met à jour les champs d'une tâche
+
+        Avec `claim_id`, la mise à jour n'a lieu que si la tâche n'a pas été
+        réclamée depuis par un autre worker (bail expiré).
+        """
+        assignments = []
+        values = []
+        for name, value in fields.items():
+            if name in ("result", "error"):
+                assignments.append(f"{name} = %s::jsonb")
+                values.append(json.dumps(value) if value is not None else None)
+            elif name in ("started_at", "finished_at"):
+                assignments.append(f"{name} = to_timestamp(%s)")
+                values.append(value)
+            elif name == "status":
+                assignments.append("status = %s")
+                values.append(value)
+        connection = self._connection()
+        try:
+            with connection.cursor() as cursor:
+                query = f"UPDATE public.chat_job SET {', '.join(assignments)} WHERE job_id = %s"
+                values.append(job_id)
+                if claim_id is not None:
+                    query += " AND claim_id = %s"
+                    values.append(claim_id)
+                cursor.execute(query, values)
+            connection.commit()
+        finally:
+            connection.close()
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Retourne la tâche, ou None si inconnue ou expirée"""
+        connection = self._connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT job_id, client_id, status, request, result, error, "
+                    "extract(epoch FROM created_at), extract(epoch FROM started_at), "
+                    "extract(epoch FROM finished_at) "
+                    "FROM public.chat_job "
+                    "WHERE job_id = %s AND created_at >= now() - make_interval(secs => %s)",
+                    (job_id, self.ttl)
+                )
+                row = cursor.fetchone()
+        finally:
+            connection.close()
+        if row is None:
+            return None
+        return {
+            "job_id": row[0],
+            "client_id": row[1],
+            "status": row[2],
+            "request": row[3],
+            "result": row[4],
+            "error": row[5],
+            "created_at": float(row[6]),
+            "started_at": float(row[7]) if row[7] is not None else None,
+            "finished_at": float(row[8]) if row[8] is not None else None
+        }
+
+    def stats(self) -> Dict:
+        """Aucune statistique locale (les tâches sont en base)"""
+        return {}
+
+
+class ChatJobRunner:
+    """Exécution des tâches par un pool de threads et dépôt de leurs résultats"""
+
+    def __init__(
+        self,
+        store,
+        workers: int,
+        max_pending: int,
+        deadline: float,
+        lease: float,
+        claim_interval: float
+    ):
+        self.store = store
+        self.workers = workers
+        self.max_pending = max_pending
+        self.deadline = deadline
+        self.lease = lease
+        self.claim_interval = claim_interval
+        # File partagée : les tâches sont réclamées en base par les workers
+        self.queued = hasattr(store, "claim")
+        self._handler: Optional[Callable[[Dict], Dict]] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._dispatcher: Optional[threading.Thread] = None
+        self.pending = 0
+        self.running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def set_handler(self, handler: Callable[[Dict], Dict]) -> None:
+        """
+        Définit le traitement des tâches
+
+        Args:
+            handler: Fonction tâche -> résultat (client_id et request de la
+                tâche) ; une HTTPException est enregistrée comme erreur
+        """
+        self._handler = handler
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="chat-job")
+            return self._executor
+
+    def start(self) -> None:
+        """Démarre la réclamation des tâches en file (magasin postgres, workers > 0)"""
+        if not self.queued or self.workers <= 0:
+            return
+        with self._lock:
+            if self._dispatcher is not None and self._dispatcher.is_alive():
+                return
+            self._stopping.clear()
+            self._dispatcher = threading.Thread(target=self._dispatch, name="chat-job-claim", daemon=True)
+            self._dispatcher.start()
+
+    def run_forever(self) -> None:
+        """Réclame et exécute les tâches jusqu'à l'arrêt (processus dédié)"""
+        self.start()
+        try:
+            while self._dispatcher is not None and self._dispatcher.is_alive():
+                self._dispatcher.join(1)
+        finally:
+            self.shutdown(wait=True)
+
+    def _dispatch(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.clear()
+            free = self.workers - self.running
+            if free > 0:
+                try:
+                    jobs = self.store.claim(free, self.lease)
+                except Exception as e:
+                    logger.error("Erreur lors de la réclamation des tâches: %s", e)
+                    jobs = []
+                for job in jobs:
+                    with self._lock:
+                        self.running += 1
+                    self._get_executor().submit(self._run, job)
+                if jobs and len(jobs) == free:
+                    continue
+            self._wakeup.wait(self.claim_interval)
+
+    def submit(self, client_id: str, request: Dict) -> Dict:
+        """
+        Enregistre une tâche
+
+        Args:
+            client_id: Identifiant du client
+            request: Requête de chat (message, modèle, température, source)
+
+        Returns:
+            La tâche enregistrée (statut pending)
+
+        Raises:
+            AdmissionRejected: Si les tâches ne peuvent pas être exécutées
+                ou si trop de tâches sont déjà en attente
+        """
+        if not self.queued and self.workers <= 0:
+            raise AdmissionRejected(503, "Tâches asynchrones désactivées sur ce serveur.", 60)
+        with self._lock:
+            pending = self.pending
+        if self.queued:
+            pending = self.store.count_unfinished()
+        with self._lock:
+            if pending >= self.max_pending:
+                self.rejected += 1
+                raise AdmissionRejected(503, "Trop de tâches en attente, réessayez dans quelques instants.", 5)
+            if not self.queued:
+                self.pending += 1
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "client_id": client_id,
+            "status": PENDING,
+            "request": request,
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None
+        }
+        try:
+            self.store.create(job)
+            if self.queued:
+                # Réclamée par un worker (celui-ci, réveillé, ou un autre processus)
+                self._wakeup.set()
+            else:
+                # Le contexte (identifiant de requête, trace) suit la tâche
+                context = contextvars.copy_context()
+                self._get_executor().submit(context.run, self._run, job)
+        except Exception:
+            if not self.queued:
+                with self._lock:
+                    self.pending -= 1
+            raise
+        self.submitted += 1
+        return job
+
+    def _run(self, job: Dict) -> None:
+        job_id = job["job_id"]
+        claim_id = job.get("claim_id")
+        try:
+            if time.time() - job["created_at"] > self.deadline:
+                self._finish(job, ERROR, error={
+                    "status_code": 504, "detail": "Délai de la tâche dépassé avant son exécution."
+                })
+                return
+            if claim_id is None:
+                self.store.update(job_id, status=RUNNING, started_at=time.time())
+            # Span rattaché à la trace de la requête POST /chat/jobs (contexte copié)
+            with start_span("chat.job", **{"job.id": job_id}) as span:
+                try:
+                    result = self._handler(job)
+                except Exception as e:
+                    status_code = getattr(e, "status_code", 500)
+                    detail = getattr(e, "detail", None) or str(e)
+                    span.record_error(detail)
+                    self._finish(job, ERROR, error={"status_code": status_code, "detail": detail})
+                else:
+                    self._finish(job, DONE, result=result)
+        except Exception as e:
+            # Magasin indisponible : la tâche sera reprise ou expirera (voir get)
+            logger.error("Erreur lors de l'enregistrement de la tâche %s: %s", job_id, e)
+        finally:
+            with self._lock:
+                if claim_id is None:
+                    self.pending -= 1
+                else:
+                    self.running -= 1
+            if claim_id is not None:
+                self._wakeup.set()
+
+    def _finish(self, job: Dict, status: str, result: Optional[Dict] = None, error: Optional[Dict] = None) -> None:
+        job_id = job["job_id"]
+        self.store.update(
+            job_id, claim_id=job.get("claim_id"),
+            status=status, result=result, error=error, finished_at=time.time()
+        )
+        if status == DONE:
+            self.completed += 1
+        else:
+            self.failed += 1
+        logger.info("Tâche %s terminée (%s)", job_id, status, extra={"job_id": job_id, "job_status": status})
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """
+        Retourne l'état d'une tâche
+
+        Une tâche inachevée au-delà de CHAT_JOB_DEADLINE (worker arrêté
+        pendant son exécution) est présentée en erreur.
+
+        Args:
+            job_id: Identifiant de la tâche
+
+        Returns:
+            La tâche, ou None si inconnue ou expirée
+        """
+        job = self.store.get(job_id)
+        if job is not None and job["status"] not in FINISHED and time.time() - job["created_at"] > self.deadline:
+            job["status"] = ERROR
+            job["error"] = {"status_code": 504, "detail": "Tâche interrompue ou délai dépassé."}
+        return job
+
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Arrête la réclamation et le pool
+
+        Args:
+            wait: Attend la fin des tâches en cours (processus dédié) ; sinon
+                les tâches réclamées seront reprises à l'expiration du bail
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def stats(self) -> Dict:
+        """Statistiques des tâches"""
+        return {
+            "store": type(self.store).__name__,
+            "workers": self.workers,
+            "pending": self.pending,
+            "running": self.running,
+            "max_pending": self.max_pending,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            **self.store.stats()
+        }
+
+def _create_runner() -> ChatJobRunner:
+    if settings.CHAT_JOB_STORE == "postgres":
+        store = PostgresJobStore(settings.CHAT_JOB_TTL)
+    else:
+        store = MemoryJobStore(settings.CHAT_JOB_TTL)
+    return ChatJobRunner(
+        store,
+        workers=settings.CHAT_JOB_WORKERS,
+        max_pending=settings.CHAT_JOB_MAX_PENDING,
+        deadline=settings.CHAT_JOB_DEADLINE,
+        lease=settings.CHAT_JOB_LEASE,
+        claim_interval=settings.CHAT_JOB_CLAIM_INTERVAL
+    )
+
+# Instance globale des tâches /chat
+chat_jobs = _create_runner()
@@ -2,9 +2,10 @@
 Module LLM - Client pour les services d'IA
 """
 
-from .openrouter_client import OpenRouterClient
+from .openrouter_client import CompletionResult, OpenRouterClient
+from .model_router import RoutingSignals, model_router
 
 # Instance globale du client
 openrouter_client = OpenRouterClient()
 
-__all__ = ["openrouter_client", "OpenRouterClient"]
+__all__ = ["openrouter_client", "OpenRouterClient", "CompletionResult", "RoutingSignals", "model_router"]
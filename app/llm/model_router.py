@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Choix du modèle selon la complexité de la question
+
+Une question simple ("combien de jours de congés ?") servie par un seul
+article n'a pas besoin du même modèle qu'une comparaison entre plusieurs
+articles. Le routeur choisit un niveau (light, standard, heavy) à partir
+de signaux déjà calculés par le pipeline (nombre d'articles retenus,
+taille du prompt, longueur de la question, sujet, mots de comparaison),
+en appliquant une table de règles configurable : la première règle dont
+toutes les conditions sont vraies l'emporte.
+
+Chaque décision est journalisée, et l'issue des appels (erreurs, latence,
+tokens) est agrégée par règle pour ajuster la table.
+"""
+
+import json
+import logging
+import re
+import threading
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.tools.text_utils import strip_accents
+
+logger = logging.getLogger(__name__)
+
+# Niveaux de modèles, du moins cher au plus capable
+TIERS = ("light", "standard", "heavy")
+
+# Table de règles par défaut (la première règle qui s'applique l'emporte)
+DEFAULT_RULES = [
+    {"name": "comparaison", "when": {"comparison": True}, "tier": "heavy"},
+    {"name": "contexte_large", "when": {"min_articles": 4}, "tier": "heavy"},
+    {"name": "prompt_long", "when": {"min_prompt_chars": 8000}, "tier": "heavy"},
+    {"name": "question_simple", "when": {"max_articles": 1, "max_question_chars": 120}, "tier": "light"},
+    {"name": "defaut", "when": {}, "tier": "standard"},
+]
+
+# Conditions reconnues : seuils sur les signaux numériques, comparaison, sujets
+_NUMERIC_SIGNALS = ("articles", "prompt_chars", "question_chars")
+_CONDITIONS = frozenset(
+    [f"{bound}_{signal}" for signal in _NUMERIC_SIGNALS for bound in ("min", "max")]
+    + ["comparison", "sujets"]
+)
+
+_COMPARISON_RE = re.compile(
+    r"\b(compar\w*|differen\w*|versus|vs|par rapport|plutot que|contrairement|"
+    r"avantages? et (?:les )?inconvenients?)\b"
+)
+
+def has_comparison(message: str) -> bool:
+    """
+    Indique si une question demande une comparaison
+
+    Args:
+        message: Le message de l'utilisateur
+
+    Returns:
+        True si le message contient un mot de comparaison
+    """
+    return bool(_COMPARISON_RE.search(strip_accents(message.lower())))
+
+class RoutingSignals:
+    """Signaux du pipeline utilisés pour choisir le modèle"""
+
+    __slots__ = ("question_chars", "articles", "prompt_chars", "sujet", "comparison")
+
+    def __init__(
+        self,
+        question_chars: int,
+        articles: int,
+        prompt_chars: int,
+        sujet: Optional[str] = None,
+        comparison: bool = False
+    ):
+        self.question_chars = question_chars
+        self.articles = articles
+        self.prompt_chars = prompt_chars
+        self.sujet = sujet
+        self.comparison = comparison
+
+    @classmethod
+    def from_pipeline(cls, message: str, articles: List, system_prompt: str, sujet=None) -> "RoutingSignals":
+        """
+        Calcule les signaux d'une requête
+
+        Args:
+            message: Le message de l'utilisateur
+            articles: Les articles retenus
+            system_prompt: Le prompt système construit
+            sujet: Le sujet identifié (Sujet ou None)
+
+        Returns:
+            Les signaux de routage
+        """
+        return cls(
+            len(message),
+            len(articles),
+            len(system_prompt or ""),
+            sujet.titre_sujet if sujet else None,
+            has_comparison(message)
+        )
+
+    def to_dict(self) -> Dict:
+        """Représentation JSON (journaux)"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+class RoutingDecision:
+    """Modèle choisi et règle appliquée"""
+
+    __slots__ = ("tier", "model", "rule")
+
+    def __init__(self, tier: str, model: str, rule: str):
+        self.tier = tier
+        self.model = model
+        self.rule = rule
+
+    def to_dict(self) -> Dict:
+        """Représentation JSON (journal des requêtes)"""
+        return {"tier": self.tier, "model": self.model, "rule": self.rule}
+
+def parse_rules(value: str) -> List[Dict]:
+    """
+    Lit une table de règles JSON (MODEL_ROUTING_RULES)
+
+    Args:
+        value: Liste JSON de règles {"name", "when", "tier"}
+
+    Returns:
+        Les règles validées
+
+    Raises:
+        ValueError: Si une règle est invalide
+    """
+    rules = json.loads(value)
+    if not isinstance(rules, list):
+        raise ValueError("La table de routage doit être une liste de règles")
+    for position, rule in enumerate(rules):
+        if not isinstance(rule, dict):
+            raise ValueError(f"Règle {position}: objet attendu")
+        when = rule.get("when") or {}
+        unknown = set(when) - _CONDITIONS
+        if unknown:
+            raise ValueError(f"Règle {position}: conditions inconnues {sorted(unknown)}")
+        if rule.get("tier") not in TIERS:
+            raise ValueError(f"Règle {position}: niveau inconnu {rule.get('tier')!r}")
+        rule.setdefault("name", f"regle_{position}")
+        rule["when"] = when
+    return rules
+
+def _matches(when: Dict, signals: RoutingSignals) -> bool:
+    for signal in _NUMERIC_SIGNALS:
+        value = getattr(signals, signal)
+        minimum = when.get(f"min_{signal}")
+        maximum = when.get(f"max_{signal}")
+        if minimum is not None and value < minimum:
+            return False
+        if maximum is not None and value > maximum:
+            return False
+    if "comparison" in when and bool(when["comparison"]) != signals.comparison:
+        return False
+    if "sujets" in when:
+        sujets = {strip_accents(s.lower()) for s in when["sujets"]}
+        if not signals.sujet or strip_accents(signals.sujet.lower()) not in sujets:
+            return False
+    return True
+
+class ModelRouter:
+    """Table de règles : signaux du pipeline -> niveau -> modèle"""
+
+    def __init__(self, rules: List[Dict], models: Dict[str, str], enabled: bool = True):
+        self.rules = rules
+        self.models = models
+        self.enabled = enabled
+        self._outcomes: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def model_for(self, tier: str) -> str:
+        """Modèle d'un niveau (le modèle par défaut si non configuré)"""
+        return self.models.get(tier) or self.models["standard"]
+
+    def route(self, signals: RoutingSignals, requested_model: Optional[str] = None) -> RoutingDecision:
+        """
+        Choisit le modèle d'une requête
+
+        Args:
+            signals: Signaux du pipeline
+            requested_model: Modèle demandé explicitement par l'appelant
+
+        Returns:
+            La décision (niveau, modèle, règle appliquée)
+        """
+        if requested_model:
+            decision = RoutingDecision("explicit", requested_model, "explicite")
+        elif not self.enabled:
+            decision = RoutingDecision("standard", self.model_for("standard"), "desactive")
+        else:
+            decision = RoutingDecision("standard", self.model_for("standard"), "aucune")
+            for rule in self.rules:
+                if _matches(rule["when"], signals):
+                    decision = RoutingDecision(rule["tier"], self.model_for(rule["tier"]), rule["name"])
+                    break
+        logger.info(
+            "Routage vers %s (règle %s)", decision.model, decision.rule,
+            extra={"route": decision.to_dict(), "signals": signals.to_dict()}
+        )
+        return decision
+
+    def record_outcome(
+        self,
+        decision: RoutingDecision,
+        status: str,
+        latency_ms: Optional[float] = None,
+        usage=None
+    ) -> None:
+        """
+        Enregistre l'issue de l'appel au LLM pour la règle appliquée
+
+        Args:
+            decision: La décision de routage
+            status: Issue de la requête (ok, http_502...)
+            latency_ms: Durée de l'appel au LLM
+            usage: Consommation (TokenUsage) si l'appel a abouti
+        """
+        with self._lock:
+            stats = self._outcomes.setdefault(decision.rule, {
+                "tier": decision.tier, "requests": 0, "errors": 0,
+                "latency_ms": 0.0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0
+            })
+            stats["requests"] += 1
+            if status != "ok":
+                stats["errors"] += 1
+            stats["latency_ms"] += latency_ms or 0.0
+            if usage is not None:
+                stats["prompt_tokens"] += usage.prompt_tokens
+                stats["completion_tokens"] += usage.completion_tokens
+                stats["cost"] += usage.cost or 0.0
+
+    def stats(self) -> Dict:
+        """Table de règles, modèles par niveau et issues par règle"""
+        with self._lock:
+            outcomes = {
+                rule: {
+                    "tier": stats["tier"],
+                    "requests": stats["requests"],
+                    "errors": stats["errors"],
+                    "avg_latency_ms": round(stats["latency_ms"] / stats["requests"], 1),
+                    "avg_prompt_tokens": round(stats["prompt_tokens"] / stats["requests"], 1),
+                    "completion_tokens": stats["completion_tokens"],
+                    "cost": round(stats["cost"], 6)
+                }
+                for rule, stats in self._outcomes.items()
+            }
+        return {
+            "enabled": self.enabled,
+            "models": {tier: self.model_for(tier) for tier in TIERS},
+            "rules": self.rules,
+            "outcomes": outcomes
+        }
+
+def _load_rules() -> List[Dict]:
+    if not settings.MODEL_ROUTING_RULES:
+        return DEFAULT_RULES
+    try:
+        return parse_rules(settings.MODEL_ROUTING_RULES)
+    except ValueError as e:
+        logger.error("Table de routage invalide, règles par défaut utilisées: %s", e)
+        return DEFAULT_RULES
+
+# Instance globale du routeur
+model_router = ModelRouter(
+    _load_rules(),
+    {
+        "light": settings.OPENROUTER_MODEL_LIGHT,
+        "standard": settings.OPENROUTER_MODEL,
+        "heavy": settings.OPENROUTER_MODEL_HEAVY
+    },
+    enabled=settings.MODEL_ROUTING_ENABLED
+)
@@ -1,11 +1,35 @@
 #!/usr/bin/env python3
 """
 Client OpenRouter pour les interactions avec les modèles LLM
+
+Les appels passent par une session HTTP qui garde les connexions
+ouvertes (keep-alive) : prewarm() ouvre la connexion (DNS, TCP, TLS)
+pendant la recherche d'articles, et l'appel au LLM la réutilise. La
+session n'accepte aucun cookie : l'API s'authentifie par clé.
 """
 
+import logging
+import time
+from http.cookiejar import DefaultCookiePolicy
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Optional
 from app.config import settings
+from app.monitoring import TokenUsage, record_upstream_outcome
+from app.monitoring.tracing import start_span
+
+logger = logging.getLogger(__name__)
+
+class CompletionResult:
+    """Résultat d'un appel de chat completion"""
+    
+    __slots__ = ("content", "model", "usage", "latency_ms")
+    
+    def __init__(self, content: str, model: str, usage: TokenUsage, latency_ms: float):
+        self.content = content
+        self.model = model
+        self.usage = usage
+        self.latency_ms = latency_ms
 
 class OpenRouterClient:
     """Client pour l'API OpenRouter"""
@@ -16,6 +40,52 @@ class OpenRouterClient:
         self.default_model = settings.OPENROUTER_MODEL
         self.max_tokens = settings.OPENROUTER_MAX_TOKENS
         self.temperature = settings.OPENROUTER_TEMPERATURE
+        self.timeout = settings.OPENROUTER_TIMEOUT
+        self._session = requests.Session()
+        # Une connexion réutilisable par appel simultané admis
+        adapter = HTTPAdapter(pool_maxsize=max(10, settings.CHAT_MAX_CONCURRENT))
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        # Aucun cookie conservé entre les appels à l'API
+        self._session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self._last_used = 0.0
+    
+    @property
+    def prewarm_url(self) -> Optional[str]:
+        """
+        Endpoint léger de l'API utilisé pour ouvrir la connexion
+        
+        Returns:
+            La liste des modèles à côté de chat/completions, ou None si
+            l'URL configurée n'a pas la forme attendue
+        """
+        suffix = "/chat/completions"
+        if not self.api_url.endswith(suffix):
+            return None
+        return self.api_url[:-len(suffix)] + "/models"
+    
+    def prewarm(self) -> bool:
+        """
+        Ouvre à l'avance une connexion vers OpenRouter
+        
+        Sans effet si une connexion a servi il y a moins de
+        OPENROUTER_PREWARM_IDLE secondes (encore ouverte).
+        
+        Returns:
+            True si une connexion a été ouverte
+        """
+        if not self.api_key or time.monotonic() - self._last_used < settings.OPENROUTER_PREWARM_IDLE:
+            return False
+        url = self.prewarm_url
+        if url is None:
+            return False
+        started = time.perf_counter()
+        # Requête HEAD sur l'API (même hôte que l'appel, sans corps de
+        # réponse) : seule la connexion nous intéresse
+        self._session.head(url, timeout=2, allow_redirects=False)
+        self._last_used = time.monotonic()
+        logger.debug("Connexion OpenRouter ouverte en %.1f ms", (time.perf_counter() - started) * 1000)
+        return True
     
     def chat_completion(
         self,
@@ -36,6 +106,29 @@ class OpenRouterClient:
         Returns:
             La réponse générée par le modèle
         """
+        return self.complete(prompt, system_prompt, model, temperature).content
+    
+    def complete(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        timeout: Optional[float] = None
+    ) -> CompletionResult:
+        """
+        Effectue une requête de chat completion et renvoie sa consommation
+        
+        Args:
+            prompt: Le message de l'utilisateur
+            system_prompt: Le prompt système (optionnel)
+            model: Le modèle à utiliser (optionnel)
+            temperature: La température pour la génération (optionnel)
+            timeout: Délai de l'appel en secondes (OPENROUTER_TIMEOUT par défaut)
+        
+        Returns:
+            La réponse, le modèle effectivement utilisé et les tokens consommés
+        """
         if not self.api_key:
             raise ValueError("OPENROUTER_API_KEY n'est pas configurée")
         
@@ -48,7 +141,9 @@ class OpenRouterClient:
             "model": model or self.default_model,
             "messages": messages,
             "max_tokens": self.max_tokens,
-            "temperature": temperature if temperature is not None else self.temperature
+            "temperature": temperature if temperature is not None else self.temperature,
+            # Demande à OpenRouter le coût de l'appel dans le bloc usage
+            "usage": {"include": True}
         }
         
         headers = {
@@ -58,40 +153,70 @@ class OpenRouterClient:
             "X-Title": "ChatRH API"  # Optionnel mais recommandé
         }
         
-        try:
-            # Timeout réduit pour Vercel (10s gratuit, 60s pro)
-            # On utilise 8s pour laisser une marge
-            response = requests.post(
-                self.api_url,
-                json=payload,
-                headers=headers,
-                timeout=8
-            )
+        with start_span("openrouter.chat_completion", kind="client", **{"llm.model": payload["model"]}) as span:
+            if span.traceparent:
+                # Propagation du contexte de trace vers OpenRouter
+                headers["traceparent"] = span.traceparent
             
-            # Vérifier le statut de la réponse
-            if response.status_code == 401:
-                error_detail = response.text
-                raise ValueError(
-                    f"Erreur d'authentification (401): Vérifiez que votre clé API OpenRouter est valide. "
-                    f"Détail: {error_detail}"
+            started = time.perf_counter()
+            try:
+                # Timeout réduit pour Vercel (10s gratuit, 60s pro) sauf pour les
+                # tâches asynchrones, qui ont leur propre délai
+                response = self._session.post(
+                    self.api_url,
+                    json=payload,
+                    headers=headers,
+                    timeout=timeout or self.timeout
                 )
             
-            response.raise_for_status()
+                # Vérifier le statut de la réponse
+                if response.status_code == 401:
+                    error_detail = response.text
+                    raise ValueError(
+                        f"Erreur d'authentification (401): Vérifiez que votre clé API OpenRouter est valide. "
+                        f"Détail: {error_detail}"
+                    )
             
-            data = response.json()
+                self._last_used = time.monotonic()
+                response.raise_for_status()
             
-            # Vérifier que la réponse contient les données attendues
-            if "choices" not in data or len(data["choices"]) == 0:
-                raise ValueError("Réponse OpenRouter invalide: aucune choice trouvée")
+                data = response.json()
             
-            return data["choices"][0]["message"]["content"]
+                # Vérifier que la réponse contient les données attendues
+                if "choices" not in data or len(data["choices"]) == 0:
+                    raise ValueError("Réponse OpenRouter invalide: aucune choice trouvée")
+            
+                latency_ms = (time.perf_counter() - started) * 1000
+                record_upstream_outcome(True, latency_ms, response.status_code)
+                result = CompletionResult(
+                    data["choices"][0]["message"]["content"],
+                    data.get("model") or payload["model"],
+                    TokenUsage.from_response(data),
+                    latency_ms
+                )
+                span.set_attributes({
+                    "http.status_code": response.status_code,
+                    "llm.response_model": result.model,
+                    "llm.prompt_tokens": result.usage.prompt_tokens,
+                    "llm.completion_tokens": result.usage.completion_tokens,
+                    "llm.cost": result.usage.cost
+                })
+                return result
         
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 401:
-                raise ValueError(
-                    f"Erreur d'authentification (401): Vérifiez que votre clé API OpenRouter est valide et active. "
-                    f"Assurez-vous que la clé dans le fichier .env est correcte."
+            except ValueError as e:
+                record_upstream_outcome(False, (time.perf_counter() - started) * 1000, error=str(e))
+                raise
+            except requests.exceptions.HTTPError as e:
+                record_upstream_outcome(
+                    False, (time.perf_counter() - started) * 1000, e.response.status_code, str(e)
                 )
-            raise ValueError(f"Erreur HTTP lors de l'appel à OpenRouter: {str(e)}")
-        except requests.exceptions.RequestException as e:
-            raise ValueError(f"Erreur lors de l'appel à OpenRouter: {str(e)}")
+                span.set_attribute("http.status_code", e.response.status_code)
+                if e.response.status_code == 401:
+                    raise ValueError(
+                        f"Erreur d'authentification (401): Vérifiez que votre clé API OpenRouter est valide et active. "
+                        f"Assurez-vous que la clé dans le fichier .env est correcte."
+                    )
+                raise ValueError(f"Erreur HTTP lors de l'appel à OpenRouter: {str(e)}")
+            except requests.exceptions.RequestException as e:
+                record_upstream_outcome(False, (time.perf_counter() - started) * 1000, error=str(e))
+                raise ValueError(f"Erreur lors de l'appel à OpenRouter: {str(e)}")
@@ -3,12 +3,17 @@
 Application FastAPI principale pour ChatRH
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, Optional
+import asyncio
+import logging
+import threading
+import time
 from app.config import settings
-from app.llm import openrouter_client
+from app.llm import RoutingSignals, model_router, openrouter_client
 from app.tools import (
     create_system_prompt,
     format_chat_response,
@@ -16,7 +21,29 @@ from app.tools import (
     get_rh_context,
     extract_keywords
 )
-from app.db import get_articles_count
+from app.db import article_cache
+from app.db.corpus import refresh_corpus_version
+from app.db.db_postgres import close_db_pool, db_pool_stats
+from app import __version__
+from app.api import articles_router, probes_router, profiling_router
+from app.api.http_cache import cached_response
+from app.admission import AdmissionRejected, admission_controller, client_id_from_request
+from app.jobs import FINISHED, chat_jobs
+from app.monitoring import health_sampler, usage_tracker
+from app.monitoring.usage import estimate_request_tokens
+from app.monitoring.logs import RequestIdMiddleware, logging_stats, setup_logging, shutdown_logging
+from app.monitoring.profiling import request_profiler
+from app.monitoring.query_log import query_log
+from app.monitoring.tracing import TracingMiddleware, start_span, tracer
+from app.tools.fuzzy_index import correct_message, get_fuzzy_index
+from app.tools.retrieval import RetrievalResult, retrieve_articles, retrieval_cache
+from app.tools.shared_index import get_shared_index
+from app.tools.stage_graph import StageGraph
+from app.tools.text_utils import collapse_whitespace
+from app.tools.warmup import warm_up_caches
+
+setup_logging()
+logger = logging.getLogger(__name__)
 
 # Création de l'application FastAPI
 app = FastAPI(
@@ -36,17 +63,106 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Span racine de chaque requête (TRACING_ENABLED), à l'intérieur du
+# middleware d'identifiant pour y joindre l'identifiant de requête
+app.add_middleware(TracingMiddleware)
+
+# Identifiant de requête (X-Request-Id) joint aux journaux
+app.add_middleware(RequestIdMiddleware)
+
+# Routers
+app.include_router(articles_router)
+app.include_router(probes_router)
+app.include_router(profiling_router)
+
+# Démarrage de l'échantillonnage de santé
+@app.on_event("startup")
+def start_health_sampler():
+    """Lance l'échantillonnage de santé en arrière-plan"""
+    if settings.HEALTH_SAMPLER_ENABLED:
+        health_sampler.start()
+
+# Préchauffage des caches avec les requêtes les plus fréquentes
+@app.on_event("startup")
+def start_cache_warmup():
+    """Rejoue en arrière-plan les WARMUP_TOP_N requêtes les plus fréquentes"""
+    if settings.WARMUP_TOP_N > 0:
+        threading.Thread(
+            target=warm_up_caches,
+            args=(settings.WARMUP_TOP_N,),
+            name="cache-warmup",
+            daemon=True
+        ).start()
+
+# Réclamation des tâches /chat en file (CHAT_JOB_STORE=postgres)
+@app.on_event("startup")
+def start_chat_jobs():
+    """Lance la réclamation des tâches asynchrones en arrière-plan"""
+    chat_jobs.start()
+
+# Lecture de la version du corpus (ETags) avant les premières requêtes
+@app.on_event("startup")
+def start_corpus_version():
+    """Lit la version du corpus en arrière-plan"""
+    refresh_corpus_version()
+
+# Construction de l'index de correction orthographique
+@app.on_event("startup")
+def start_fuzzy_index():
+    """Lance la construction de l'index de correction en arrière-plan"""
+    if settings.FUZZY_ENABLED:
+        get_fuzzy_index()
+
+# Projection de l'index partagé entre workers
+@app.on_event("startup")
+def attach_shared_index():
+    """Projette l'index du corpus publié par le processus parent"""
+    if settings.SHARED_INDEX_ENABLED and get_shared_index() is None:
+        logger.warning(
+            "Index partagé introuvable dans %s (python build_shared_index.py) : recherche SQL",
+            settings.SHARED_INDEX_DIR
+        )
+
+# Arrêt propre : tâches, journaux et pool de connexions
+@app.on_event("shutdown")
+def shutdown():
+    """Arrête l'échantillonnage, vide les journaux et ferme le pool de connexions"""
+    health_sampler.stop()
+    chat_jobs.shutdown()
+    if query_log is not None:
+        query_log.flush()
+    if tracer is not None:
+        tracer.flush()
+    close_db_pool()
+    shutdown_logging()
+
 # Schémas pour les requêtes/réponses
 class ChatRequest(BaseModel):
     """Requête pour le chat"""
     message: str
     model: Optional[str] = None
     temperature: Optional[float] = None
+    # Restreint la recherche d'articles à une source ("Code du travail 1997"...)
+    source: Optional[str] = None
 
 class ChatResponse(BaseModel):
     """Réponse du chat"""
     response: str
     model: str
+    # Tokens consommés (prompt_tokens, completion_tokens, total_tokens, cost)
+    usage: Optional[Dict] = None
+
+class ChatJobResponse(BaseModel):
+    """État d'une tâche de chat asynchrone"""
+    job_id: str
+    # pending, running, done ou error
+    status: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[ChatResponse] = None
+    # Erreur de la tâche (status_code, detail), comme pour /chat
+    error: Optional[Dict] = None
 
 class HealthResponse(BaseModel):
     """Réponse du health check"""
@@ -55,126 +171,147 @@ class HealthResponse(BaseModel):
 
 # Endpoint racine
 @app.get("/")
-def root():
+def root(request: Request):
     """Endpoint racine avec informations sur l'API"""
+    # Contenu statique : la version de l'application suffit comme validateur
+    return cached_response(request, _root_info, version=f"app-{__version__}")
+
+def _root_info() -> dict:
     return {
         "name": "ChatRH API",
         "version": "1.0.0",
         "description": "API de chat pour la gestion des ressources humaines",
         "endpoints": {
             "chat": "/chat",
+            "chat_jobs": "/chat/jobs",
+            "sujets": "/sujets",
+            "articles": "/articles",
+            "export": "/articles/export",
             "health": "/health",
+            "livez": "/livez",
+            "readyz": "/readyz",
             "docs": "/docs"
         }
     }
 
 # Endpoint chat
 @app.post("/chat", response_model=ChatResponse)
-def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request, response: Response):
     """
     Chat avec l'assistant IA
     
     Permet de discuter avec l'assistant pour obtenir des informations
     sur la gestion des ressources humaines.
+    
+    En cas de surcharge, la requête est refusée immédiatement avec un
+    statut 429 (débit ou budget quotidien de tokens du client dépassé) ou
+    503 (service saturé) et un en-tête Retry-After.
+    
+    Avec le profilage activé, l'en-tête `X-Profile: <PROFILING_TOKEN>`
+    exécute la requête sous profileur ; l'identifiant du rapport est
+    renvoyé dans l'en-tête X-Profile-Id.
+    """
+    client_id = client_id_from_request(http_request)
+    
+    def run() -> ChatResponse:
+        with request_profiler.maybe_profile(http_request.headers, "/chat") as session:
+            if session is not None:
+                response.headers["X-Profile-Id"] = session.profile_id
+            return process_chat(request, client_id)
+    
+    try:
+        usage_tracker.check_budget(client_id)
+        # Attente d'une place dans la boucle d'événements : le thread n'est
+        # pris qu'une fois la requête admise
+        async with admission_controller.admit_async(client_id):
+            return await run_in_threadpool(run)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers)
+
+def process_chat(
+    request: ChatRequest,
+    client_id: str = "inconnu",
+    llm_timeout: Optional[float] = None
+) -> ChatResponse:
     """
+    Traite une requête de chat admise : recherche, prompt et appel au LLM
+    
+    Args:
+        request: La requête de chat
+        client_id: Identifiant du client (suivi de consommation)
+        llm_timeout: Délai de l'appel au LLM (OPENROUTER_TIMEOUT par défaut)
+    
+    Returns:
+        La réponse du chat
+    """
+    timings = {}
+    stage_started = time.perf_counter()
+    
+    def mark(stage: str) -> None:
+        nonlocal stage_started
+        now = time.perf_counter()
+        timings[stage] = round((now - stage_started) * 1000, 2)
+        stage_started = now
+    
+    retrieval = RetrievalResult([])
+    status = "ok"
+    usage = None
+    decision = None
+    completion = None
     try:
         # Valider le message
         is_valid, error_message = validate_message(request.message)
         if not is_valid:
             raise HTTPException(status_code=400, detail=error_message)
         
+        # Corriger les fautes de frappe avant la recherche (le LLM reçoit
+        # la question d'origine)
+        with start_span("chat.spelling"):
+            search_message = correct_message(request.message)
+        mark("spelling")
+        
         # Extraire les mots-clés pour le contexte
-        keywords = extract_keywords(request.message)
+        with start_span("chat.keywords") as span:
+            keywords = extract_keywords(search_message)
+            span.set_attribute("chat.keywords", len(keywords))
         topic = keywords[0] if keywords else None
+        mark("keywords")
         
-        # Rechercher des articles pertinents dans la base de données
-        relevant_articles = []
-        try:
-            from app.db import search_articles, get_articles_by_sujet, get_all_sujets
-            
-            # Étape 1 : Chercher par sujet si identifié
-            sujets = get_all_sujets()
-            sujet_trouve = None
-            
-            # Chercher dans les keywords
-            for keyword in keywords:
-                for sujet in sujets:
-                    if keyword.lower() in sujet['titre_sujet'].lower() or str(sujet['id']) == keyword:
-                        sujet_trouve = sujet
-                        articles = get_articles_by_sujet(sujet['id'])
-                        relevant_articles.extend(articles)
-                        break
-                if sujet_trouve:
-                    break
-            
-            # Étape 2 : Si pas de sujet trouvé, chercher dans le message directement
-            if not sujet_trouve:
-                message_lower = request.message.lower()
-                # Mapping direct des mots-clés vers les sujets
-                keyword_mapping = {
-                    "congé": "Congés",
-                    "congés": "Congés",
-                    "conges": "Congés",  # Sans accent
-                    "transport": "Transport",
-                    "tansport": "Transport"  # Typo
-                }
-                
-                # Chercher les mots-clés dans le message
-                for keyword, sujet_nom in keyword_mapping.items():
-                    if keyword in message_lower:
-                        for sujet in sujets:
-                            if sujet['titre_sujet'] == sujet_nom:
-                                sujet_trouve = sujet
-                                articles = get_articles_by_sujet(sujet['id'])
-                                relevant_articles.extend(articles)
-                                break
-                        if sujet_trouve:
-                            break
-                
-                # Si toujours pas trouvé, chercher par titre de sujet
-                if not sujet_trouve:
-                    for sujet in sujets:
-                        titre_lower = sujet['titre_sujet'].lower()
-                        # Vérifier si le titre complet est dans le message
-                        if titre_lower in message_lower:
-                            sujet_trouve = sujet
-                            articles = get_articles_by_sujet(sujet['id'])
-                            relevant_articles.extend(articles)
-                            break
-                        # Vérifier si des mots du titre sont dans le message
-                        elif any(word in message_lower for word in titre_lower.split() if len(word) > 3):
-                            sujet_trouve = sujet
-                            articles = get_articles_by_sujet(sujet['id'])
-                            relevant_articles.extend(articles)
-                            break
-            
-            # Étape 3 : Recherche par mot-clé dans le contenu des articles
-            if not relevant_articles:
-                # Extraire les mots importants du message (mots de 4+ caractères)
-                words = [w for w in request.message.lower().split() if len(w) > 4]
-                for word in words[:5]:  # Limiter à 5 mots
-                    articles = search_articles(word, limit=5)
-                    # Éviter les doublons
-                    existing_ids = {a['article_id'] for a in relevant_articles}
-                    for article in articles:
-                        if article['article_id'] not in existing_ids:
-                            relevant_articles.append(article)
-                    if len(relevant_articles) >= 10:
-                        break
-            
-            # Limiter à 10 articles maximum pour éviter un contexte trop long
-            relevant_articles = relevant_articles[:10]
-            
-        except Exception as e:
-            # Si erreur, continuer sans les articles
-            print(f"Erreur lors de la recherche d'articles: {e}")
-            relevant_articles = []
+        # Étapes indépendantes, exécutées en parallèle : recherche des
+        # articles (sans articles en cas d'erreur), contexte RH et ouverture
+        # de la connexion vers OpenRouter pendant la recherche
+        graph = (
+            StageGraph()
+            .add(
+                "retrieval",
+                lambda: retrieve_articles(search_message, keywords, source=request.source),
+                fallback=RetrievalResult([])
+            )
+            .add("context", lambda: get_rh_context(topic))
+        )
+        if settings.OPENROUTER_API_KEY:
+            graph.add("prewarm", openrouter_client.prewarm, fallback=False, detached=True)
+        stages = graph.run()
+        retrieval = stages["retrieval"]
+        context = stages["context"]
+        relevant_articles = retrieval.articles
+        mark("stages")
+        timings.update(graph.timings)
         
-        # Construire le contexte avec les données PostgreSQL
-        context = get_rh_context(topic)
+        # Créer le prompt système avec les articles (passages pertinents)
+        with start_span("chat.prompt") as span:
+            system_prompt = create_system_prompt(context, relevant_articles, retrieval.passages)
+            span.set_attributes({"chat.articles": len(relevant_articles), "chat.prompt_chars": len(system_prompt)})
+        mark("prompt")
         
-        # Créer le prompt système avec les articles (CONTENU COMPLET)
-        system_prompt = create_system_prompt(context, relevant_articles)
+        # Choisir le modèle selon la complexité de la question
+        with start_span("chat.routing") as span:
+            decision = model_router.route(
+                RoutingSignals.from_pipeline(request.message, relevant_articles, system_prompt, retrieval.sujet),
+                requested_model=request.model
+            )
+            span.set_attributes({"llm.model": decision.model, "llm.tier": decision.tier})
+        mark("routing")
         
         # Vérifier que la clé API est configurée
         if not settings.OPENROUTER_API_KEY:
@@ -183,14 +320,22 @@ def chat(request: ChatRequest):
                 detail="OPENROUTER_API_KEY n'est pas configurée. Veuillez configurer cette variable d'environnement dans Vercel Dashboard."
             )
         
-        # Appeler l'API OpenRouter
+        # Appeler l'API OpenRouter, la consommation estimée étant réservée
+        # sur le budget du client pendant l'appel
         try:
-            response = openrouter_client.chat_completion(
-                prompt=request.message,
-                system_prompt=system_prompt,
-                model=request.model,
-                temperature=request.temperature
-            )
+            with usage_tracker.reserve(client_id, estimate_request_tokens(system_prompt, request.message)):
+                completion = openrouter_client.complete(
+                    prompt=request.message,
+                    system_prompt=system_prompt,
+                    model=decision.model,
+                    temperature=request.temperature,
+                    timeout=llm_timeout
+                )
+                usage_tracker.record(client_id, completion.model, completion.usage, completion.latency_ms)
+            usage = completion.usage.to_dict()
+        except AdmissionRejected as e:
+            # Budget insuffisant pour la consommation estimée de l'appel
+            raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers)
         except ValueError as e:
             # Erreur spécifique d'OpenRouter (401, timeout, etc.)
             error_msg = str(e)
@@ -214,59 +359,171 @@ def chat(request: ChatRequest):
                 status_code=502,
                 detail=f"Erreur de connexion à OpenRouter: {str(e)}"
             )
+        finally:
+            mark("llm")
         
         # Formater la réponse
-        model_used = request.model or settings.OPENROUTER_MODEL
-        formatted = format_chat_response(response, model_used)
+        formatted = format_chat_response(completion.content, decision.model, usage)
         
         return ChatResponse(**formatted)
         
-    except HTTPException:
+    except HTTPException as e:
+        status = f"http_{e.status_code}"
         raise
     except ValueError as e:
+        status = "http_400"
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         # Erreur générale
-        import traceback
+        status = "error"
         error_detail = str(e)
-        print(f"Erreur inattendue: {error_detail}")
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Erreur inattendue: %s", error_detail)
         raise HTTPException(
             status_code=500,
             detail=f"Erreur lors du traitement de la requête: {error_detail}"
         )
+    finally:
+        if decision is not None:
+            model_router.record_outcome(
+                decision,
+                status,
+                timings.get("llm"),
+                completion.usage if completion is not None else None
+            )
+        if query_log is not None and request.message and request.message.strip():
+            query_log.log(
+                # Message d'origine : rejoué tel quel par le préchauffage
+                collapse_whitespace(request.message),
+                sujet=retrieval.sujet.titre_sujet if retrieval.sujet else None,
+                article_ids=[article.article_id for article in retrieval.articles],
+                timings=timings,
+                cache={"retrieval": retrieval.cache_hit},
+                status=status,
+                usage=usage,
+                route=decision.to_dict() if decision is not None else None
+            )
+
+def run_chat_job(job: Dict) -> Dict:
+    """
+    Exécute une tâche de chat asynchrone (pool local ou chat_job_worker.py)
+    
+    Args:
+        job: La tâche (client_id, request)
+    
+    Returns:
+        La réponse du chat
+    """
+    # Les tâches partagent les CHAT_MAX_CONCURRENT places d'appel à OpenRouter
+    with admission_controller.upstream_slot(timeout=settings.CHAT_JOB_TIMEOUT, bounded=False):
+        return process_chat(
+            ChatRequest(**job["request"]), job["client_id"], llm_timeout=settings.CHAT_JOB_TIMEOUT
+        ).dict()
+
+chat_jobs.set_handler(run_chat_job)
+
+# Chat asynchrone
+@app.post("/chat/jobs", response_model=ChatJobResponse, status_code=202)
+def create_chat_job(request: ChatRequest, http_request: Request, response: Response):
+    """
+    Chat asynchrone pour les questions longues
+    
+    Enregistre la question et renvoie immédiatement l'identifiant de la
+    tâche (202, en-tête Location). La recherche et la génération
+    s'exécutent en arrière-plan avec un délai de CHAT_JOB_TIMEOUT secondes
+    au lieu de la limite de la requête synchrone ; le résultat s'obtient
+    avec GET /chat/jobs/{job_id}.
+    """
+    client_id = client_id_from_request(http_request)
+    is_valid, error_message = validate_message(request.message)
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=error_message)
+    
+    try:
+        usage_tracker.check_budget(client_id)
+        # La place d'appel à OpenRouter est prise à l'exécution (run_chat_job)
+        admission_controller.check_rate(client_id)
+        job = chat_jobs.submit(client_id, request.dict())
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers)
+    except Exception as e:
+        logger.error("Erreur lors de l'enregistrement de la tâche: %s", e)
+        raise HTTPException(status_code=503, detail="Tâches indisponibles, réessayez plus tard.")
+    response.headers["Location"] = f"/chat/jobs/{job['job_id']}"
+    return ChatJobResponse(**job)
+
+@app.get("/chat/jobs/{job_id}", response_model=ChatJobResponse)
+async def get_chat_job(job_id: str, response: Response, wait: float = 0):
+    """
+    État et résultat d'une tâche de chat asynchrone
+    
+    Avec `wait` (secondes, au plus CHAT_JOB_MAX_WAIT), la réponse est
+    retenue jusqu'à la fin de la tâche ou l'expiration de l'attente
+    (interrogation longue). Tant que la tâche n'est pas terminée, un
+    en-tête Retry-After indique quand interroger à nouveau.
+    """
+    deadline = time.monotonic() + min(max(wait, 0), settings.CHAT_JOB_MAX_WAIT)
+    while True:
+        try:
+            job = await run_in_threadpool(chat_jobs.get, job_id)
+        except Exception as e:
+            logger.error("Erreur lors de la lecture de la tâche %s: %s", job_id, e)
+            raise HTTPException(status_code=503, detail="Tâches indisponibles, réessayez plus tard.")
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Tâche {job_id} inconnue ou expirée")
+        if job["status"] in FINISHED or time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(settings.CHAT_JOB_POLL_INTERVAL)
+    if job["status"] not in FINISHED:
+        response.headers["Retry-After"] = "1"
+    return ChatJobResponse(**job)
+
+# Consommation du client
+@app.get("/usage")
+def client_usage(http_request: Request):
+    """
+    Consommation de tokens du jour (UTC) pour le client appelant
+    
+    Le client est identifié comme pour le contrôle d'admission
+    (adresse IP ; X-Client-Id derrière un proxy de confiance).
+    """
+    client_id = client_id_from_request(http_request)
+    return {"client_id": client_id, **usage_tracker.client_usage(client_id)}
 
 # Endpoint health check
 @app.get("/health", response_model=HealthResponse)
-def health_check():
+async def health_check():
     """
     Health Check
     
     Vérifie l'état de l'API ChatRH et de la connexion PostgreSQL.
+    L'état de la base provient du dernier échantillon en arrière-plan :
+    aucune requête n'est envoyée à la base par cet endpoint (sauf sans
+    thread d'échantillonnage : au plus une fois par intervalle).
     """
-    try:
-        articles_count = get_articles_count()
-        message = f"API ChatRH opérationnelle"
-        if articles_count > 0:
-            message += f" - {articles_count} articles disponibles dans la base de données"
-        else:
-            message += " - PostgreSQL non configuré ou base vide"
-        
-        # Vérifier aussi la clé API OpenRouter
-        if not settings.OPENROUTER_API_KEY:
-            message += " - ⚠️ OPENROUTER_API_KEY non configurée"
-        else:
-            message += " - ✅ OpenRouter configuré"
-        
-        return HealthResponse(
-            status="ok",
-            message=message
-        )
-    except Exception as e:
-        return HealthResponse(
-            status="ok",
-            message=f"API ChatRH opérationnelle - Erreur base de données: {str(e)}"
-        )
+    if not health_sampler.running:
+        await run_in_threadpool(health_sampler.ensure_fresh)
+    snapshot = health_sampler.snapshot()
+    database = snapshot.get("database")
+    message = f"API ChatRH opérationnelle"
+    if database is None:
+        message += " - État de la base en cours d'échantillonnage"
+    elif database["error"] and not database["reachable"]:
+        message += f" - Erreur base de données: {database['error']}"
+    elif database["articles_estimate"]:
+        message += f" - ~{database['articles_estimate']} articles disponibles dans la base de données"
+    else:
+        message += " - PostgreSQL non configuré ou base vide"
+    
+    # Vérifier aussi la clé API OpenRouter
+    if not settings.OPENROUTER_API_KEY:
+        message += " - ⚠️ OPENROUTER_API_KEY non configurée"
+    else:
+        message += " - ✅ OpenRouter configuré"
+    
+    return HealthResponse(
+        status="ok",
+        message=message
+    )
 
 # Endpoint de diagnostic
 @app.get("/diagnostic")
@@ -291,13 +548,31 @@ def diagnostic():
         }
     }
     
-    try:
-        articles_count = get_articles_count()
-        diagnostic_info["database"]["articles_count"] = articles_count
-        diagnostic_info["database"]["connected"] = True
-    except Exception as e:
-        diagnostic_info["database"]["connected"] = False
-        diagnostic_info["database"]["error"] = str(e)
+    # État issu de l'échantillonnage en arrière-plan (pas de connexion ici,
+    # sauf sans thread d'échantillonnage)
+    health_sampler.ensure_fresh()
+    snapshot = health_sampler.snapshot()
+    database = snapshot.get("database") or {}
+    diagnostic_info["database"]["connected"] = database.get("reachable", False)
+    diagnostic_info["database"]["articles_count"] = database.get("articles_estimate")
+    if database.get("error"):
+        diagnostic_info["database"]["error"] = database["error"]
+    diagnostic_info["health_sample"] = snapshot
+    diagnostic_info["db_pool"] = db_pool_stats()
+    diagnostic_info["article_cache"] = article_cache.stats()
+    diagnostic_info["retrieval_cache"] = retrieval_cache.stats()
+    fuzzy_index = get_fuzzy_index() if settings.FUZZY_ENABLED else None
+    diagnostic_info["fuzzy_index"] = fuzzy_index.stats() if fuzzy_index else None
+    shared_index = get_shared_index()
+    diagnostic_info["shared_index"] = shared_index.stats() if shared_index else None
+    diagnostic_info["admission"] = admission_controller.stats()
+    diagnostic_info["chat_jobs"] = chat_jobs.stats()
+    diagnostic_info["usage"] = usage_tracker.stats()
+    diagnostic_info["model_router"] = model_router.stats()
+    diagnostic_info["query_log"] = query_log.stats() if query_log is not None else None
+    diagnostic_info["logging"] = logging_stats()
+    diagnostic_info["profiling"] = request_profiler.stats()
+    diagnostic_info["tracing"] = tracer.stats() if tracer is not None else None
     
     return diagnostic_info
 
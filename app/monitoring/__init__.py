@@ -0,0 +1,8 @@
+"""
+Module Monitoring - Santé, métriques et observabilité de ChatRH
+"""
+
+from .health_sampler import health_sampler, record_upstream_outcome
+from .usage import TokenUsage, usage_tracker
+
+__all__ = ["health_sampler", "record_upstream_outcome", "TokenUsage", "usage_tracker"]
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Échantillonnage de l'état de santé en arrière-plan pour ChatRH
+
+Un thread interroge périodiquement la base de données (accessibilité,
+nombre estimé d'articles) et conserve le dernier résultat en mémoire.
+Les sondes /readyz et /health lisent cet instantané : elles ne font
+aucune entrée/sortie, quel que soit le rythme des sondes du répartiteur.
+Sans thread (HEALTH_SAMPLER_ENABLED=False, ou thread arrêté), les sondes
+échantillonnent elles-mêmes, au plus une fois par intervalle.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Dernier résultat d'appel à OpenRouter, renseigné par le client LLM
+_upstream_lock = threading.Lock()
+_last_upstream: Optional[Dict] = None
+
+def record_upstream_outcome(
+    ok: bool,
+    latency_ms: float,
+    status_code: Optional[int] = None,
+    error: Optional[str] = None
+) -> None:
+    """
+    Enregistre le résultat du dernier appel à OpenRouter
+
+    Args:
+        ok: True si l'appel a réussi
+        latency_ms: Durée de l'appel en millisecondes
+        status_code: Code HTTP renvoyé (si disponible)
+        error: Message d'erreur (si échec)
+    """
+    global _last_upstream
+    with _upstream_lock:
+        _last_upstream = {
+            "ok": ok,
+            "status_code": status_code,
+            "latency_ms": round(latency_ms, 1),
+            "error": error,
+            "at": time.time()
+        }
+
+def _sample_database() -> Dict:
+    """Vérifie la base et récupère le nombre estimé d'articles"""
+    from app.db.db_postgres import PSYCOPG2_AVAILABLE, get_db_connection
+
+    result = {"reachable": False, "latency_ms": None, "articles_estimate": None, "error": None}
+    if not PSYCOPG2_AVAILABLE:
+        result["error"] = "psycopg2 non disponible"
+        return result
+
+    started = time.perf_counter()
+    connection = get_db_connection()
+    if not connection:
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        result["error"] = "connexion impossible"
+        return result
+
+    cursor = None
+    try:
+        cursor = connection.cursor()
+        # Estimation issue des statistiques du planificateur : pas de parcours de table
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = 'public.article'::regclass"
+        )
+        estimate = cursor.fetchone()[0]
+        if estimate is None or estimate < 0:
+            # Table jamais analysée : comptage exact (petite table)
+            cursor.execute("SELECT COUNT(*) FROM public.article")
+            estimate = cursor.fetchone()[0]
+        result["reachable"] = True
+        result["articles_estimate"] = int(estimate)
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        if cursor:
+            cursor.close()
+        connection.close()
+    return result
+
+def _pool_stats() -> Dict:
+    from app.db.db_postgres import db_pool_stats
+    return db_pool_stats()
+
+class HealthSampler:
+    """Thread d'échantillonnage périodique de l'état de santé"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._snapshot: Optional[Dict] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        # Un seul échantillonnage à la demande à la fois
+        self._inline_lock = threading.Lock()
+
+    def sample(self) -> Dict:
+        """
+        Effectue un échantillonnage complet et met à jour l'instantané
+
+        Returns:
+            Le nouvel instantané
+        """
+        snapshot = {
+            "sampled_at": time.time(),
+            "database": _sample_database(),
+            "pools": _pool_stats()
+        }
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error("Erreur lors de l'échantillonnage de santé: %s", e)
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        """Démarre le thread d'échantillonnage (sans effet s'il tourne déjà)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="health-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Arrête le thread d'échantillonnage"""
+        self._stop.set()
+
+    @property
+    def running(self) -> bool:
+        """True si le thread d'échantillonnage tourne"""
+        thread = self._thread
+        return bool(thread and thread.is_alive() and not self._stop.is_set())
+
+    def ensure_fresh(self) -> None:
+        """
+        Échantillonne à la demande si aucun thread ne tient l'instantané à jour
+
+        Sans effet si le thread tourne ou si l'instantané a moins d'un
+        intervalle : les sondes rapprochées ne multiplient pas les requêtes.
+        """
+        if self.running:
+            return
+        with self._inline_lock:
+            with self._lock:
+                sampled_at = self._snapshot["sampled_at"] if self._snapshot else None
+            if sampled_at is not None and time.time() - sampled_at < self.interval:
+                return
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error("Erreur lors de l'échantillonnage de santé: %s", e)
+
+    def snapshot(self) -> Dict:
+        """
+        Retourne le dernier instantané, sans aucune entrée/sortie
+
+        Returns:
+            L'instantané enrichi de son âge et du dernier appel OpenRouter
+        """
+        with self._lock:
+            snapshot = dict(self._snapshot) if self._snapshot else {"sampled_at": None}
+        if snapshot["sampled_at"] is not None:
+            snapshot["age_seconds"] = round(time.time() - snapshot["sampled_at"], 1)
+        with _upstream_lock:
+            last_upstream = dict(_last_upstream) if _last_upstream else None
+        snapshot["openrouter"] = {
+            "configured": bool(settings.OPENROUTER_API_KEY),
+            "last_call": last_upstream
+        }
+        return snapshot
+
+    def is_ready(self, snapshot: Optional[Dict] = None) -> bool:
+        """
+        Indique si l'instance peut recevoir du trafic
+
+        Args:
+            snapshot: Instantané à évaluer (le dernier par défaut)
+
+        Returns:
+            True si la base était accessible lors d'un échantillon récent
+        """
+        snapshot = snapshot or self.snapshot()
+        if snapshot.get("sampled_at") is None:
+            return False
+        if snapshot["age_seconds"] > 3 * self.interval:
+            # Le thread d'échantillonnage ne tourne plus : état inconnu
+            return False
+        return snapshot["database"]["reachable"]
+
+# Instance globale de l'échantillonneur
+health_sampler = HealthSampler(settings.HEALTH_SAMPLE_INTERVAL)
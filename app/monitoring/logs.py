@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Journalisation structurée et non bloquante pour ChatRH
+
+Les modules journalisent via logging.getLogger(__name__). Sur le thread
+de la requête, un enregistrement ne coûte qu'un filtrage (échantillonnage
+par niveau, limitation des messages répétés) et un dépôt dans une file
+bornée ; la mise en forme JSON et l'écriture sont faites par un thread
+dédié. Si la sortie ne suit pas, les enregistrements sont abandonnés
+(et comptés) plutôt que de bloquer les requêtes.
+
+Chaque enregistrement porte l'identifiant de la requête en cours
+(en-tête X-Request-Id, généré si absent).
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from app.config import settings
+
+# Identifiant de la requête en cours (propagé aux threads du pool par Starlette)
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributs standard d'un LogRecord, exclus des champs supplémentaires
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+# Nombre maximum de messages distincts suivis par la limitation des répétitions
+MAX_TRACKED_MESSAGES = 1000
+
+class JsonFormatter(logging.Formatter):
+    """Formate un enregistrement en une ligne JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "thread": record.threadName
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and key not in data:
+                data[key] = value
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+class SamplingFilter(logging.Filter):
+    """
+    Échantillonnage par niveau et limitation des messages répétés
+
+    Un même message (logger, niveau, gabarit) n'est émis qu'au plus
+    `repeat_limit` fois par fenêtre de `window` secondes ; le nombre de
+    messages supprimés est joint au premier message de la fenêtre suivante.
+    """
+
+    def __init__(self, rates: Dict[int, float], repeat_limit: int, window: float):
+        super().__init__()
+        self.rates = rates
+        self.repeat_limit = repeat_limit
+        self.window = window
+        self._counters: Dict[Tuple[str, int, str], list] = {}
+        self._lock = threading.Lock()
+        self.sampled_out = 0
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno, 1.0)
+        if rate < 1.0 and random.random() >= rate:
+            self.sampled_out += 1
+            return False
+        if self.repeat_limit <= 0:
+            return True
+
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None or now - counter[0] >= self.window:
+                if len(self._counters) >= MAX_TRACKED_MESSAGES:
+                    self._counters.clear()
+                suppressed = counter[2] if counter else 0
+                # [début de fenêtre, émis, supprimés]
+                self._counters[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if counter[1] < self.repeat_limit:
+                counter[1] += 1
+                return True
+            counter[2] += 1
+            self.suppressed += 1
+            return False
+
+class RequestQueueHandler(logging.handlers.QueueHandler):
+    """Dépose les enregistrements dans une file bornée, sans jamais bloquer"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Seul le strict nécessaire est fait sur le thread appelant : le
+        # message est figé et la trace de pile convertie en texte
+        record = logging.makeLogRecord(record.__dict__)
+        record.request_id = request_id_var.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[RequestQueueHandler] = None
+_sampling_filter: Optional[SamplingFilter] = None
+
+def rotate_file(path: str, max_bytes: int, backups: int) -> None:
+    """
+    Fait tourner un fichier local une fois sa taille maximale atteinte
+
+    Décale path -> path.1 -> ... -> path.<backups> (le plus ancien est
+    supprimé) ; sans ancien fichier conservé, le fichier est supprimé.
+    Réservé à un seul écrivain (thread d'export).
+
+    Args:
+        path: Fichier à faire tourner
+        max_bytes: Taille déclenchant la rotation (0 : jamais)
+        backups: Nombre d'anciens fichiers conservés
+    """
+    if max_bytes <= 0:
+        return
+    try:
+        if os.path.getsize(path) < max_bytes:
+            return
+    except FileNotFoundError:
+        return
+    if backups <= 0:
+        os.remove(path)
+        return
+    for index in range(backups - 1, 0, -1):
+        source = f"{path}.{index}"
+        if os.path.exists(source):
+            os.replace(source, f"{path}.{index + 1}")
+    os.replace(path, f"{path}.1")
+
+def parse_sample_rates(value: str) -> Dict[int, float]:
+    """
+    Lit les taux d'échantillonnage par niveau ("DEBUG=0.01,INFO=0.1")
+
+    Args:
+        value: Valeur de LOG_SAMPLE_RATES
+
+    Returns:
+        Dictionnaire niveau numérique -> taux entre 0 et 1
+    """
+    rates = {}
+    for item in value.split(","):
+        name, _, rate = item.partition("=")
+        level = logging.getLevelName(name.strip().upper())
+        try:
+            if isinstance(level, int):
+                rates[level] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+def setup_logging() -> None:
+    """Configure le logger "app" (idempotent)"""
+    global _listener, _queue_handler, _sampling_filter
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"))
+
+    _sampling_filter = SamplingFilter(
+        parse_sample_rates(settings.LOG_SAMPLE_RATES),
+        settings.LOG_REPEAT_LIMIT,
+        settings.LOG_REPEAT_WINDOW
+    )
+    _queue_handler = RequestQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    _queue_handler.addFilter(_sampling_filter)
+
+    logger = logging.getLogger("app")
+    logger.setLevel(settings.LOG_LEVEL.upper())
+    logger.addHandler(_queue_handler)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, output)
+    _listener.start()
+
+def shutdown_logging() -> None:
+    """Écrit les enregistrements en attente et arrête le thread d'écriture"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        logging.getLogger("app").removeHandler(_queue_handler)
+
+def logging_stats() -> Dict:
+    """Statistiques de la journalisation"""
+    if _queue_handler is None:
+        return {"configured": False}
+    return {
+        "configured": True,
+        "pending": _queue_handler.queue.qsize(),
+        "dropped": _queue_handler.dropped,
+        "sampled_out": _sampling_filter.sampled_out,
+        "suppressed_repeats": _sampling_filter.suppressed
+    }
+
+class RequestIdMiddleware:
+    """Middleware ASGI : identifiant de requête (X-Request-Id) pour les journaux"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Profilage à la demande des requêtes /chat (CPU et mémoire)
+
+Une requête portant l'en-tête `X-Profile: <PROFILING_TOKEN>`, ou tirée au
+sort (PROFILING_SAMPLE_RATE), est exécutée sous :
+- un profileur CPU par échantillonnage : un thread relève la pile des
+  threads de la requête (y compris les étapes du pipeline exécutées dans
+  le pool, voir stage_graph) toutes les PROFILING_INTERVAL_MS millisecondes ;
+- une différence d'instantanés tracemalloc avant / après la requête
+  (allocations de tout le processus pendant la requête).
+
+Le rapport (fonctions les plus coûteuses, piles agrégées au format
+"collapsed" des flame graphs, allocations par ligne) est écrit dans
+PROFILING_DIR et téléchargeable via /admin/profiles. Une seule requête
+est profilée à la fois. Profilage désactivé : aucun coût (ni thread, ni
+traçage), seul un test de configuration par requête.
+"""
+
+import hmac
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional
+
+from app.config import settings
+from app.monitoring.logs import request_id_var
+
+logger = logging.getLogger(__name__)
+
+# En-tête qui déclenche le profilage d'une requête
+PROFILE_HEADER = "x-profile"
+
+# Session de profilage de la requête en cours
+_session_var: ContextVar[Optional["ProfileSession"]] = ContextVar("profile_session", default=None)
+
+def current_session() -> Optional["ProfileSession"]:
+    """Session de profilage de la requête en cours, ou None"""
+    return _session_var.get()
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+class ProfileSession:
+    """Échantillons de pile des threads d'une requête profilée"""
+
+    def __init__(self, label: str, interval: float):
+        self.profile_id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.interval = interval
+        self.threads = {threading.get_ident()}
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def wrap(self, fn: Callable) -> Callable:
+        """Rattache à la session le thread qui exécutera `fn` (pool du pipeline)"""
+        def run(*args, **kwargs):
+            ident = threading.get_ident()
+            self.threads.add(ident)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.threads.discard(ident)
+        return run
+
+    def start(self) -> None:
+        self._sampler = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in list(self.threads):
+                frame = frames.get(ident)
+                names = []
+                while frame is not None:
+                    names.append(_frame_name(frame))
+                    frame = frame.f_back
+                if names:
+                    # Format "collapsed" : de la racine vers la feuille
+                    self.stacks[";".join(reversed(names))] += 1
+                    self.samples += 1
+
+    def cpu_report(self, top_n: int) -> Dict:
+        """Fonctions les plus présentes dans les échantillons (propre et cumulé)"""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            names = stack.split(";")
+            own[names[-1]] += count
+            for name in set(names):
+                total[name] += count
+
+        def top(counter: Counter) -> List[Dict]:
+            return [
+                {"function": name, "samples": count, "percent": round(100 * count / self.samples, 1)}
+                for name, count in counter.most_common(top_n)
+            ]
+
+        return {
+            "samples": self.samples,
+            "interval_ms": round(self.interval * 1000, 2),
+            "top_self": top(own) if self.samples else [],
+            "top_cumulative": top(total) if self.samples else [],
+            "collapsed": [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        }
+
+def _memory_report(before, after, top_n: int) -> Dict:
+    ignored = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    differences = after.filter_traces(ignored).compare_to(before.filter_traces(ignored), "lineno")
+    return {
+        "size_diff_kb": round(sum(stat.size_diff for stat in differences) / 1024, 1),
+        "top_allocations": [
+            {
+                "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "count_diff": stat.count_diff
+            }
+            for stat in differences[:top_n]
+        ]
+    }
+
+class RequestProfiler:
+    """Déclenchement, exécution et conservation des profils de requêtes"""
+
+    def __init__(
+        self,
+        enabled: bool,
+        token: str,
+        sample_rate: float,
+        interval_ms: float,
+        directory: str,
+        max_reports: int,
+        top_n: int
+    ):
+        self.enabled = enabled and (bool(token) or sample_rate > 0)
+        self.token = token
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+        self.directory = directory
+        self.max_reports = max_reports
+        self.top_n = top_n
+        self._busy = threading.Lock()
+        self.profiled = 0
+        self.skipped = 0
+
+    def check_token(self, value: Optional[str]) -> bool:
+        """Compare une valeur au jeton de profilage (temps constant)"""
+        return bool(self.token) and bool(value) and hmac.compare_digest(value, self.token)
+
+    def maybe_profile(self, headers, label: str):
+        """
+        Profile la requête si elle le demande ou si elle est tirée au sort
+
+        Args:
+            headers: En-têtes de la requête HTTP
+            label: Libellé du rapport (chemin de l'endpoint)
+
+        Returns:
+            Gestionnaire de contexte fournissant la session, ou None si la
+            requête n'est pas profilée
+        """
+        if not self.enabled:
+            return nullcontext()
+        if not self.check_token(headers.get(PROFILE_HEADER)) and random.random() >= self.sample_rate:
+            return nullcontext()
+        return self._profile(label)
+
+    @contextmanager
+    def _profile(self, label: str) -> Iterator[Optional[ProfileSession]]:
+        if not self._busy.acquire(blocking=False):
+            # Une autre requête est déjà profilée (tracemalloc est global)
+            self.skipped += 1
+            yield None
+            return
+        try:
+            session = ProfileSession(label, self.interval)
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            token = _session_var.set(session)
+            session.start()
+            started = time.perf_counter()
+            try:
+                yield session
+            finally:
+                duration_ms = (time.perf_counter() - started) * 1000
+                session.stop()
+                _session_var.reset(token)
+                after = tracemalloc.take_snapshot()
+                if started_tracing:
+                    tracemalloc.stop()
+                self._save(session, duration_ms, _memory_report(before, after, self.top_n))
+        finally:
+            self._busy.release()
+
+    def _save(self, session: ProfileSession, duration_ms: float, memory: Dict) -> None:
+        report = {
+            "profile_id": session.profile_id,
+            "label": session.label,
+            "request_id": request_id_var.get(),
+            "created_at": time.time(),
+            "duration_ms": round(duration_ms, 1),
+            "cpu": session.cpu_report(self.top_n),
+            "memory": memory
+        }
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path(session.profile_id), "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False)
+            self.profiled += 1
+            self._prune()
+            logger.info(
+                "Profil %s enregistré (%s, %.0f ms)", session.profile_id, session.label, duration_ms,
+                extra={"profile_id": session.profile_id}
+            )
+        except OSError as e:
+            logger.error("Erreur lors de l'écriture du profil %s: %s", session.profile_id, e)
+
+    def _path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.json")
+
+    def _prune(self) -> None:
+        reports = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in reports[:max(0, len(reports) - self.max_reports)]:
+            os.remove(entry.path)
+
+    def list_reports(self) -> List[Dict]:
+        """Résumé des rapports conservés, du plus récent au plus ancien"""
+        if not os.path.isdir(self.directory):
+            return []
+        summaries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                with open(entry.path, encoding="utf-8") as f:
+                    report = json.load(f)
+            except (OSError, ValueError):
+                continue
+            summaries.append({
+                "profile_id": report["profile_id"],
+                "label": report["label"],
+                "request_id": report.get("request_id"),
+                "created_at": report["created_at"],
+                "duration_ms": report["duration_ms"],
+                "samples": report["cpu"]["samples"]
+            })
+        return sorted(summaries, key=lambda summary: summary["created_at"], reverse=True)
+
+    def load_report(self, profile_id: str) -> Optional[Dict]:
+        """Rapport complet, ou None s'il n'existe pas (ou plus)"""
+        if not profile_id.isalnum():
+            return None
+        try:
+            with open(self._path(profile_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def stats(self) -> Dict:
+        """Statistiques du profilage"""
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "profiled": self.profiled,
+            "skipped": self.skipped
+        }
+
+# Instance globale du profileur de requêtes
+request_profiler = RequestProfiler(
+    enabled=settings.PROFILING_ENABLED,
+    token=settings.PROFILING_TOKEN,
+    sample_rate=settings.PROFILING_SAMPLE_RATE,
+    interval_ms=settings.PROFILING_INTERVAL_MS,
+    directory=settings.PROFILING_DIR,
+    max_reports=settings.PROFILING_MAX_REPORTS,
+    top_n=settings.PROFILING_TOP_N
+)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Journal des requêtes /chat pour ChatRH
+
+Chaque requête produit un enregistrement (message normalisé, sujet
+identifié, articles retenus, durées par étape, indicateurs de cache,
+tokens consommés).
+L'écriture est déléguée à un thread : le chemin de la requête se contente
+d'un dépôt non bloquant dans une file bornée, et les enregistrements sont
+abandonnés (et comptés) si la file est pleine.
+
+Le journal conserve les questions des utilisateurs : il est désactivé par
+défaut (QUERY_LOG_ENABLED), les adresses e-mail et les longues suites de
+chiffres (téléphone, numéro de sécurité sociale) sont masquées avant
+l'écriture, et le fichier tourne à QUERY_LOG_MAX_BYTES.
+"""
+
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.monitoring.logs import rotate_file
+
+logger = logging.getLogger(__name__)
+
+# Nombre maximum d'enregistrements écrits en une fois
+WRITE_BATCH_SIZE = 200
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+# Six chiffres ou plus, éventuellement séparés (les numéros d'articles sont plus courts)
+_LONG_NUMBER_RE = re.compile(r"\d(?:[ .-]?\d){5,}")
+
+def redact_message(text: str) -> str:
+    """
+    Masque les données personnelles évidentes d'un message journalisé
+
+    Args:
+        text: Le message de l'utilisateur
+
+    Returns:
+        Le message, adresses e-mail et longues suites de chiffres masquées
+    """
+    return _LONG_NUMBER_RE.sub("<nombre>", _EMAIL_RE.sub("<email>", text))
+
+class FileQueryLogSink:
+    """Écrit les enregistrements en JSON Lines dans un fichier local, avec rotation"""
+
+    def __init__(self, path: str, max_bytes: int = 0, backups: int = 0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    def write(self, records: List[Dict]) -> None:
+        """Ajoute un lot d'enregistrements en fin de fichier"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Un seul thread écrit : pas de concurrence sur la rotation
+        rotate_file(self.path, self.max_bytes, self.backups)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False))
+                f.write("\n")
+
+    def top_queries(self, limit: int) -> List[Tuple[str, int]]:
+        """Requêtes les plus fréquentes (fichier courant et anciens fichiers, de taille bornée)"""
+        counts: Counter = Counter()
+        paths = [self.path] + [f"{self.path}.{index}" for index in range(1, self.backups + 1)]
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        counts[json.loads(line)["query"]] += 1
+                    except (ValueError, KeyError):
+                        continue
+        return counts.most_common(limit)
+
+class PostgresQueryLogSink:
+    """Écrit les enregistrements dans la table public.query_log"""
+
+    def __init__(self):
+        self._schema_ready = False
+
+    def _connection(self):
+        from app.db.db_postgres import get_db_connection
+        from app.db.schema import QUERY_LOG_DDL, ensure_schema
+
+        connection = get_db_connection()
+        if connection and not self._schema_ready:
+            ensure_schema(connection, QUERY_LOG_DDL)
+            self._schema_ready = True
+        return connection
+
+    def write(self, records: List[Dict]) -> None:
+        """Insère un lot d'enregistrements en une seule requête"""
+        import psycopg2.extras
+
+        connection = self._connection()
+        if not connection:
+            raise RuntimeError("Connexion à PostgreSQL impossible")
+        try:
+            with connection.cursor() as cursor:
+                psycopg2.extras.execute_values(
+                    cursor,
+                    "INSERT INTO public.query_log "
+                    "(logged_at, query, sujet, article_ids, timings, cache, status, usage, route) VALUES %s",
+                    [
+                        (
+                            record["logged_at"],
+                            record["query"],
+                            record.get("sujet"),
+                            record.get("article_ids"),
+                            json.dumps(record.get("timings") or {}),
+                            json.dumps(record.get("cache") or {}),
+                            record.get("status"),
+                            json.dumps(record["usage"]) if record.get("usage") else None,
+                            json.dumps(record["route"]) if record.get("route") else None
+                        )
+                        for record in records
+                    ],
+                    template="(to_timestamp(%s), %s, %s, %s, %s::jsonb, %s::jsonb, %s, %s::jsonb, %s::jsonb)"
+                )
+            connection.commit()
+        finally:
+            connection.close()
+
+    def top_queries(self, limit: int) -> List[Tuple[str, int]]:
+        """Requêtes les plus fréquentes"""
+        connection = self._connection()
+        if not connection:
+            return []
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT query, COUNT(*) FROM public.query_log "
+                    "GROUP BY query ORDER BY COUNT(*) DESC LIMIT %s",
+                    (limit,)
+                )
+                return [(query, count) for query, count in cursor.fetchall()]
+        finally:
+            connection.close()
+
+class QueryLog:
+    """Journal asynchrone à faible surcoût"""
+
+    def __init__(self, sink, max_queue: int = 10000):
+        self.sink = sink
+        self._queue: "queue.Queue[Dict]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def _ensure_writer(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="query-log", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.sink.write(batch)
+                self.written += len(batch)
+            except Exception as e:
+                self.errors += 1
+                logger.error("Erreur lors de l'écriture du journal des requêtes: %s", e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def log(
+        self,
+        query: str,
+        sujet: Optional[str] = None,
+        article_ids: Optional[List[int]] = None,
+        timings: Optional[Dict[str, float]] = None,
+        cache: Optional[Dict[str, bool]] = None,
+        status: str = "ok",
+        usage: Optional[Dict] = None,
+        route: Optional[Dict] = None
+    ) -> None:
+        """
+        Dépose un enregistrement dans la file, sans jamais bloquer
+
+        Args:
+            query: Message d'origine (espaces réduits, masqué avant écriture)
+            sujet: Titre du sujet identifié
+            article_ids: IDs des articles retenus
+            timings: Durées par étape (millisecondes)
+            cache: Indicateurs de succès de cache par niveau
+            status: Issue de la requête (ok, erreur...)
+            usage: Tokens consommés et coût de l'appel au LLM
+            route: Choix du modèle (niveau, modèle, règle de routage)
+        """
+        record = {
+            "logged_at": time.time(),
+            "query": redact_message(query),
+            "sujet": sujet,
+            "article_ids": article_ids or [],
+            "timings": timings or {},
+            "cache": cache or {},
+            "status": status,
+            "usage": usage,
+            "route": route
+        }
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        self._ensure_writer()
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Attend l'écriture des enregistrements en attente (arrêt, tests)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def top_queries(self, limit: int) -> List[Tuple[str, int]]:
+        """
+        Retourne les requêtes les plus fréquentes du journal
+
+        Args:
+            limit: Nombre de requêtes
+
+        Returns:
+            Liste de tuples (message normalisé, nombre d'occurrences)
+        """
+        return self.sink.top_queries(limit)
+
+    def stats(self) -> Dict:
+        """Statistiques du journal"""
+        return {
+            "sink": type(self.sink).__name__,
+            "pending": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "errors": self.errors
+        }
+
+def _create_query_log() -> Optional[QueryLog]:
+    if not settings.QUERY_LOG_ENABLED:
+        return None
+    if settings.QUERY_LOG_SINK == "postgres":
+        sink = PostgresQueryLogSink()
+    else:
+        sink = FileQueryLogSink(settings.QUERY_LOG_PATH, settings.QUERY_LOG_MAX_BYTES, settings.QUERY_LOG_BACKUPS)
+    return QueryLog(sink, settings.QUERY_LOG_MAX_QUEUE)
+
+# Instance globale du journal (None si désactivé)
+query_log = _create_query_log()
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Traces distribuées des requêtes (spans au format OpenTelemetry)
+
+Chaque requête HTTP échantillonnée ouvre un span racine ; les étapes du
+pipeline (mots-clés, étapes parallèles, prompt), chaque requête SQL de
+db_postgres (nom de la requête préparée, nombre de lignes) et chaque appel
+à OpenRouter (modèle, tokens) y ajoutent des spans enfants. Le contexte
+est repris de l'en-tête W3C `traceparent` entrant et transmis à
+OpenRouter ; le span courant suit la requête dans les threads via les
+variables de contexte. La décision d'échantillonnage de l'appelant n'est
+suivie qu'avec TRACING_TRUST_UPSTREAM (appelants de confiance) : sinon
+n'importe quel client pourrait imposer le traçage de chaque requête SQL.
+
+Les spans terminés sont déposés dans une file bornée (jamais bloquante)
+puis écrits par lots par un thread vers un exportateur : fichier JSON
+Lines à taille bornée, avec rotation (analyse hors ligne) ou journal
+applicatif ; l'identifiant de la
+trace est renvoyé dans l'en-tête X-Trace-Id. Tracing désactivé :
+start_span() renvoie un span inerte, sans allocation ni horodatage.
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+from app.config import settings
+from app.monitoring.logs import request_id_var, rotate_file
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "chatrh-api"
+
+# Nombre maximum de spans écrits en une fois
+EXPORT_BATCH_SIZE = 500
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+class Span:
+    """Opération chronométrée d'une trace"""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "status", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], kind: str = "internal"):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict = {}
+        self.status = "OK"
+        self.error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        """En-tête W3C traceparent désignant ce span"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict) -> None:
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def record_error(self, error) -> None:
+        """Marque le span en erreur"""
+        self.status = "ERROR"
+        self.error = str(error)[:500]
+
+    def to_dict(self) -> Dict:
+        """Représentation exportée (champs OpenTelemetry)"""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": {"code": self.status, "message": self.error},
+            "resource": {"service.name": SERVICE_NAME, "process.pid": os.getpid()}
+        }
+
+class _NoopSpan:
+    """Span inerte (requête non échantillonnée ou tracing désactivé)"""
+
+    __slots__ = ()
+    traceparent = None
+
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict) -> None:
+        pass
+
+    def record_error(self, error) -> None:
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+# Span courant (None : pas de trace échantillonnée en cours)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+def current_span() -> Optional[Span]:
+    """Span courant, ou None"""
+    return _current_span.get()
+
+def parse_traceparent(value: Optional[str]):
+    """
+    Lit un en-tête W3C traceparent
+
+    Args:
+        value: Valeur de l'en-tête
+
+    Returns:
+        Tuple (trace_id, parent_id, échantillonné) ou None si absent ou invalide
+    """
+    match = _TRACEPARENT_RE.match((value or "").strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+class FileSpanExporter:
+    """Écrit les spans en JSON Lines dans un fichier local, avec rotation"""
+
+    def __init__(self, path: str, max_bytes: int = 0, backups: int = 0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    def export(self, spans: List[Dict]) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Un seul thread exporte : pas de concurrence sur la rotation
+        rotate_file(self.path, self.max_bytes, self.backups)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span, ensure_ascii=False, default=str))
+                f.write("\n")
+
+class LogSpanExporter:
+    """Émet chaque span dans le journal applicatif (champ "span")"""
+
+    def export(self, spans: List[Dict]) -> None:
+        for span in spans:
+            logger.info("Span %s (%.1f ms)", span["name"], span["duration_ms"], extra={"span": span})
+
+class Tracer:
+    """Création des spans et export asynchrone des spans terminés"""
+
+    def __init__(self, exporter, sample_rate: float, max_queue: int = 10000, trust_upstream: bool = False):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.trust_upstream = trust_upstream
+        self._queue: "queue.Queue[Dict]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.exported = 0
+        self.dropped = 0
+        self.errors = 0
+
+    @contextmanager
+    def start_trace(self, name: str, traceparent: Optional[str] = None, kind: str = "server") -> Iterator:
+        """
+        Ouvre le span racine d'une requête
+
+        Args:
+            name: Nom du span ("POST /chat")
+            traceparent: En-tête traceparent entrant : la trace de l'appelant
+                est poursuivie ; sa décision d'échantillonnage n'est
+                respectée qu'avec trust_upstream (sinon sample_rate)
+            kind: Type de span (server pour une requête reçue)
+
+        Returns:
+            Gestionnaire de contexte fournissant le span (inerte si la
+            requête n'est pas échantillonnée)
+        """
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_id, upstream_sampled = parent
+        else:
+            trace_id, parent_id, upstream_sampled = os.urandom(16).hex(), None, None
+        if upstream_sampled is not None and self.trust_upstream:
+            sampled = upstream_sampled
+        else:
+            sampled = random.random() < self.sample_rate
+        if not sampled:
+            yield NOOP_SPAN
+            return
+        with self._span(Span(name, trace_id, parent_id, kind)) as span:
+            yield span
+
+    @contextmanager
+    def _span(self, span: Span) -> Iterator[Span]:
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            self._enqueue(span)
+
+    def start_span(self, name: str, kind: str = "internal", **attributes):
+        """
+        Ouvre un span enfant du span courant
+
+        Sans trace en cours (hors requête, requête non échantillonnée), le
+        span est inerte.
+
+        Args:
+            name: Nom de l'opération
+            kind: Type de span (internal, client pour un appel sortant)
+            attributes: Attributs initiaux
+
+        Returns:
+            Gestionnaire de contexte fournissant le span
+        """
+        parent = _current_span.get()
+        if parent is None:
+            return _NOOP_CONTEXT
+        span = Span(name, parent.trace_id, parent.span_id, kind)
+        span.set_attributes(attributes)
+        return self._span(span)
+
+    def _enqueue(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span.to_dict())
+        except queue.Full:
+            self.dropped += 1
+            return
+        self._ensure_exporter()
+
+    def _ensure_exporter(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < EXPORT_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.exporter.export(batch)
+                self.exported += len(batch)
+            except Exception as e:
+                self.errors += 1
+                logger.error("Erreur lors de l'export des spans: %s", e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Attend l'export des spans en attente (arrêt, tests)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def stats(self) -> Dict:
+        """Statistiques du tracing"""
+        return {
+            "exporter": type(self.exporter).__name__,
+            "sample_rate": self.sample_rate,
+            "trust_upstream": self.trust_upstream,
+            "pending": self._queue.qsize(),
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "errors": self.errors
+        }
+
+class _NoopContext:
+    """Gestionnaire de contexte du span inerte (partagé, sans état)"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return NOOP_SPAN
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NOOP_CONTEXT = _NoopContext()
+
+def _create_tracer() -> Optional[Tracer]:
+    if not settings.TRACING_ENABLED:
+        return None
+    if settings.TRACING_EXPORTER == "log":
+        exporter = LogSpanExporter()
+    else:
+        exporter = FileSpanExporter(
+            settings.TRACING_FILE_PATH, settings.TRACING_FILE_MAX_BYTES, settings.TRACING_FILE_BACKUPS
+        )
+    return Tracer(
+        exporter, settings.TRACING_SAMPLE_RATE, settings.TRACING_QUEUE_SIZE, settings.TRACING_TRUST_UPSTREAM
+    )
+
+# Instance globale du traceur (None si désactivé)
+tracer = _create_tracer()
+
+def start_span(name: str, kind: str = "internal", **attributes):
+    """
+    Ouvre un span enfant du span courant (inerte si le tracing est désactivé)
+
+    Args:
+        name: Nom de l'opération
+        kind: Type de span (internal, client pour un appel sortant)
+        attributes: Attributs initiaux
+
+    Returns:
+        Gestionnaire de contexte fournissant le span
+    """
+    if tracer is None:
+        return _NOOP_CONTEXT
+    return tracer.start_span(name, kind, **attributes)
+
+class TracingMiddleware:
+    """Middleware ASGI : span racine par requête HTTP, contexte traceparent entrant"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope.get("headers", ()):
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        name = f"{scope['method']} {scope['path']}"
+        with tracer.start_trace(name, traceparent) as span:
+            span.set_attributes({
+                "http.method": scope["method"],
+                "http.target": scope["path"],
+                "request.id": request_id_var.get()
+            })
+
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.record_error(f"HTTP {message['status']}")
+                    if isinstance(span, Span):
+                        headers = list(message.get("headers", ()))
+                        headers.append((b"x-trace-id", span.trace_id.encode("latin-1")))
+                        message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace)
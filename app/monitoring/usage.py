@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Consommation de tokens et coût des appels LLM pour ChatRH
+
+Le bloc `usage` des réponses OpenRouter est agrégé par modèle (tokens,
+coût, latence rapportée à la taille du prompt) et par client et par jour
+(UTC). Un budget quotidien de tokens par client est vérifié avant l'appel
+au LLM : au-delà, la requête est refusée (429) jusqu'au lendemain.
+
+Le suivi des budgets est distinct des statistiques par client (LRU
+bornée) : il n'est jamais évincé dans la journée, sinon un client
+changeant d'identifiant remettrait son compteur à zéro. Chaque appel
+réserve une estimation de sa consommation avant l'envoi, libérée une fois
+la consommation réelle enregistrée : des requêtes simultanées ne peuvent
+pas dépasser ensemble le budget.
+
+Les compteurs sont propres à chaque processus ; le journal des requêtes
+conserve la consommation de chaque requête pour les analyses durables.
+"""
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, Optional, Tuple
+
+from app.admission import AdmissionRejected
+from app.config import settings
+
+# Nombre maximum de couples (client, jour) suivis pour les statistiques
+MAX_TRACKED_CLIENTS = 10000
+
+# Estimation grossière du nombre de tokens d'un texte français
+CHARS_PER_TOKEN = 4
+
+class TokenUsage:
+    """Consommation d'un appel LLM (bloc usage de la réponse)"""
+
+    __slots__ = ("prompt_tokens", "completion_tokens", "total_tokens", "cost")
+
+    def __init__(
+        self,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        total_tokens: Optional[int] = None,
+        cost: Optional[float] = None
+    ):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.total_tokens = total_tokens if total_tokens is not None else prompt_tokens + completion_tokens
+        self.cost = cost
+
+    @classmethod
+    def from_response(cls, data: Dict) -> "TokenUsage":
+        """
+        Lit le bloc usage d'une réponse OpenRouter
+
+        Args:
+            data: Réponse JSON complète
+
+        Returns:
+            La consommation (à zéro si le bloc est absent). Sans coût
+            rapporté, le coût est estimé avec les prix configurés.
+        """
+        usage = data.get("usage") or {}
+        prompt_tokens = int(usage.get("prompt_tokens") or 0)
+        completion_tokens = int(usage.get("completion_tokens") or 0)
+        cost = usage.get("cost")
+        if cost is None and (settings.OPENROUTER_PROMPT_PRICE or settings.OPENROUTER_COMPLETION_PRICE):
+            cost = (
+                prompt_tokens * settings.OPENROUTER_PROMPT_PRICE
+                + completion_tokens * settings.OPENROUTER_COMPLETION_PRICE
+            ) / 1_000_000
+        return cls(
+            prompt_tokens,
+            completion_tokens,
+            usage.get("total_tokens"),
+            float(cost) if cost is not None else None
+        )
+
+    def to_dict(self) -> Dict:
+        """Représentation JSON (réponse /chat, journal des requêtes)"""
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "cost": round(self.cost, 6) if self.cost is not None else None
+        }
+
+def parse_budgets(value: str) -> Dict[str, int]:
+    """
+    Lit les budgets par client ("client-a:200000,client-b:50000")
+
+    Args:
+        value: Valeur de CLIENT_TOKEN_BUDGETS
+
+    Returns:
+        Dictionnaire client -> tokens par jour
+    """
+    budgets = {}
+    for item in value.split(","):
+        client_id, _, tokens = item.strip().rpartition(":")
+        if client_id and tokens.strip().isdigit():
+            budgets[client_id.strip()] = int(tokens)
+    return budgets
+
+def estimate_request_tokens(system_prompt: str, message: str, max_tokens: Optional[int] = None) -> int:
+    """
+    Estime la consommation maximale d'un appel LLM avant l'envoi
+
+    Args:
+        system_prompt: Prompt système envoyé
+        message: Question de l'utilisateur
+        max_tokens: Plafond de la réponse (OPENROUTER_MAX_TOKENS par défaut)
+
+    Returns:
+        Tokens du prompt (estimés) plus le plafond de la réponse
+    """
+    max_tokens = settings.OPENROUTER_MAX_TOKENS if max_tokens is None else max_tokens
+    return (len(system_prompt or "") + len(message or "")) // CHARS_PER_TOKEN + max_tokens
+
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+def _seconds_until_tomorrow() -> float:
+    now = datetime.now(timezone.utc)
+    tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (tomorrow - now).total_seconds()
+
+class UsageTracker:
+    """Agrégats de consommation par modèle et par client"""
+
+    def __init__(self, default_budget: int = 0, budgets: Optional[Dict[str, int]] = None):
+        self.default_budget = default_budget
+        self.budgets = budgets or {}
+        self._models: Dict[str, Dict] = {}
+        self._clients: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()
+        # Budgets du jour : client -> tokens consommés et réservés (non évincé)
+        self._budget_day = _today()
+        self._budget_usage: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self.rejected_budget = 0
+
+    def budget_for(self, client_id: str) -> int:
+        """Budget quotidien de tokens d'un client (0 : illimité)"""
+        return self.budgets.get(client_id, self.default_budget)
+
+    def _budget_state(self, client_id: str, create: bool = True) -> Dict[str, int]:
+        """Compteurs de budget du jour d'un client (sous self._lock)"""
+        today = _today()
+        if today != self._budget_day:
+            # Nouveau jour : les compteurs repartent de zéro, les
+            # réservations en cours sont conservées
+            self._budget_day = today
+            self._budget_usage = {
+                client: {"used": 0, "reserved": state["reserved"]}
+                for client, state in self._budget_usage.items()
+                if state["reserved"]
+            }
+        state = self._budget_usage.get(client_id)
+        if state is None:
+            state = {"used": 0, "reserved": 0}
+            if create:
+                self._budget_usage[client_id] = state
+        return state
+
+    def _reject(self) -> AdmissionRejected:
+        self.rejected_budget += 1
+        return AdmissionRejected(
+            429, "Budget quotidien de tokens épuisé pour ce client.", _seconds_until_tomorrow()
+        )
+
+    def check_budget(self, client_id: str) -> None:
+        """
+        Vérifie le budget du client avant de traiter la requête
+
+        Args:
+            client_id: Identifiant du client
+
+        Raises:
+            AdmissionRejected: (429) si le budget du jour est épuisé
+        """
+        budget = self.budget_for(client_id)
+        if budget <= 0:
+            return
+        with self._lock:
+            state = self._budget_state(client_id, create=False)
+            if state["used"] + state["reserved"] >= budget:
+                raise self._reject()
+
+    @contextmanager
+    def reserve(self, client_id: str, estimated_tokens: int) -> Iterator[None]:
+        """
+        Réserve une estimation de la consommation pendant l'appel au LLM
+
+        La réservation est libérée à la sortie du bloc ; la consommation
+        réelle est ajoutée par record().
+
+        Args:
+            client_id: Identifiant du client
+            estimated_tokens: Consommation maximale estimée de l'appel
+
+        Raises:
+            AdmissionRejected: (429) si la réservation dépasse le budget du jour
+        """
+        budget = self.budget_for(client_id)
+        if budget <= 0:
+            yield
+            return
+        with self._lock:
+            state = self._budget_state(client_id)
+            if state["used"] + state["reserved"] + estimated_tokens > budget:
+                raise self._reject()
+            state["reserved"] += estimated_tokens
+        try:
+            yield
+        finally:
+            with self._lock:
+                state = self._budget_state(client_id)
+                state["reserved"] = max(0, state["reserved"] - estimated_tokens)
+
+    def record(self, client_id: str, model: str, usage: TokenUsage, latency_ms: float) -> None:
+        """
+        Enregistre la consommation d'un appel LLM
+
+        Args:
+            client_id: Identifiant du client
+            model: Modèle utilisé
+            usage: Consommation rapportée par OpenRouter
+            latency_ms: Durée de l'appel en millisecondes
+        """
+        with self._lock:
+            stats = self._models.setdefault(model, {
+                "requests": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                "cost": 0.0, "latency_ms": 0.0, "max_prompt_tokens": 0
+            })
+            stats["requests"] += 1
+            stats["prompt_tokens"] += usage.prompt_tokens
+            stats["completion_tokens"] += usage.completion_tokens
+            stats["cost"] += usage.cost or 0.0
+            stats["latency_ms"] += latency_ms
+            stats["max_prompt_tokens"] = max(stats["max_prompt_tokens"], usage.prompt_tokens)
+
+            key = (client_id, _today())
+            client = self._clients.get(key)
+            if client is None:
+                client = {"requests": 0, "total_tokens": 0, "cost": 0.0}
+                self._clients[key] = client
+                if len(self._clients) > MAX_TRACKED_CLIENTS:
+                    self._clients.popitem(last=False)
+            else:
+                self._clients.move_to_end(key)
+            client["requests"] += 1
+            client["total_tokens"] += usage.total_tokens
+            client["cost"] += usage.cost or 0.0
+
+            if self.budget_for(client_id) > 0:
+                self._budget_state(client_id)["used"] += usage.total_tokens
+
+    def client_usage(self, client_id: str) -> Dict:
+        """
+        Consommation du jour d'un client
+
+        Args:
+            client_id: Identifiant du client
+
+        Returns:
+            Requêtes, tokens, coût et budget du jour
+        """
+        budget = self.budget_for(client_id)
+        with self._lock:
+            client = dict(self._clients.get((client_id, _today()), {"requests": 0, "total_tokens": 0, "cost": 0.0}))
+            if budget > 0:
+                # Le compteur de budget survit à l'éviction des statistiques
+                client["total_tokens"] = self._budget_state(client_id, create=False)["used"]
+        client["budget"] = budget or None
+        return client
+
+    def stats(self, top_clients: int = 20) -> Dict:
+        """
+        Statistiques agrégées
+
+        Args:
+            top_clients: Nombre de clients les plus consommateurs listés
+
+        Returns:
+            Agrégats par modèle et clients du jour les plus consommateurs
+        """
+        today = _today()
+        with self._lock:
+            models = {}
+            for model, stats in self._models.items():
+                requests = stats["requests"]
+                prompt_tokens = stats["prompt_tokens"]
+                models[model] = {
+                    "requests": requests,
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": stats["completion_tokens"],
+                    "cost": round(stats["cost"], 6),
+                    "avg_prompt_tokens": round(prompt_tokens / requests, 1) if requests else 0,
+                    "max_prompt_tokens": stats["max_prompt_tokens"],
+                    "avg_latency_ms": round(stats["latency_ms"] / requests, 1) if requests else 0,
+                    # Latence rapportée à la taille du prompt
+                    "ms_per_1k_prompt_tokens": (
+                        round(stats["latency_ms"] / prompt_tokens * 1000, 1) if prompt_tokens else None
+                    )
+                }
+            clients = sorted(
+                ((client_id, usage) for (client_id, day), usage in self._clients.items() if day == today),
+                key=lambda item: -item[1]["total_tokens"]
+            )[:top_clients]
+            budget_clients = len(self._budget_usage) if self._budget_day == today else 0
+            rejected_budget = self.rejected_budget
+        return {
+            "models": models,
+            "top_clients_today": [
+                {"client_id": client_id, **usage, "cost": round(usage["cost"], 6)}
+                for client_id, usage in clients
+            ],
+            "default_daily_budget": self.default_budget or None,
+            "budget_clients_today": budget_clients,
+            "rejected_budget": rejected_budget
+        }
+
+# Instance globale du suivi de consommation
+usage_tracker = UsageTracker(
+    default_budget=settings.CLIENT_DAILY_TOKEN_BUDGET,
+    budgets=parse_budgets(settings.CLIENT_TOKEN_BUDGETS)
+)
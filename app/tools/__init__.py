@@ -12,6 +12,8 @@ from .rh_helpers import (
     format_rh_advice,
     extract_keywords
 )
+from .retrieval import retrieve_articles, RetrievalResult
+from .text_utils import collapse_whitespace, normalize_text, strip_accents
 
 __all__ = [
     "create_system_prompt",
@@ -19,5 +21,10 @@ __all__ = [
     "validate_message",
     "get_rh_context",
     "format_rh_advice",
-    "extract_keywords"
+    "extract_keywords",
+    "retrieve_articles",
+    "RetrievalResult",
+    "collapse_whitespace",
+    "normalize_text",
+    "strip_accents"
 ]
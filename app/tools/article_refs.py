@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Références d'articles citées dans les questions ("article L.148", "L 148")
+
+Les numéros sont ramenés à une clé canonique ("Art.L.148" -> "l148",
+"L.148-2" -> "l148-2"). La même règle est calculée par PostgreSQL dans la
+colonne générée public.article.num_key (voir schema.py) : une question qui
+cite un article est servie par une recherche exacte sur un index.
+"""
+
+import re
+from typing import List, Optional
+
+from app.tools.text_utils import strip_accents
+
+# Nombre maximum de références retenues par question
+MAX_REFS = 10
+
+# Préfixes de numérotation du Code du travail (législatif, réglementaire, décret)
+ARTICLE_PREFIXES = ("l", "r", "d")
+
+# Étapes de la clé canonique, identiques à l'expression SQL de num_key
+_DIGIT_SEPARATOR_RE = re.compile(r"([0-9])[^a-z0-9]+(?=[0-9])")
+_NON_KEY_RE = re.compile(r"[^a-z0-9-]")
+_ART_PREFIX_RE = re.compile(r"^art(icle)?")
+
+_NUMBER = r"(\d+(?:[.\-/]\d+)*)(?:\s*(bis|ter|quater)\b)?"
+_ITEM = r"(?:[lrd]\s*\.?\s*)?\d+(?:[.\-/]\d+)*(?:\s*(?:bis|ter|quater)\b)?"
+# "article 148", "art. L 148", "articles L.148 et L.149"
+_EXPLICIT_RE = re.compile(
+    r"\b(?:articles?|art)\b\.?\s*(" + _ITEM + r"(?:\s*(?:,|et|ou)\s*" + _ITEM + r")*)"
+)
+# "L.148", "l148" sans le mot article : le préfixe est alors obligatoire
+_PREFIXED_RE = re.compile(r"\b([lrd])(?:\s*\.\s*|\s?)" + _NUMBER)
+_ITEM_RE = re.compile(r"(?:\b([lrd])\s*\.?\s*)?" + _NUMBER)
+
+def article_ref_key(num_article: Optional[str]) -> Optional[str]:
+    """
+    Clé canonique d'un numéro d'article ("Art.L.148" -> "l148")
+
+    Args:
+        num_article: Numéro d'article tel que stocké ou cité
+
+    Returns:
+        La clé canonique ou None
+    """
+    if not num_article:
+        return None
+    key = _DIGIT_SEPARATOR_RE.sub(r"\1-", num_article.lower())
+    key = _ART_PREFIX_RE.sub("", _NON_KEY_RE.sub("", key))
+    return key or None
+
+def _item_key(prefix: Optional[str], number: str, suffix: Optional[str]) -> str:
+    return article_ref_key(f"{prefix or ''}{number}{suffix or ''}")
+
+def parse_article_refs(message: str) -> List[str]:
+    """
+    Extrait les références d'articles citées dans un message
+
+    Args:
+        message: Le message de l'utilisateur
+
+    Returns:
+        Les clés canoniques, dans l'ordre de la question et sans doublons.
+        Un numéro cité sans préfixe ("article 148") donne la clé "148".
+    """
+    text = strip_accents(message.lower())
+    found = []
+    for match in _EXPLICIT_RE.finditer(text):
+        for prefix, number, suffix in _ITEM_RE.findall(match.group(1)):
+            found.append((match.start(), _item_key(prefix, number, suffix)))
+    for match in _PREFIXED_RE.finditer(text):
+        found.append((match.start(), _item_key(*match.groups())))
+
+    keys = []
+    for _, key in sorted(found, key=lambda item: item[0]):
+        if key and key not in keys:
+            keys.append(key)
+    return keys[:MAX_REFS]
+
+def expand_ref_keys(keys: List[str]) -> List[str]:
+    """
+    Clés à rechercher : un numéro sans préfixe peut désigner L., R. ou D.
+
+    Args:
+        keys: Clés canoniques extraites du message
+
+    Returns:
+        Les clés, complétées des variantes préfixées des numéros nus
+    """
+    expanded = []
+    for key in keys:
+        candidates = [key]
+        if key[0].isdigit():
+            candidates += [prefix + key for prefix in ARTICLE_PREFIXES]
+        for candidate in candidates:
+            if candidate not in expanded:
+                expanded.append(candidate)
+    return expanded
@@ -5,13 +5,37 @@ Fonctions utilitaires pour le chat
 
 from typing import Optional
 
-def create_system_prompt(context: Optional[str] = None, articles: Optional[list] = None) -> str:
+def _article_text(article, passages: Optional[list]) -> str:
+    """Contenu de l'article, ou ses seuls passages retenus marqués par [...]"""
+    text = article.contenu or ""
+    if not passages:
+        return text
+    parts = []
+    previous_end = 0
+    for passage in passages:
+        if passage.start_offset > previous_end:
+            parts.append(" [...] " if previous_end else "[...] ")
+        # Les passages qui se chevauchent ne répètent pas le texte commun
+        start = max(passage.start_offset, previous_end)
+        parts.append(text[start:passage.end_offset] if text else passage.contenu)
+        previous_end = max(previous_end, passage.end_offset)
+    if previous_end < len(text):
+        parts.append(" [...]")
+    return "".join(parts)
+
+def create_system_prompt(
+    context: Optional[str] = None,
+    articles: Optional[list] = None,
+    passages: Optional[list] = None
+) -> str:
     """
     Crée un prompt système pour l'assistant IA
     
     Args:
         context: Contexte additionnel à inclure dans le prompt
-        articles: Liste d'articles du Code du travail à utiliser
+        articles: Liste d'articles (Article) du Code du travail à utiliser
+        passages: Passages retenus des articles (Passage) ; si fournis, seuls
+            ces extraits sont inclus à la place du contenu complet
     
     Returns:
         Le prompt système formaté
@@ -25,35 +49,48 @@ IMPORTANT : Tu dois te baser UNIQUEMENT sur les articles du Code du travail four
 Si un article n'est pas fourni, indique que tu n'as pas cette information dans ta base de données.
 Ne donne JAMAIS d'informations générales qui ne sont pas basées sur les articles fournis."""
     
-    if articles and len(articles) > 0:
-        base_prompt += "\n\n=== ARTICLES DU CODE DU TRAVAIL À UTILISER ===\n"
+    # Les morceaux sont assemblés en une seule fois pour éviter de recopier
+    # le prompt (et le contenu des articles) à chaque concaténation
+    parts = [base_prompt]
+    passages_by_article = {}
+    for passage in passages or []:
+        passages_by_article.setdefault(passage.article_id, []).append(passage)
+    if articles:
+        parts.append("\n\n=== ARTICLES DU CODE DU TRAVAIL À UTILISER ===\n")
         for i, article in enumerate(articles, 1):
-            base_prompt += f"\nArticle {i} - {article.get('num_article', 'N/A')} ({article.get('source', 'Code du travail')}):\n"
-            base_prompt += f"{article.get('contenu', '')}\n"
-        base_prompt += "\n=== FIN DES ARTICLES ===\n"
-        base_prompt += "\nINSTRUCTION CRITIQUE : Réponds UNIQUEMENT en te basant sur les articles ci-dessus. "
-        base_prompt += "Cite les numéros d'articles lorsque c'est pertinent. "
-        base_prompt += "Si la question ne peut pas être répondue avec ces articles, dis-le clairement."
+            parts.append(
+                f"\nArticle {i} - {article.num_article or 'N/A'} ({article.source or 'Code du travail'}):\n"
+            )
+            parts.append(_article_text(article, passages_by_article.get(article.article_id)))
+            parts.append("\n")
+        parts.append("\n=== FIN DES ARTICLES ===\n")
+        parts.append("\nINSTRUCTION CRITIQUE : Réponds UNIQUEMENT en te basant sur les articles ci-dessus. ")
+        parts.append("Cite les numéros d'articles lorsque c'est pertinent. ")
+        if passages_by_article:
+            parts.append("Les marques [...] signalent des extraits : ne suppose rien du texte omis. ")
+        parts.append("Si la question ne peut pas être répondue avec ces articles, dis-le clairement.")
     
     if context:
-        base_prompt += f"\n\nContexte additionnel: {context}"
+        parts.append(f"\n\nContexte additionnel: {context}")
     
-    return base_prompt
+    return "".join(parts)
 
-def format_chat_response(response: str, model: str) -> dict:
+def format_chat_response(response: str, model: str, usage: Optional[dict] = None) -> dict:
     """
     Formate la réponse du chat
     
     Args:
         response: La réponse générée par le modèle
         model: Le modèle utilisé
+        usage: Tokens consommés et coût de l'appel (optionnel)
     
     Returns:
         Un dictionnaire formaté avec la réponse
     """
     return {
         "response": response,
-        "model": model
+        "model": model,
+        "usage": usage
     }
 
 def validate_message(message: str) -> tuple[bool, Optional[str]]:
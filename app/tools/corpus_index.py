@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Index en mémoire du corpus (BM25)
+
+Les articles sont lus une fois (curseur côté serveur) et leurs termes
+normalisés (voir text_utils.tokenize) rangés dans des listes de
+postings : une recherche ne touche que les articles qui contiennent au
+moins un terme de la question, sans aller-retour vers PostgreSQL.
+"""
+
+import math
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from app.db import iter_articles
+from app.tools.text_utils import tokenize
+
+# Paramètres BM25 usuels (saturation des fréquences, normalisation de longueur)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+def bm25_weight(count: int, document_frequency: int, total: int, length: int, average_length: float) -> float:
+    """
+    Contribution BM25 d'un terme au score d'un article
+
+    Args:
+        count: Fréquence du terme dans l'article
+        document_frequency: Nombre d'articles contenant le terme
+        total: Nombre d'articles indexés
+        length: Nombre de termes de l'article
+        average_length: Nombre moyen de termes par article
+
+    Returns:
+        Le poids du terme
+    """
+    idf = math.log(1 + (total - document_frequency + 0.5) / (document_frequency + 0.5))
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+    return idf * count * (BM25_K1 + 1) / (count + norm)
+
+class CorpusIndex:
+    """Index inversé des articles, classement BM25"""
+
+    def __init__(self):
+        self.articles: List = []
+        # Terme -> liste de (position de l'article, fréquence du terme)
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        # Nombre de termes de chaque article (normalisation de longueur)
+        self.lengths: List[int] = []
+        self.average_length = 0.0
+        self._total_length = 0
+        self.built_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self.articles)
+
+    def add(self, article) -> None:
+        """
+        Ajoute un article à l'index
+
+        Args:
+            article: L'article (Article) avec son contenu
+        """
+        position = len(self.articles)
+        terms = Counter(tokenize(f"{article.num_article or ''} {article.contenu or ''}"))
+        self.articles.append(article)
+        self.lengths.append(sum(terms.values()))
+        for term, count in terms.items():
+            self.postings.setdefault(term, []).append((position, count))
+        self._total_length += self.lengths[-1]
+        self.average_length = self._total_length / len(self.lengths)
+
+    def search(self, message: str, limit: int = 10, source: Optional[str] = None) -> List:
+        """
+        Recherche les articles les plus proches d'une question
+
+        Args:
+            message: La question
+            limit: Nombre maximum d'articles
+            source: Restreint la recherche à une source (optionnel)
+
+        Returns:
+            Les articles, du plus au moins pertinent
+        """
+        total = len(self.articles)
+        if not total:
+            return []
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(message)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            for position, count in postings:
+                weight = bm25_weight(count, len(postings), total, self.lengths[position], self.average_length)
+                scores[position] = scores.get(position, 0.0) + weight
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        results = []
+        for position, _ in ranked:
+            article = self.articles[position]
+            if source is None or article.source == source:
+                results.append(article)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def stats(self) -> Dict:
+        """Statistiques de l'index"""
+        return {
+            "articles": len(self.articles),
+            "terms": len(self.postings),
+            "postings": sum(len(postings) for postings in self.postings.values()),
+            "age_seconds": round(time.time() - self.built_at, 1)
+        }
+
+def build_corpus_index(source: Optional[str] = None) -> CorpusIndex:
+    """
+    Construit l'index à partir des articles en base
+
+    Args:
+        source: Restreint l'index à une source (tout le corpus par défaut)
+
+    Returns:
+        Le nouvel index
+    """
+    index = CorpusIndex()
+    for article in iter_articles(source=source):
+        index.add(article)
+    return index
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Correction orthographique des questions avant la recherche d'articles
+
+Index de type SymSpell : chaque mot du vocabulaire (titres et descriptions
+des sujets, synonymes connus, vocabulaire du corpus) est enregistré avec
+ses variantes obtenues par suppression de caractères. Un mot inconnu de
+la question est corrigé en ne générant que ses propres suppressions, puis
+en vérifiant la distance d'édition des quelques candidats : la correction
+d'une question prend moins d'une milliseconde, sans liste de fautes
+maintenue à la main.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from itertools import combinations
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.db import get_all_sujets, iter_articles, register_refresh_hook
+from app.tools.retrieval import KEYWORD_TO_SUJET
+from app.tools.rh_helpers import RH_CATEGORY_KEYWORDS, SUJET_SYNONYMS
+from app.tools.text_utils import STOPWORDS, strip_accents
+
+logger = logging.getLogger(__name__)
+
+# Longueur du préfixe indexé (compromis mémoire / rappel, cf. SymSpell)
+PREFIX_LENGTH = 7
+
+# Poids des mots des sujets et synonymes face au vocabulaire du corpus
+PRIORITY_COUNT = 1_000_000
+
+# Délai avant nouvelle tentative si la base était indisponible (secondes)
+RETRY_INCOMPLETE_AFTER = 60
+
+_WORD_RE = re.compile(r"[^\W\d_]+")
+
+def max_edit_distance(length: int) -> int:
+    """
+    Distance d'édition tolérée selon la longueur du mot
+
+    Args:
+        length: Nombre de caractères du mot
+
+    Returns:
+        0 pour les mots courts (jamais corrigés), 1 jusqu'à 8 caractères, puis 2
+    """
+    if length < settings.FUZZY_MIN_WORD_LENGTH:
+        return 0
+    return 1 if length <= 8 else 2
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Distance de Damerau-Levenshtein restreinte (transpositions adjacentes)
+
+    Args:
+        a: Premier mot
+        b: Second mot
+        limit: Distance maximale utile
+
+    Returns:
+        La distance, ou limit + 1 dès qu'elle dépasse la limite
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+def _deletes(word: str, distance: int) -> Set[str]:
+    """Variantes d'un mot obtenues en supprimant jusqu'à `distance` caractères"""
+    word = word[:PREFIX_LENGTH]
+    variants = {word}
+    for count in range(1, min(distance, len(word)) + 1):
+        for positions in combinations(range(len(word)), count):
+            variants.add("".join(c for i, c in enumerate(word) if i not in positions))
+    return variants
+
+class FuzzyIndex:
+    """Dictionnaire de suppressions (SymSpell) sur un vocabulaire normalisé"""
+
+    def __init__(self, max_distance: int = 2):
+        self.max_distance = max_distance
+        # Mot normalisé -> (fréquence, forme d'origine la plus fréquente)
+        self._words: Dict[str, Tuple[int, str]] = {}
+        self._deletes: Dict[str, List[str]] = {}
+        self.complete = True
+        self.built_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._words
+
+    def add(self, surface: str, count: int = 1) -> None:
+        """
+        Ajoute un mot au vocabulaire
+
+        Args:
+            surface: Le mot tel qu'il apparaît (minuscules, accents conservés)
+            count: Nombre d'occurrences (ou poids de priorité)
+        """
+        word = strip_accents(surface)
+        known = self._words.get(word)
+        if known is None:
+            self._words[word] = (count, surface)
+            for variant in _deletes(word, self.max_distance):
+                self._deletes.setdefault(variant, []).append(word)
+        elif count > known[0]:
+            self._words[word] = (count, surface)
+
+    def lookup(self, token: str) -> Optional[str]:
+        """
+        Corrige un mot inconnu
+
+        Args:
+            token: Mot normalisé (minuscules, sans accents)
+
+        Returns:
+            La forme d'origine du meilleur candidat, ou None (mot connu,
+            trop court, ou sans candidat assez proche)
+        """
+        if token in self._words:
+            return None
+        limit = min(max_edit_distance(len(token)), self.max_distance)
+        if limit == 0:
+            return None
+        best = None
+        seen = set()
+        for variant in _deletes(token, limit):
+            for word in self._deletes.get(variant, ()):
+                if word in seen:
+                    continue
+                seen.add(word)
+                distance = edit_distance(token, word, limit)
+                if distance > limit:
+                    continue
+                count, surface = self._words[word]
+                rank = (distance, -count)
+                if best is None or rank < best[0]:
+                    best = (rank, surface)
+        return best[1] if best else None
+
+    def correct(self, message: str) -> str:
+        """
+        Corrige les mots inconnus d'un message
+
+        Args:
+            message: Le message de l'utilisateur
+
+        Returns:
+            Le message en minuscules, mots mal orthographiés remplacés
+        """
+        text = message.lower()
+
+        def replace(match) -> str:
+            word = match.group(0)
+            token = strip_accents(word)
+            if token in STOPWORDS:
+                return word
+            return self.lookup(token) or word
+
+        return _WORD_RE.sub(replace, text)
+
+    def stats(self) -> Dict:
+        """Statistiques de l'index"""
+        return {
+            "words": len(self._words),
+            "deletes": len(self._deletes),
+            "complete": self.complete,
+            "age_seconds": round(time.time() - self.built_at, 1)
+        }
+
+def _surface_words(text: Optional[str]) -> List[str]:
+    return [word for word in _WORD_RE.findall((text or "").lower()) if len(word) > 2]
+
+def build_fuzzy_index() -> FuzzyIndex:
+    """
+    Construit l'index : sujets et synonymes d'abord, puis vocabulaire du corpus
+
+    Returns:
+        Le nouvel index
+    """
+    index = FuzzyIndex()
+    sujets = get_all_sujets()
+    priority = set(SUJET_SYNONYMS) | set(KEYWORD_TO_SUJET) | set(SUJET_SYNONYMS.values())
+    for words in RH_CATEGORY_KEYWORDS.values():
+        priority.update(words)
+    for sujet in sujets:
+        priority.update(_surface_words(sujet.titre_sujet))
+        priority.update(_surface_words(sujet.description))
+    for word in priority:
+        for part in _surface_words(word):
+            index.add(part, PRIORITY_COUNT)
+
+    # Vocabulaire du corpus, parcouru par curseur côté serveur
+    counts: Counter = Counter()
+    for article in iter_articles():
+        counts.update(_surface_words(article.contenu))
+    for word, count in counts.most_common(settings.FUZZY_MAX_VOCABULARY):
+        index.add(word, count)
+
+    # Base indisponible : l'index sera reconstruit plus tard
+    index.complete = bool(sujets)
+    return index
+
+_index: Optional[FuzzyIndex] = None
+_build_lock = threading.Lock()
+_building = False
+# Positionné à la fin de la première construction (réussie ou non)
+_first_build_done = threading.Event()
+
+def _build_in_background() -> None:
+    global _index, _building
+    try:
+        _index = build_fuzzy_index()
+    except Exception as e:
+        logger.error("Erreur lors de la construction de l'index de correction: %s", e)
+    finally:
+        _building = False
+        _first_build_done.set()
+
+def get_fuzzy_index() -> Optional[FuzzyIndex]:
+    """
+    Retourne l'index courant, et lance sa (re)construction si nécessaire
+
+    La construction se fait en arrière-plan : tant qu'elle n'est pas
+    terminée, les messages ne sont pas corrigés.
+
+    Returns:
+        L'index, ou None s'il n'est pas encore construit
+    """
+    global _building
+    index = _index
+    stale = index is None or (
+        not index.complete and time.time() - index.built_at > RETRY_INCOMPLETE_AFTER
+    )
+    if stale and not _building:
+        with _build_lock:
+            if not _building:
+                _building = True
+                threading.Thread(target=_build_in_background, name="fuzzy-index", daemon=True).start()
+    return index
+
+def wait_for_fuzzy_index(timeout: float) -> Optional[FuzzyIndex]:
+    """
+    Attend la fin de la première construction de l'index
+
+    Args:
+        timeout: Attente maximale (secondes)
+
+    Returns:
+        L'index, ou None (correction désactivée, échec ou délai dépassé)
+    """
+    if not settings.FUZZY_ENABLED:
+        return None
+    get_fuzzy_index()
+    _first_build_done.wait(timeout)
+    return _index
+
+def correct_message(message: str) -> str:
+    """
+    Corrige l'orthographe d'un message avant la recherche d'articles
+
+    Args:
+        message: Le message de l'utilisateur
+
+    Returns:
+        Le message corrigé (inchangé si la correction est désactivée ou
+        si l'index n'est pas encore prêt)
+    """
+    if not settings.FUZZY_ENABLED:
+        return message
+    index = get_fuzzy_index()
+    return index.correct(message) if index else message
+
+@register_refresh_hook
+def _rebuild_on_corpus_change(sujet_ids) -> None:
+    # Reconstruction complète : le vocabulaire de tout sujet peut changer
+    global _index
+    if _index is not None:
+        _index.complete = False
+        _index.built_at = 0
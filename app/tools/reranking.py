@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Reclassement lexical des articles candidats avant la construction du prompt
+
+Chaque candidat reçoit un score de pertinence (recouvrement pondéré des
+termes de la question, mention explicite de son numéro, appartenance au
+sujet identifié). Les articles sous le seuil sont écartés puis la
+sélection finale est diversifiée par MMR (maximal marginal relevance) :
+moins d'articles, mais plus utiles et moins redondants.
+"""
+
+import math
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.tools.article_refs import article_ref_key, expand_ref_keys, parse_article_refs
+from app.tools.text_utils import tokenize
+
+# Bonus de score
+ARTICLE_NUMBER_BONUS = 1.0
+SUJET_MATCH_BONUS = 0.2
+
+# Nombre d'articles conservés si aucun candidat n'atteint le seuil
+FALLBACK_COUNT = 3
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def _score(question: str, articles: List, sujet=None) -> Tuple[List[float], List[Set[str]]]:
+    query_terms = set(tokenize(question))
+    mentions = set(expand_ref_keys(parse_article_refs(question)))
+    term_sets = [set(tokenize(article.contenu or "")) for article in articles]
+
+    # Poids de type IDF calculés sur l'ensemble des candidats : un terme
+    # présent dans tous les articles du sujet ne discrimine rien
+    count = len(articles)
+    weights: Dict[str, float] = {}
+    for term in query_terms:
+        df = sum(1 for terms in term_sets if term in terms)
+        weights[term] = math.log(1 + count / (1 + df)) if df else math.log(1 + count)
+    total_weight = sum(weights.values()) or 1.0
+
+    scores = []
+    for article, terms in zip(articles, term_sets):
+        score = sum(weights[term] for term in query_terms & terms) / total_weight
+        key = article_ref_key(article.num_article)
+        if key and key in mentions:
+            score += ARTICLE_NUMBER_BONUS
+        if sujet is not None and article.id_sujet == sujet.id:
+            score += SUJET_MATCH_BONUS
+        scores.append(score)
+    return scores, term_sets
+
+def score_articles(question: str, articles: List, sujet=None) -> List[float]:
+    """
+    Calcule le score de pertinence de chaque candidat
+
+    Args:
+        question: La question de l'utilisateur
+        articles: Les articles candidats
+        sujet: Le sujet identifié pour la question (optionnel)
+
+    Returns:
+        Les scores, dans l'ordre des articles
+    """
+    return _score(question, articles, sujet)[0]
+
+def rerank_articles(
+    question: str,
+    articles: List,
+    sujet=None,
+    top_k: Optional[int] = None,
+    min_score: Optional[float] = None,
+    mmr_lambda: Optional[float] = None
+) -> List:
+    """
+    Reclasse et filtre les articles candidats pour une question
+
+    Args:
+        question: La question de l'utilisateur
+        articles: Les articles candidats (ordre quelconque)
+        sujet: Le sujet identifié pour la question (optionnel)
+        top_k: Nombre maximum d'articles retenus
+        min_score: Score minimum (hors bonus de sujet) pour être retenu
+        mmr_lambda: Compromis pertinence / diversité (1 = pertinence seule)
+
+    Returns:
+        Les articles retenus, du plus au moins pertinent
+    """
+    if not articles:
+        return []
+    top_k = top_k or settings.RERANK_TOP_K
+    min_score = settings.RERANK_MIN_SCORE if min_score is None else min_score
+    mmr_lambda = settings.RERANK_MMR_LAMBDA if mmr_lambda is None else mmr_lambda
+
+    scores, term_sets = _score(question, articles, sujet)
+    def relevance(i: int) -> float:
+        # Le seuil porte sur la pertinence propre de l'article, hors bonus de sujet
+        in_sujet = sujet is not None and articles[i].id_sujet == sujet.id
+        return scores[i] - (SUJET_MATCH_BONUS if in_sujet else 0.0)
+
+    candidates = [i for i in range(len(articles)) if relevance(i) >= min_score]
+    if not candidates:
+        # Question trop générale : on garde les meilleurs plutôt que rien
+        candidates = sorted(range(len(articles)), key=lambda i: -scores[i])[:FALLBACK_COUNT]
+
+    best = max(scores[i] for i in candidates) or 1.0
+
+    selected: List[int] = []
+    remaining = sorted(candidates, key=lambda i: -scores[i])
+    while remaining and len(selected) < top_k:
+        def mmr(i: int) -> float:
+            redundancy = max((_jaccard(term_sets[i], term_sets[j]) for j in selected), default=0.0)
+            return mmr_lambda * scores[i] / best - (1 - mmr_lambda) * redundancy
+        chosen = max(remaining, key=mmr)
+        selected.append(chosen)
+        remaining.remove(chosen)
+
+    return [articles[i] for i in selected]
+
+def select_passages(
+    question: str,
+    articles: List,
+    passages_by_article: Dict[int, List],
+    per_article: Optional[int] = None
+) -> List:
+    """
+    Retient les passages les plus pertinents de chaque article sélectionné
+
+    Chaque article garde au moins un passage (sa citation reste donc
+    disponible dans le prompt) ; les passages retenus sont remis dans
+    l'ordre du texte.
+
+    Args:
+        question: La question de l'utilisateur
+        articles: Les articles retenus, dans l'ordre de pertinence
+        passages_by_article: Dictionnaire article_id -> passages
+        per_article: Nombre maximum de passages par article
+
+    Returns:
+        Les passages retenus, groupés par article dans l'ordre des articles
+    """
+    per_article = per_article or settings.PASSAGES_PER_ARTICLE
+    pool = [passage for article in articles for passage in passages_by_article.get(article.article_id, [])]
+    if not pool:
+        return []
+    # Le poids des termes est calculé sur l'ensemble des passages candidats
+    scores = dict(zip(((p.article_id, p.position) for p in pool), score_articles(question, pool)))
+
+    selected = []
+    for article in articles:
+        passages = passages_by_article.get(article.article_id, [])
+        best = sorted(passages, key=lambda p: (-scores[(p.article_id, p.position)], p.position))
+        selected.extend(sorted(best[:per_article], key=lambda p: p.position))
+    return selected
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Recherche des articles pertinents pour une question (retrieval)
+
+Une question qui cite des articles ("article L.148") est servie par une
+recherche exacte sur leur numéro, sans heuristique de sujet. Sinon,
+cascade historique de /chat : sujet identifié par les mots-clés, puis
+mots-clés connus ou titres de sujets présents dans le message, puis
+recherche plein texte par mot. Les candidats sont ensuite reclassés
+(voir reranking), réduits à leurs passages pertinents et les résultats
+mis en cache par source et message normalisé. Un filtre de source est
+appliqué dans chaque requête SQL.
+
+Si l'index partagé entre workers est publié (voir shared_index), les
+sujets sont servis par sa projection en mémoire, sans requête SQL. La
+recherche par mots ne passe à BM25 sur cette projection qu'avec
+SHARED_INDEX_WORD_SEARCH=True : sinon elle reste la recherche LIKE.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from app.config import settings
+from app.db import (
+    get_all_sujets,
+    get_articles_by_num_keys,
+    get_articles_by_sujet,
+    get_passages,
+    normalize_source,
+    search_articles,
+    register_refresh_hook
+)
+from app.tools.article_refs import expand_ref_keys, parse_article_refs
+from app.tools.reranking import rerank_articles, select_passages
+from app.tools.shared_index import get_shared_index
+from app.tools.stage_graph import run_concurrently
+from app.tools.text_utils import collapse_whitespace
+
+# Nombre maximum d'articles transmis au prompt sans reclassement
+MAX_ARTICLES = 10
+
+# Nombre maximum de candidats issus de la recherche par mots
+MAX_WORD_CANDIDATES = 25
+
+# Mapping direct des mots-clés vers les sujets
+KEYWORD_TO_SUJET = {
+    "congé": "Congés",
+    "congés": "Congés",
+    "conges": "Congés",  # Sans accent
+    "transport": "Transport"
+}
+
+class RetrievalResult:
+    """Résultat de la recherche d'articles pour un message"""
+
+    __slots__ = ("articles", "sujet", "passages", "cache_hit")
+
+    def __init__(self, articles: List, sujet=None, passages: Optional[List] = None, cache_hit: bool = False):
+        self.articles = articles
+        self.sujet = sujet
+        # Extraits des articles à transmettre au prompt (None : contenu complet)
+        self.passages = passages
+        self.cache_hit = cache_hit
+
+class RetrievalCache:
+    """Cache LRU (nombre d'entrées) (source, message) -> articles retenus"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[Optional[str], str], Tuple[object, Tuple, Optional[Tuple]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[Optional[str], str]) -> Optional[RetrievalResult]:
+        """Retourne le résultat en cache pour une clé, ou None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        sujet, articles, passages = entry
+        passages = list(passages) if passages is not None else None
+        return RetrievalResult(list(articles), sujet, passages, cache_hit=True)
+
+    def put(self, key: Tuple[Optional[str], str], result: RetrievalResult) -> None:
+        """Met en cache le résultat d'une recherche"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            passages = tuple(result.passages) if result.passages is not None else None
+            self._entries[key] = (result.sujet, tuple(result.articles), passages)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Vide le cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Statistiques du cache"""
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+# Instance globale du cache de recherche
+retrieval_cache = RetrievalCache(settings.RETRIEVAL_CACHE_SIZE)
+
+@register_refresh_hook
+def _clear_on_corpus_change(sujet_ids) -> None:
+    retrieval_cache.clear()
+
+def _find_sujet(message: str, keywords: List[str], sujets: List):
+    """
+    Identifie le sujet de la question (étapes 1 et 2 de la cascade)
+
+    Args:
+        message: Le message de l'utilisateur
+        keywords: Les mots-clés extraits du message
+        sujets: Les sujets candidats, déjà restreints à la source demandée
+
+    Returns:
+        Le sujet identifié, ou None
+    """
+    # Étape 1 : Chercher par sujet dans les keywords
+    for keyword in keywords:
+        for sujet in sujets:
+            if keyword.lower() in sujet.titre_sujet.lower() or str(sujet.id) == keyword:
+                return sujet
+
+    # Étape 2 : Si pas de sujet trouvé, chercher dans le message directement
+    message_lower = message.lower()
+    for keyword, sujet_nom in KEYWORD_TO_SUJET.items():
+        if keyword in message_lower:
+            for sujet in sujets:
+                if sujet.titre_sujet == sujet_nom:
+                    return sujet
+
+    # Si toujours pas trouvé, chercher par titre de sujet
+    for sujet in sujets:
+        titre_lower = sujet.titre_sujet.lower()
+        # Vérifier si le titre complet est dans le message
+        if titre_lower in message_lower:
+            return sujet
+        # Vérifier si des mots du titre sont dans le message
+        if any(word in message_lower for word in titre_lower.split() if len(word) > 3):
+            return sujet
+    return None
+
+def search_by_words(message: str, source: Optional[str] = None) -> List:
+    """
+    Étape 3 : recherche par mot-clé dans le contenu des articles
+
+    Args:
+        message: Message de l'utilisateur
+        source: Restreindre à cette source (toutes si None)
+
+    Returns:
+        Les articles trouvés (sans doublon)
+    """
+    articles = []
+    existing_ids = set()
+    # Extraire les mots importants du message (mots de 5+ caractères)
+    words = [w for w in message.lower().split() if len(w) > 4]
+    # Une requête par mot (5 au plus), envoyées en parallèle
+    found = run_concurrently([
+        lambda word=word: search_articles(word, limit=5, source=source) for word in words[:5]
+    ])
+    for word_articles in found:
+        for article in word_articles:
+            # Éviter les doublons
+            if article.article_id not in existing_ids:
+                existing_ids.add(article.article_id)
+                articles.append(article)
+        if len(articles) >= MAX_WORD_CANDIDATES:
+            break
+    return articles
+
+def retrieve_articles(
+    message: str,
+    keywords: List[str],
+    use_cache: bool = True,
+    source: Optional[str] = None
+) -> RetrievalResult:
+    """
+    Recherche les articles pertinents pour un message
+
+    Args:
+        message: Le message de l'utilisateur
+        keywords: Les mots-clés extraits du message
+        use_cache: Utilise le cache de recherche par message
+        source: Restreint la recherche à une source ("Code du travail 1997"...)
+
+    Returns:
+        Le résultat (articles, sujet identifié, passages, indicateur de cache)
+    """
+    source = normalize_source(source)
+    # Message exact : la recherche est sensible aux accents et à la ponctuation
+    cache_key = (source, collapse_whitespace(message))
+    if use_cache:
+        cached = retrieval_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    refs = parse_article_refs(message)
+    if refs:
+        # Articles cités explicitement : exactement ceux-là, contenu complet
+        articles = get_articles_by_num_keys(expand_ref_keys(refs), source)
+        if articles:
+            result = RetrievalResult(articles[:MAX_ARTICLES])
+            if use_cache:
+                retrieval_cache.put(cache_key, result)
+            return result
+
+    shared_index = get_shared_index()
+    # Seuls les sujets ayant des articles dans la source sont candidats
+    sujets = shared_index.sujets(source) if shared_index else get_all_sujets(source)
+    sujet = _find_sujet(message, keywords, sujets)
+    articles = get_articles_by_sujet(sujet.id, source) if sujet else []
+    if not articles:
+        if shared_index and settings.SHARED_INDEX_WORD_SEARCH:
+            articles = shared_index.search(message, MAX_WORD_CANDIDATES, source)
+        else:
+            articles = search_by_words(message, source)
+
+    if settings.RERANK_ENABLED:
+        # Les candidats les plus pertinents et les moins redondants
+        articles = rerank_articles(message, articles, sujet)
+    else:
+        # Limiter à 10 articles maximum pour éviter un contexte trop long
+        articles = articles[:MAX_ARTICLES]
+    passages = None
+    if settings.PASSAGES_ENABLED and articles:
+        # Seuls les passages utiles des articles longs iront dans le prompt
+        passages = select_passages(message, articles, get_passages(articles))
+    result = RetrievalResult(articles, sujet, passages)
+    if use_cache and result.articles:
+        retrieval_cache.put(cache_key, result)
+    return result
@@ -3,8 +3,34 @@
 Fonctions d'aide pour la gestion RH
 """
 
+import logging
 from typing import Dict, List, Optional
 
+logger = logging.getLogger(__name__)
+
+# Mapping des mots-clés vers les titres de sujets (utilisé même si PostgreSQL
+# n'est pas disponible). Les fautes de frappe sont corrigées en amont par
+# l'index de correction (fuzzy_index), pas listées ici.
+SUJET_SYNONYMS = {
+    "congé": "Congés",
+    "congés": "Congés",
+    "vacances": "Congés",
+    "repos": "Congés",
+    "transport": "Transport",
+    "déplacement": "Transport",
+    "frais": "Transport",
+    "trajet": "Transport"
+}
+
+# Catégories génériques utilisées si aucun sujet n'est identifié
+RH_CATEGORY_KEYWORDS = {
+    "prime": ["prime", "primes", "bonus", "gratification"],
+    "droit": ["droit", "loi", "code", "légal", "conformité"],
+    "performance": ["performance", "évaluation", "objectif", "résultat"],
+    "formation": ["formation", "apprentissage", "compétence", "développement"],
+    "contrat": ["contrat", "embauche", "recrutement", "candidat"]
+}
+
 def get_rh_context(topic: Optional[str] = None) -> str:
     """
     Retourne le contexte RH selon le sujet depuis PostgreSQL
@@ -16,10 +42,11 @@ def get_rh_context(topic: Optional[str] = None) -> str:
         Le contexte RH formaté avec les données de la base
     """
     try:
-        from app.db import get_all_sujets, get_sujet_by_id, get_articles_by_sujet
+        from app.db import get_sujets_with_counts
         
-        # Récupérer tous les sujets disponibles
-        sujets = get_all_sujets()
+        # Récupérer tous les sujets disponibles, et le nombre d'articles des
+        # sujets du thème, en un seul aller-retour
+        sujets, counts = get_sujets_with_counts(topic)
         
         if not sujets:
             # Fallback si PostgreSQL n'est pas disponible
@@ -36,19 +63,18 @@ Domaines d'expertise:
         # Construire le contexte avec les sujets de la base
         context = "Domaines d'expertise disponibles dans la base de données:\n"
         for sujet in sujets:
-            context += f"- {sujet['titre_sujet']}: {sujet['description']}\n"
+            context += f"- {sujet.titre_sujet}: {sujet.description}\n"
         
         # Si un topic spécifique est fourni, essayer de trouver le sujet correspondant
         if topic:
             # Essayer de trouver par ID
             try:
                 sujet_id = int(topic)
-                sujet = get_sujet_by_id(sujet_id)
+                sujet = next((s for s in sujets if s.id == sujet_id), None)
                 if sujet:
-                    articles = get_articles_by_sujet(sujet_id)
-                    context += f"\nFocus sur: {sujet['titre_sujet']}\n"
-                    context += f"Description: {sujet['description']}\n"
-                    context += f"Nombre d'articles disponibles: {len(articles)}\n"
+                    context += f"\nFocus sur: {sujet.titre_sujet}\n"
+                    context += f"Description: {sujet.description}\n"
+                    context += f"Nombre d'articles disponibles: {counts.get(sujet.id, 0)}\n"
                     return context
             except ValueError:
                 pass
@@ -56,17 +82,16 @@ Domaines d'expertise:
             # Chercher par titre de sujet
             topic_lower = topic.lower()
             for sujet in sujets:
-                if topic_lower in sujet['titre_sujet'].lower():
-                    articles = get_articles_by_sujet(sujet['id'])
-                    context += f"\nFocus sur: {sujet['titre_sujet']}\n"
-                    context += f"Description: {sujet['description']}\n"
-                    context += f"Nombre d'articles disponibles: {len(articles)}\n"
+                if topic_lower in sujet.titre_sujet.lower():
+                    context += f"\nFocus sur: {sujet.titre_sujet}\n"
+                    context += f"Description: {sujet.description}\n"
+                    context += f"Nombre d'articles disponibles: {counts.get(sujet.id, 0)}\n"
                     return context
         
         return context
     
     except Exception as e:
-        print(f"Erreur lors de la récupération du contexte RH: {e}")
+        logger.error("Erreur lors de la récupération du contexte RH: %s", e)
         # Fallback
         return """
 Domaines d'expertise:
@@ -110,21 +135,8 @@ def extract_keywords(message: str) -> List[str]:
     keywords = []
     message_lower = message.lower()
     
-    # Mapping des mots-clés vers les titres de sujets (utilisé même si PostgreSQL n'est pas disponible)
-    keyword_to_sujet = {
-        "congé": "Congés",
-        "congés": "Congés", 
-        "vacances": "Congés",
-        "repos": "Congés",
-        "transport": "Transport",
-        "tansport": "Transport",  # Typo possible
-        "déplacement": "Transport",
-        "frais": "Transport",
-        "trajet": "Transport"
-    }
-    
     # D'abord, chercher les mots-clés connus dans le message
-    for keyword, sujet_titre in keyword_to_sujet.items():
+    for keyword, sujet_titre in SUJET_SYNONYMS.items():
         # Normaliser pour gérer les accents
         keyword_normalized = keyword.lower().replace('é', 'e').replace('è', 'e').replace('ê', 'e')
         message_normalized = message_lower.replace('é', 'e').replace('è', 'e').replace('ê', 'e')
@@ -136,8 +148,8 @@ def extract_keywords(message: str) -> List[str]:
                 from app.db import get_all_sujets
                 sujets = get_all_sujets()
                 for sujet in sujets:
-                    if sujet['titre_sujet'] == sujet_titre:
-                        keywords.append(str(sujet['id']))
+                    if sujet.titre_sujet == sujet_titre:
+                        keywords.append(str(sujet.id))
                         break
             except:
                 pass
@@ -153,46 +165,30 @@ def extract_keywords(message: str) -> List[str]:
             
             # Chercher les correspondances avec les titres de sujets
             for sujet in sujets:
-                titre_lower = sujet['titre_sujet'].lower()
+                titre_lower = sujet.titre_sujet.lower()
                 # Vérifier si le titre du sujet est dans le message
                 if titre_lower in message_lower:
-                    keywords.append(sujet['titre_sujet'])
-                    keywords.append(str(sujet['id']))  # Ajouter aussi l'ID
+                    keywords.append(sujet.titre_sujet)
+                    keywords.append(str(sujet.id))  # Ajouter aussi l'ID
                 # Vérifier si des mots du titre sont dans le message
                 elif any(word in message_lower for word in titre_lower.split() if len(word) > 3):
-                    keywords.append(sujet['titre_sujet'])
-                    keywords.append(str(sujet['id']))
+                    keywords.append(sujet.titre_sujet)
+                    keywords.append(str(sujet.id))
                 # Vérifier si des mots du message sont dans le titre
                 elif any(word in titre_lower for word in message_lower.split() if len(word) > 3):
-                    keywords.append(sujet['titre_sujet'])
-                    keywords.append(str(sujet['id']))
+                    keywords.append(sujet.titre_sujet)
+                    keywords.append(str(sujet.id))
             
             # Si toujours rien, utiliser les mots-clés génériques
             if not keywords:
-                rh_keywords = {
-                    "prime": ["prime", "primes", "bonus", "gratification"],
-                    "droit": ["droit", "loi", "code", "légal", "conformité"],
-                    "performance": ["performance", "évaluation", "objectif", "résultat"],
-                    "formation": ["formation", "apprentissage", "compétence", "développement"],
-                    "contrat": ["contrat", "embauche", "recrutement", "candidat"]
-                }
-                
-                for category, words in rh_keywords.items():
+                for category, words in RH_CATEGORY_KEYWORDS.items():
                     if any(word in message_lower for word in words):
                         keywords.append(category)
         except Exception as e:
-            print(f"Erreur lors de l'extraction des mots-clés: {e}")
+            logger.error("Erreur lors de l'extraction des mots-clés: %s", e)
             # Fallback vers les mots-clés par défaut
             if not keywords:
-                rh_keywords = {
-                    "prime": ["prime", "primes", "bonus", "gratification"],
-                    "droit": ["droit", "loi", "code", "légal", "conformité"],
-                    "performance": ["performance", "évaluation", "objectif", "résultat"],
-                    "formation": ["formation", "apprentissage", "compétence", "développement"],
-                    "contrat": ["contrat", "embauche", "recrutement", "candidat"]
-                }
-                
-                for category, words in rh_keywords.items():
+                for category, words in RH_CATEGORY_KEYWORDS.items():
                     if any(word in message_lower for word in words):
                         keywords.append(category)
     
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Index du corpus partagé entre les workers (fichier plat projeté en mémoire)
+
+Avec plusieurs workers gunicorn / uvicorn, chaque processus construirait
+sa propre copie des sujets, des articles et de l'index de recherche. Ces
+données dérivées sont donc écrites une seule fois (processus parent,
+ingestion ou script) dans un fichier plat à positions fixes : en-tête,
+tables d'entiers (articles, sujets, termes triés, postings) et un bloc
+de chaînes UTF-8. Chaque worker le projette en lecture seule (mmap) :
+les pages sont partagées par le système entre les processus, sans copie,
+et seuls les articles retournés par une recherche sont décodés.
+
+Une nouvelle version est écrite dans un nouveau fichier, puis le pointeur
+`current` est remplacé atomiquement (os.replace) : les workers basculent
+à la vérification suivante, les recherches en cours terminent sur
+l'ancienne projection. Les fichiers sont nommés d'après l'instant où la
+lecture de la base a commencé : avec deux publications concurrentes
+(gunicorn et ingest_corpus.py), le pointeur ne recule jamais et seules
+les versions plus anciennes que celle désignée par `current` sont
+supprimées.
+
+Le corpus n'a pas de représentation vectorielle : le fichier ne contient
+que les textes, sujets et postings BM25. Les sujets sont toujours servis
+par l'index ; la recherche par mots ne l'est qu'avec
+SHARED_INDEX_WORD_SEARCH=True (BM25 au lieu de la recherche LIKE).
+"""
+
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.db import Article, Sujet, get_all_sujets, register_refresh_hook
+from app.tools.corpus_index import CorpusIndex, bm25_weight, build_corpus_index
+from app.tools.text_utils import tokenize
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CHRHIDX2"
+
+# En-tête : magic, nombres d'articles / sujets / termes / postings, longueur
+# moyenne, date de construction, puis positions des sections
+_HEADER = struct.Struct("<8sIIIIdd6Q")
+
+# Champs (entiers 64 bits) de chaque enregistrement ; une chaîne est un
+# couple (position, longueur) dans le bloc de chaînes, longueur -1 pour None
+ARTICLE_FIELDS = 9  # article_id, id_sujet, num_article, source, contenu, nb de termes
+SUJET_FIELDS = 5  # id, titre, description
+TERM_FIELDS = 4  # terme, début et nombre de postings
+POSTING_FIELDS = 2  # position de l'article, fréquence (entiers 32 bits)
+
+# Fichier désignant la version courante de l'index
+POINTER_NAME = "current"
+
+class _StringBlock:
+    """Accumule les chaînes UTF-8 et renvoie leur (position, longueur)"""
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.size = 0
+
+    def add(self, value: Optional[str]) -> Tuple[int, int]:
+        if value is None:
+            return 0, -1
+        data = value.encode("utf-8")
+        position = self.size
+        self.parts.append(data)
+        self.size += len(data)
+        return position, len(data)
+
+def _pad(data: bytes) -> bytes:
+    return data + b"\0" * (-len(data) % 8)
+
+def write_index_file(index: CorpusIndex, sujets: List, path: str) -> None:
+    """
+    Écrit un index du corpus au format plat
+
+    Args:
+        index: Index BM25 construit en mémoire
+        sujets: Sujets (Sujet) du corpus
+        path: Fichier à écrire (remplacé s'il existe)
+    """
+    strings = _StringBlock()
+
+    articles = array("q")
+    for article, length in zip(index.articles, index.lengths):
+        articles.extend((article.article_id, -1 if article.id_sujet is None else article.id_sujet))
+        articles.extend(strings.add(article.num_article))
+        articles.extend(strings.add(article.source))
+        articles.extend(strings.add(article.contenu))
+        articles.append(length)
+
+    sujet_table = array("q")
+    for sujet in sujets:
+        sujet_table.append(sujet.id)
+        sujet_table.extend(strings.add(sujet.titre_sujet))
+        sujet_table.extend(strings.add(sujet.description))
+
+    # Termes triés (octets UTF-8) pour la recherche dichotomique
+    terms = array("q")
+    postings = array("i")
+    for term in sorted(index.postings, key=lambda value: value.encode("utf-8")):
+        entries = index.postings[term]
+        terms.extend(strings.add(term))
+        terms.extend((len(postings) // POSTING_FIELDS, len(entries)))
+        for position, count in entries:
+            postings.extend((position, count))
+
+    sections = [_pad(articles.tobytes()), _pad(sujet_table.tobytes()), _pad(terms.tobytes()), _pad(postings.tobytes())]
+    offsets = []
+    position = _HEADER.size + (-_HEADER.size % 8)
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+    offsets.extend((position, strings.size))
+
+    header = _HEADER.pack(
+        MAGIC, len(index.articles), len(sujets), len(terms) // TERM_FIELDS,
+        len(postings) // POSTING_FIELDS, index.average_length, time.time(), *offsets
+    )
+    with open(path, "wb") as f:
+        f.write(_pad(header))
+        for section in sections:
+            f.write(section)
+        for part in strings.parts:
+            f.write(part)
+        f.flush()
+        os.fsync(f.fileno())
+
+class SharedCorpusIndex:
+    """Index du corpus projeté en mémoire (lecture seule, sans copie)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.article_count, self.sujet_count, self.term_count, self.posting_count,
+         self.average_length, self.built_at, articles_at, sujets_at, terms_at, postings_at,
+         strings_at, strings_size) = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Fichier d'index invalide: {path}")
+
+        view = memoryview(self._mmap)
+        self._articles = view[articles_at:articles_at + self.article_count * ARTICLE_FIELDS * 8].cast("q")
+        self._sujets = view[sujets_at:sujets_at + self.sujet_count * SUJET_FIELDS * 8].cast("q")
+        self._terms = view[terms_at:terms_at + self.term_count * TERM_FIELDS * 8].cast("q")
+        self._postings = view[postings_at:postings_at + self.posting_count * POSTING_FIELDS * 4].cast("i")
+        self._strings = view[strings_at:strings_at + strings_size]
+        self._sujet_objects: Optional[List[Sujet]] = None
+        # Sujets ayant des articles dans chaque source, calculés au premier appel
+        self._source_sujet_ids: Optional[Dict[Optional[str], Set[int]]] = None
+        self._source_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.article_count
+
+    def _string(self, position: int, length: int) -> Optional[str]:
+        if length < 0:
+            return None
+        return str(self._strings[position:position + length], "utf-8")
+
+    def article(self, position: int) -> Article:
+        """
+        Décode un article de l'index
+
+        Args:
+            position: Position de l'article dans l'index
+
+        Returns:
+            L'article (Article)
+        """
+        base = position * ARTICLE_FIELDS
+        fields = self._articles[base:base + ARTICLE_FIELDS]
+        return Article(
+            fields[0],
+            None if fields[1] < 0 else fields[1],
+            self._string(fields[2], fields[3]),
+            self._string(fields[4], fields[5]),
+            self._string(fields[6], fields[7])
+        )
+
+    def sujets(self, source: Optional[str] = None) -> List[Sujet]:
+        """
+        Sujets du corpus (décodés une fois par projection)
+
+        Args:
+            source: Ne garder que les sujets ayant des articles dans cette source
+
+        Returns:
+            Les sujets, par ID croissant
+        """
+        if source is not None:
+            with self._source_lock:
+                if self._source_sujet_ids is None:
+                    # Un seul parcours des articles pour toutes les sources
+                    by_source: Dict[Optional[str], Set[int]] = {}
+                    for position in range(self.article_count):
+                        base = position * ARTICLE_FIELDS
+                        article_source = self._string(self._articles[base + 4], self._articles[base + 5])
+                        by_source.setdefault(article_source, set()).add(self._articles[base + 1])
+                    self._source_sujet_ids = by_source
+            ids = self._source_sujet_ids.get(source, set())
+            return [sujet for sujet in self.sujets() if sujet.id in ids]
+        if self._sujet_objects is None:
+            sujets = []
+            for position in range(self.sujet_count):
+                fields = self._sujets[position * SUJET_FIELDS:(position + 1) * SUJET_FIELDS]
+                sujets.append(Sujet(fields[0], self._string(fields[1], fields[2]), self._string(fields[3], fields[4])))
+            self._sujet_objects = sujets
+        return self._sujet_objects
+
+    def _find_term(self, term: str) -> Optional[Tuple[int, int]]:
+        """Recherche dichotomique d'un terme : (début, nombre) de ses postings"""
+        target = term.encode("utf-8")
+        low, high = 0, self.term_count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            base = middle * TERM_FIELDS
+            position, length = self._terms[base], self._terms[base + 1]
+            value = self._strings[position:position + length].tobytes()
+            if value == target:
+                return self._terms[base + 2], self._terms[base + 3]
+            if value < target:
+                low = middle + 1
+            else:
+                high = middle - 1
+        return None
+
+    def search(self, message: str, limit: int = 10, source: Optional[str] = None) -> List[Article]:
+        """
+        Recherche BM25, identique à CorpusIndex.search
+
+        Args:
+            message: La question
+            limit: Nombre maximum d'articles
+            source: Restreint la recherche à une source (optionnel)
+
+        Returns:
+            Les articles, du plus au moins pertinent
+        """
+        if not self.article_count:
+            return []
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(message)):
+            found = self._find_term(term)
+            if found is None:
+                continue
+            start, count = found
+            for i in range(start, start + count):
+                position = self._postings[i * POSTING_FIELDS]
+                frequency = self._postings[i * POSTING_FIELDS + 1]
+                length = self._articles[position * ARTICLE_FIELDS + 8]
+                weight = bm25_weight(frequency, count, self.article_count, length, self.average_length)
+                scores[position] = scores.get(position, 0.0) + weight
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        results = []
+        for position, _ in ranked:
+            article = self.article(position)
+            if source is None or article.source == source:
+                results.append(article)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def stats(self) -> Dict:
+        """Statistiques de l'index projeté"""
+        return {
+            "path": self.path,
+            "articles": self.article_count,
+            "sujets": self.sujet_count,
+            "terms": self.term_count,
+            "postings": self.posting_count,
+            "size_bytes": len(self._mmap),
+            "age_seconds": round(time.time() - self.built_at, 1)
+        }
+
+def _pointer_path(directory: str) -> str:
+    return os.path.join(directory, POINTER_NAME)
+
+def _read_pointer(directory: str) -> Optional[str]:
+    try:
+        with open(_pointer_path(directory), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def _version_of(name: Optional[str]) -> Optional[int]:
+    """Instant (ns) de lecture de la base d'un fichier corpus-<ns>-<pid>.idx"""
+    if not name or not name.startswith("corpus-") or not name.endswith(".idx"):
+        return None
+    try:
+        return int(name[len("corpus-"):-len(".idx")].split("-")[0])
+    except ValueError:
+        return None
+
+def publish_shared_index(directory: Optional[str] = None) -> Dict:
+    """
+    Construit l'index depuis la base et le publie comme version courante
+
+    Args:
+        directory: Répertoire des fichiers d'index (SHARED_INDEX_DIR par défaut)
+
+    Returns:
+        Résumé (fichier, articles, sujets, termes, durée)
+    """
+    started = time.perf_counter()
+    # La version est l'instant où la lecture de la base commence
+    version = time.time_ns()
+    directory = directory or settings.SHARED_INDEX_DIR
+    os.makedirs(directory, exist_ok=True)
+    sujets = get_all_sujets()
+    if not sujets:
+        raise RuntimeError("Aucun sujet : base indisponible ou corpus vide")
+    index = build_corpus_index()
+
+    name = f"corpus-{version}-{os.getpid()}.idx"
+    write_index_file(index, sujets, os.path.join(directory, name))
+
+    # Bascule atomique du pointeur, sauf si une publication concurrente a
+    # déjà désigné une version plus récente
+    current_version = _version_of(_read_pointer(directory))
+    if current_version is None or current_version < version:
+        temporary = _pointer_path(directory) + f".{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write(name)
+        os.replace(temporary, _pointer_path(directory))
+
+    # Seules les versions antérieures à celle désignée maintenant par le
+    # pointeur sont supprimées : un fichier qu'une publication concurrente
+    # vient d'écrire ou de désigner est conservé. Les projections
+    # existantes restent valides après suppression du fichier.
+    current = _read_pointer(directory)
+    current_version = _version_of(current)
+    if current_version is not None:
+        for old in os.listdir(directory):
+            old_version = _version_of(old)
+            if old != current and old_version is not None and old_version < current_version:
+                try:
+                    os.remove(os.path.join(directory, old))
+                except OSError:
+                    pass
+
+    return {
+        "path": os.path.join(directory, name),
+        "articles": len(index),
+        "sujets": len(sujets),
+        "terms": len(index.postings),
+        "duration_seconds": round(time.perf_counter() - started, 2)
+    }
+
+_current: Optional[SharedCorpusIndex] = None
+_current_name: Optional[str] = None
+_checked_at = 0.0
+_attach_lock = threading.Lock()
+
+def get_shared_index() -> Optional[SharedCorpusIndex]:
+    """
+    Retourne la projection de la version courante de l'index
+
+    Le pointeur est relu au plus toutes les SHARED_INDEX_CHECK_INTERVAL
+    secondes ; une nouvelle version est projetée dès qu'elle est publiée.
+
+    Returns:
+        L'index partagé, ou None (désactivé ou pas encore publié)
+    """
+    global _current, _current_name, _checked_at
+    if not settings.SHARED_INDEX_ENABLED:
+        return None
+    if time.monotonic() - _checked_at < settings.SHARED_INDEX_CHECK_INTERVAL:
+        return _current
+    with _attach_lock:
+        if time.monotonic() - _checked_at < settings.SHARED_INDEX_CHECK_INTERVAL:
+            return _current
+        _checked_at = time.monotonic()
+        name = _read_pointer(settings.SHARED_INDEX_DIR)
+        if name and name != _current_name:
+            try:
+                _current = SharedCorpusIndex(os.path.join(settings.SHARED_INDEX_DIR, name))
+                _current_name = name
+            except (OSError, ValueError) as e:
+                logger.error("Erreur lors de la projection de l'index partagé: %s", e)
+    return _current
+
+@register_refresh_hook
+def _recheck_on_corpus_change(sujet_ids) -> None:
+    # La nouvelle version est publiée par le processus qui a ingéré le
+    # corpus : relire le pointeur dès le prochain accès
+    global _checked_at
+    _checked_at = 0.0
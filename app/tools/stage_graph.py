@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Exécution concurrente des étapes indépendantes du pipeline /chat
+
+Le pipeline est décrit comme un petit graphe de dépendances : une étape
+démarre dès que celles dont elle dépend sont terminées, et les étapes
+indépendantes (recherche d'articles, contexte RH, ouverture de la
+connexion vers OpenRouter) s'exécutent en même temps. Le temps avant
+l'appel au LLM devient celui de la branche la plus longue.
+
+Les étapes partagent un pool de threads borné (PIPELINE_WORKERS). Le
+thread appelant participe : il exécute lui-même une étape prête, et
+reprend toute étape que le pool n'a pas encore démarrée au lieu de
+l'attendre. Un pool saturé dégrade donc l'exécution en séquentiel, sans
+blocage mutuel, même quand une étape lance elle-même des tâches
+concurrentes (run_concurrently).
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.config import settings
+from app.monitoring.profiling import current_session
+from app.monitoring.tracing import start_span
+
+logger = logging.getLogger(__name__)
+
+# Valeur par défaut : l'erreur d'une étape sans repli est propagée
+_NO_FALLBACK = object()
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.PIPELINE_WORKERS, thread_name_prefix="pipeline")
+        return _executor
+
+def _submit(fn: Callable, *args) -> Future:
+    # Le contexte (identifiant de requête des journaux...) suit la tâche,
+    # et le thread qui l'exécute est échantillonné si la requête est profilée
+    session = current_session()
+    if session is not None:
+        fn = session.wrap(fn)
+    context = contextvars.copy_context()
+    return _get_executor().submit(context.run, fn, *args)
+
+def concurrency_enabled() -> bool:
+    """Indique si les étapes peuvent s'exécuter en parallèle"""
+    return settings.PIPELINE_CONCURRENCY_ENABLED and settings.PIPELINE_WORKERS > 0
+
+def run_concurrently(calls: Sequence[Callable[[], Any]]) -> List[Any]:
+    """
+    Exécute des appels indépendants en parallèle
+
+    Args:
+        calls: Fonctions sans argument
+
+    Returns:
+        Leurs résultats, dans l'ordre des appels (la première erreur est
+        propagée)
+    """
+    if len(calls) <= 1 or not concurrency_enabled():
+        return [call() for call in calls]
+    futures = [_submit(call) for call in calls[1:]]
+    results = [calls[0]()]
+    for future, call in zip(futures, calls[1:]):
+        # Pas encore démarré : exécuté ici plutôt qu'attendu
+        results.append(call() if future.cancel() else future.result())
+    return results
+
+class Stage:
+    """Une étape : fonction appelée avec les résultats de ses dépendances"""
+
+    __slots__ = ("name", "fn", "after", "fallback", "detached")
+
+    def __init__(self, name: str, fn: Callable, after: Sequence[str], fallback: Any, detached: bool = False):
+        self.name = name
+        self.fn = fn
+        self.after = tuple(after)
+        self.fallback = fallback
+        self.detached = detached
+
+class StageGraph:
+    """Graphe d'étapes exécutées dès que leurs dépendances sont prêtes"""
+
+    def __init__(self):
+        self._stages: "OrderedDict[str, Stage]" = OrderedDict()
+        self._timings: Dict[str, float] = {}
+        self._timings_lock = threading.Lock()
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        """Durée des étapes terminées (millisecondes)"""
+        with self._timings_lock:
+            return dict(self._timings)
+
+    def add(
+        self,
+        name: str,
+        fn: Callable,
+        after: Sequence[str] = (),
+        fallback: Any = _NO_FALLBACK,
+        detached: bool = False
+    ) -> "StageGraph":
+        """
+        Ajoute une étape
+
+        Args:
+            name: Nom de l'étape (clé des résultats et des durées)
+            fn: Fonction appelée avec les résultats des étapes `after`, dans l'ordre
+            after: Étapes dont dépend celle-ci (déjà ajoutées)
+            fallback: Résultat utilisé si l'étape échoue (l'erreur est
+                journalisée) ; sans repli, l'erreur est propagée par run()
+            detached: Étape d'anticipation sans dépendance, lancée au
+                démarrage du graphe et jamais attendue (ignorée si les
+                étapes ne peuvent pas s'exécuter en parallèle)
+
+        Returns:
+            Le graphe (appels chaînés)
+        """
+        unknown = [dependency for dependency in after if dependency not in self._stages]
+        if unknown:
+            raise ValueError(f"Étape {name}: dépendances inconnues {unknown}")
+        detached_dependencies = [dependency for dependency in after if self._stages[dependency].detached]
+        if detached_dependencies or (detached and after):
+            raise ValueError(f"Étape {name}: une étape détachée n'a ni dépendance ni dépendant")
+        self._stages[name] = Stage(name, fn, after, fallback, detached)
+        return self
+
+    def _call(self, stage: Stage, results: Dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            with start_span(f"stage.{stage.name}", detached=stage.detached or None):
+                return stage.fn(*(results[dependency] for dependency in stage.after))
+        except Exception as e:
+            if stage.fallback is _NO_FALLBACK:
+                raise
+            logger.error("Erreur lors de l'étape %s: %s", stage.name, e)
+            return stage.fallback
+        finally:
+            with self._timings_lock:
+                self._timings[stage.name] = round((time.perf_counter() - started) * 1000, 2)
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Exécute le graphe
+
+        Returns:
+            Les résultats, par nom d'étape
+        """
+        results: Dict[str, Any] = {}
+        if not concurrency_enabled():
+            for stage in self._stages.values():
+                if not stage.detached:
+                    results[stage.name] = self._call(stage, results)
+            return results
+
+        for stage in self._stages.values():
+            if stage.detached:
+                _submit(self._call, stage, results)
+        pending = [stage for stage in self._stages.values() if not stage.detached]
+        running: Dict[str, Future] = {}
+        while pending or running:
+            for name in [name for name, future in running.items() if future.done()]:
+                results[name] = running.pop(name).result()
+
+            ready = [stage for stage in pending if all(dependency in results for dependency in stage.after)]
+            if ready:
+                for stage in ready:
+                    pending.remove(stage)
+                for stage in ready[1:]:
+                    running[stage.name] = _submit(self._call, stage, results)
+                # Le thread appelant exécute lui-même la première étape prête
+                results[ready[0].name] = self._call(ready[0], results)
+                continue
+
+            stolen = next((name for name, future in running.items() if future.cancel()), None)
+            if stolen is not None:
+                del running[stolen]
+                results[stolen] = self._call(self._stages[stolen], results)
+            else:
+                wait(list(running.values()), return_when=FIRST_COMPLETED)
+        return results
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Fonctions de normalisation de texte pour ChatRH
+"""
+
+import re
+import unicodedata
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_PUNCTUATION_RE = re.compile(r"[^\w\s.\-']", re.UNICODE)
+
+def strip_accents(text: str) -> str:
+    """
+    Supprime les accents d'un texte ("congés" -> "conges")
+
+    Args:
+        text: Le texte à traiter
+
+    Returns:
+        Le texte sans accents
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+def collapse_whitespace(text: str) -> str:
+    """
+    Réduit les espaces d'un message sans en changer le sens
+
+    Contrairement à normalize_text, la casse, les accents et la
+    ponctuation sont conservés : la recherche y est sensible ("congé" et
+    "conge" ne retiennent pas les mêmes articles).
+
+    Args:
+        text: Le texte à traiter
+
+    Returns:
+        Le texte avec des espaces simples
+    """
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+def normalize_text(text: str) -> str:
+    """
+    Normalise un message pour la comparaison et le regroupement
+
+    Minuscules, sans accents, sans ponctuation superflue et avec des
+    espaces simples : deux formulations qui ne diffèrent que par la casse
+    ou les accents donnent la même clé.
+
+    Args:
+        text: Le texte à normaliser
+
+    Returns:
+        Le texte normalisé
+    """
+    text = strip_accents(text.lower())
+    text = _PUNCTUATION_RE.sub(" ", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+# Mots vides français fréquents (déjà sans accents)
+STOPWORDS = frozenset("""
+a au aux avec ce ces cet cette dans de des du elle elles en et est etre il ils
+je la le les leur leurs lui ma mais me mes moi mon ne nos notre nous on ou par
+pas pour qu que quel quelle quelles quels qui sa se ses si son sont sur ta te
+tes toi ton tu un une vos votre vous y l d s n c j m t qu est-ce comment combien
+quand quoi dont ont a-t-il peut doit faut fait plus tout tous toute toutes
+article articles art code travail selon concernant droit droits
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def stem(token: str) -> str:
+    """
+    Racinisation minimale (pluriels en -s / -x)
+
+    Args:
+        token: Mot normalisé
+
+    Returns:
+        La racine du mot
+    """
+    if len(token) > 4 and token[-1] in "sx":
+        return token[:-1]
+    return token
+
+def tokenize(text: str) -> list:
+    """
+    Découpe un texte en termes normalisés pour la recherche
+
+    Args:
+        text: Le texte à découper
+
+    Returns:
+        Liste des termes (sans accents, sans mots vides, racinisés)
+    """
+    return [
+        stem(token)
+        for token in _TOKEN_RE.findall(strip_accents(text.lower()))
+        if len(token) > 1 and token not in STOPWORDS
+    ]
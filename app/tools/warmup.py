@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Préchauffage des caches à partir du journal des requêtes
+
+Les caches sont propres au processus : seuls ceux du processus qui
+appelle warm_up_caches sont remplis (l'API au démarrage, WARMUP_TOP_N).
+
+La clé du cache de recherche est le message corrigé : le préchauffage
+attend donc l'index de correction, sans quoi les messages bruts mis en
+cache ne correspondraient à aucune requête réelle une fois l'index prêt.
+"""
+
+import logging
+import time
+from typing import Dict
+
+from app.config import settings
+from app.monitoring.query_log import query_log
+from app.tools.fuzzy_index import correct_message, wait_for_fuzzy_index
+from app.tools.retrieval import retrieve_articles
+from app.tools.rh_helpers import extract_keywords
+
+logger = logging.getLogger(__name__)
+
+# Attente maximale de l'index de correction avant le préchauffage (secondes)
+FUZZY_INDEX_WAIT = 300
+
+def warm_up_caches(top_n: int) -> Dict:
+    """
+    Rejoue la recherche d'articles des requêtes les plus fréquentes
+
+    Aucun appel au LLM n'est effectué : seuls le cache de recherche et le
+    cache d'articles sont alimentés.
+
+    Args:
+        top_n: Nombre de requêtes à rejouer
+
+    Returns:
+        Un dictionnaire récapitulatif (requêtes rejouées, articles, durée)
+    """
+    started = time.perf_counter()
+    summary = {"queries": 0, "articles": 0, "errors": 0}
+    if query_log is None or top_n <= 0:
+        summary["duration_seconds"] = 0.0
+        return summary
+    if settings.FUZZY_ENABLED and wait_for_fuzzy_index(FUZZY_INDEX_WAIT) is None:
+        logger.warning("Index de correction indisponible : préchauffage abandonné")
+        summary["duration_seconds"] = round(time.perf_counter() - started, 3)
+        return summary
+
+    for query, _count in query_log.top_queries(top_n):
+        try:
+            # Même chemin que /chat : correction du message journalisé, puis
+            # recherche (la clé de cache est le message corrigé)
+            message = correct_message(query)
+            result = retrieve_articles(message, extract_keywords(message))
+            summary["queries"] += 1
+            summary["articles"] += len(result.articles)
+        except Exception as e:
+            summary["errors"] += 1
+            logger.error("Erreur lors du préchauffage pour '%s': %s", query, e)
+
+    summary["duration_seconds"] = round(time.perf_counter() - started, 3)
+    return summary
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Banc d'évaluation de la recherche d'articles (qualité et latence)
+
+Rejoue un jeu de questions annotées contre le corpus chargé en base
+(éventuellement amorcé avec --seed), sans appel au LLM, avec une ou plusieurs stratégies de recherche :
+
+    cascade   pipeline de /chat (correction, mots-clés, sujet, reclassement)
+    like      recherche LIKE par mot (dernière étape de la cascade)
+    fulltext  recherche plein texte PostgreSQL (ts_rank_cd)
+    bm25      index en mémoire (app/tools/corpus_index.py)
+
+Pour chaque stratégie : rappel@k, MRR, taille du prompt construit
+(caractères et tokens estimés) et latence par question. Les caches
+(articles, recherches) sont vidés avant chaque exécution : toutes les
+stratégies sont mesurées à froid.
+
+Jeu d'évaluation (JSON Lines, voir retrieval_eval.jsonl.example) :
+    {"question": "...", "expected": ["L.148", 1234], "source": "..."}
+Les attendus sont des numéros d'articles (comparés par clé canonique) ou
+des article_id ; la source est facultative.
+
+Corpus amorcé (--seed) : le fichier CSV / XLSX est ingéré avant
+l'évaluation (voir retrieval_corpus.example.csv, aligné sur le jeu
+d'exemple). Il est écrit dans la base configurée (DB_NAME) : utiliser une
+base dédiée au banc pour des résultats reproductibles.
+
+Usage:
+    python bench_retrieval.py eval.jsonl
+    DB_NAME=chatrh_bench python bench_retrieval.py retrieval_eval.jsonl.example --seed retrieval_corpus.example.csv
+    python bench_retrieval.py eval.jsonl --strategies cascade,bm25 --k 1,3,5,10
+    python bench_retrieval.py eval.jsonl --rerank --json resultats.json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.db import get_passages, ingest_files, normalize_source, search_articles_fulltext
+from app.db.article_cache import article_cache
+from app.tools import create_system_prompt, extract_keywords
+from app.tools.article_refs import article_ref_key
+from app.tools.corpus_index import build_corpus_index
+from app.tools.fuzzy_index import build_fuzzy_index
+from app.tools.reranking import rerank_articles, select_passages
+from app.tools.retrieval import MAX_ARTICLES, retrieval_cache, retrieve_articles, search_by_words
+
+STRATEGIES = ("cascade", "like", "fulltext", "bm25")
+
+# Estimation grossière du nombre de tokens d'un texte français
+CHARS_PER_TOKEN = 4
+
+def load_eval_set(path: str) -> List[Dict]:
+    """
+    Lit le jeu d'évaluation
+
+    Args:
+        path: Fichier JSON Lines (question, expected, source)
+
+    Returns:
+        Les cas d'évaluation, attendus séparés en identifiants et clés
+        (dédoublonnés : "L.148" et "Art.L.148" sont un seul attendu)
+    """
+    cases = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            data = json.loads(line)
+            if not data.get("question") or not data.get("expected"):
+                raise ValueError(f"Ligne {line_number}: 'question' et 'expected' sont obligatoires")
+            expected = data["expected"]
+            ids = {item for item in expected if isinstance(item, int)}
+            keys = {article_ref_key(str(item)) for item in expected if not isinstance(item, int)} - {None}
+            if not ids and not keys:
+                raise ValueError(f"Ligne {line_number}: aucun article attendu reconnu")
+            cases.append({
+                "question": data["question"],
+                "source": normalize_source(data.get("source")),
+                "ids": ids,
+                "keys": keys,
+                "expected": len(ids) + len(keys)
+            })
+    return cases
+
+def _is_expected(article, case: Dict) -> bool:
+    return article.article_id in case["ids"] or article_ref_key(article.num_article) in case["keys"]
+
+def recall_at_k(articles: List, case: Dict, k: int) -> float:
+    """Part des attendus distincts trouvés parmi les k premiers articles"""
+    found = set()
+    for article in articles[:k]:
+        if article.article_id in case["ids"]:
+            found.add(("id", article.article_id))
+        key = article_ref_key(article.num_article)
+        if key in case["keys"]:
+            found.add(("key", key))
+    return len(found) / case["expected"]
+
+def first_hit_rank(articles: List, case: Dict) -> Optional[int]:
+    """Rang (à partir de 1) du premier article attendu, ou None"""
+    for rank, article in enumerate(articles, 1):
+        if _is_expected(article, case):
+            return rank
+    return None
+
+def _percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))]
+
+def clear_caches() -> None:
+    """Vide les caches partagés pour mesurer chaque stratégie à froid"""
+    article_cache.clear()
+    retrieval_cache.clear()
+
+def make_strategies(names: List[str], depth: int, rerank: bool) -> Dict[str, Callable]:
+    """
+    Prépare les stratégies demandées (construction des index une seule fois)
+
+    Args:
+        names: Noms des stratégies
+        depth: Nombre de candidats demandés aux stratégies simples
+        rerank: Applique le reclassement de la cascade aux stratégies simples
+
+    Returns:
+        Dictionnaire nom -> fonction (question, source) -> (articles, passages)
+    """
+    strategies = {}
+
+    def finish(question: str, candidates: List) -> Tuple[List, Optional[List]]:
+        articles = rerank_articles(question, candidates) if rerank else candidates
+        passages = None
+        if settings.PASSAGES_ENABLED and articles:
+            passages = select_passages(question, articles, get_passages(articles))
+        return articles, passages
+
+    if "cascade" in names:
+        started = time.perf_counter()
+        fuzzy = build_fuzzy_index() if settings.FUZZY_ENABLED else None
+        print(f"🔤 Index de correction: {time.perf_counter() - started:.2f}s")
+
+        def cascade(question: str, source: Optional[str]):
+            message = fuzzy.correct(question) if fuzzy else question
+            result = retrieve_articles(message, extract_keywords(message), use_cache=False, source=source)
+            return result.articles, result.passages
+        strategies["cascade"] = cascade
+
+    if "like" in names:
+        def like(question: str, source: Optional[str]):
+            return finish(question, search_by_words(question, source)[:depth])
+        strategies["like"] = like
+
+    if "fulltext" in names:
+        def fulltext(question: str, source: Optional[str]):
+            return finish(question, search_articles_fulltext(question, limit=depth, source=source))
+        strategies["fulltext"] = fulltext
+
+    if "bm25" in names:
+        started = time.perf_counter()
+        index = build_corpus_index()
+        stats = index.stats()
+        print(
+            f"📚 Index BM25: {stats['articles']} articles, {stats['terms']} termes "
+            f"en {time.perf_counter() - started:.2f}s"
+        )
+
+        def bm25(question: str, source: Optional[str]):
+            return finish(question, index.search(question, limit=depth, source=source))
+        strategies["bm25"] = bm25
+
+    return strategies
+
+def evaluate(strategy: Callable, cases: List[Dict], ks: List[int], repeat: int) -> Dict:
+    """
+    Évalue une stratégie sur le jeu de questions
+
+    Args:
+        strategy: Fonction (question, source) -> (articles, passages)
+        cases: Cas d'évaluation
+        ks: Valeurs de k pour le rappel
+        repeat: Nombre d'exécutions par question (latence médiane)
+
+    Returns:
+        Métriques agrégées et détail par question
+    """
+    details = []
+    for case in cases:
+        durations = []
+        for _ in range(repeat):
+            clear_caches()
+            started = time.perf_counter()
+            articles, passages = strategy(case["question"], case["source"])
+            durations.append((time.perf_counter() - started) * 1000)
+        prompt = create_system_prompt("", articles, passages)
+        details.append({
+            "question": case["question"],
+            "recall": {k: recall_at_k(articles, case, k) for k in ks},
+            "rank": first_hit_rank(articles, case),
+            "articles": [article.num_article for article in articles],
+            "prompt_chars": len(prompt),
+            "latency_ms": round(statistics.median(durations), 2)
+        })
+
+    latencies = [detail["latency_ms"] for detail in details]
+    prompt_chars = [detail["prompt_chars"] for detail in details]
+    return {
+        "recall": {k: round(statistics.mean(d["recall"][k] for d in details), 3) for k in ks},
+        "mrr": round(statistics.mean(1 / d["rank"] if d["rank"] else 0.0 for d in details), 3),
+        "prompt_chars": round(statistics.mean(prompt_chars)),
+        "prompt_tokens": round(statistics.mean(prompt_chars) / CHARS_PER_TOKEN),
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies), 2),
+            "p50": round(_percentile(latencies, 50), 2),
+            "p95": round(_percentile(latencies, 95), 2),
+            "max": round(max(latencies), 2)
+        },
+        "questions": details
+    }
+
+def main():
+    """Lance le banc d'évaluation et affiche la comparaison"""
+    parser = argparse.ArgumentParser(description="Évaluation de la recherche d'articles (sans LLM)")
+    parser.add_argument("eval_set", help="Jeu d'évaluation JSON Lines")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES), help="Stratégies, séparées par des virgules")
+    parser.add_argument("--k", default="1,3,5,10", help="Valeurs de k pour le rappel")
+    parser.add_argument("--seed", help="Corpus CSV / XLSX ingéré avant l'évaluation (base dédiée conseillée)")
+    parser.add_argument("--rerank", action="store_true", help="Reclasser les candidats des stratégies simples")
+    parser.add_argument("--repeat", type=int, default=3, help="Exécutions par question (latence médiane)")
+    parser.add_argument("--details", action="store_true", help="Afficher le rang du premier attendu par question")
+    parser.add_argument("--json", help="Écrire les résultats complets dans ce fichier")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.strategies.split(",") if name.strip()]
+    unknown = set(names) - set(STRATEGIES)
+    if unknown:
+        print(f"❌ Stratégies inconnues: {', '.join(sorted(unknown))} (disponibles: {', '.join(STRATEGIES)})")
+        sys.exit(1)
+    ks = sorted({int(k) for k in args.k.split(",")})
+
+    try:
+        cases = load_eval_set(args.eval_set)
+    except (OSError, ValueError) as e:
+        print(f"❌ Jeu d'évaluation illisible: {e}")
+        sys.exit(1)
+    if args.seed:
+        try:
+            summary = ingest_files([args.seed])
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"❌ Amorçage du corpus impossible: {e}")
+            sys.exit(1)
+        print(
+            f"🌱 Corpus amorcé depuis {args.seed}: {summary['inserted']} insérés, "
+            f"{summary['updated']} mis à jour, {summary['rejected']} rejetés"
+        )
+        if summary["rejected"]:
+            for error in summary["errors"]:
+                print(f"   ⚠️  {error}")
+
+    print(f"🧪 {len(cases)} questions, stratégies: {', '.join(names)}")
+
+    strategies = make_strategies(names, max(ks + [MAX_ARTICLES]), args.rerank)
+    results = {name: evaluate(strategies[name], cases, ks, max(1, args.repeat)) for name in names}
+
+    header = f"\n{'stratégie':<10}" + "".join(f"{'R@' + str(k):>7}" for k in ks)
+    print(header + f"{'MRR':>7}{'tokens':>8}{'moy ms':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    for name, result in results.items():
+        print(
+            f"{name:<10}"
+            + "".join(f"{result['recall'][k]:>7.2f}" for k in ks)
+            + f"{result['mrr']:>7.2f}{result['prompt_tokens']:>8}"
+            + f"{result['latency_ms']['mean']:>9.1f}{result['latency_ms']['p50']:>9.1f}{result['latency_ms']['p95']:>9.1f}"
+        )
+
+    if args.details:
+        for name, result in results.items():
+            print(f"\n{name}")
+            for detail in result["questions"]:
+                rank = detail["rank"] or "-"
+                print(f"   {rank:>3}  {detail['latency_ms']:>7.1f} ms  {detail['question']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Résultats écrits dans {args.json}")
+
+if __name__ == "__main__":
+    main()
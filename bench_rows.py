@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark : coût mémoire et CPU de la représentation des lignes
+
+Compare l'ancienne représentation (RealDictCursor puis copie champ par
+champ dans un nouveau dictionnaire) aux objets Article à __slots__
+construits directement depuis les tuples du curseur. Aucune base de
+données n'est nécessaire : les tuples du curseur sont simulés.
+
+Usage:
+    python bench_rows.py [nombre_articles]
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+
+from app.db.models import Article
+
+COLUMNS = ("article_id", "id_sujet", "num_article", "source", "contenu")
+SOURCES = ("Code du travail", "Convention collective", "Décret")
+
+def make_cursor_rows(count: int):
+    """Simule les tuples renvoyés par psycopg2 (une chaîne source par ligne)"""
+    contenu = "Le travailleur a droit au congé payé à la charge de l'employeur. " * 20
+    return [
+        (i, i % 12, f"Art.L.{i}", "".join(SOURCES[i % len(SOURCES)]) + f" {1997}", contenu)
+        for i in range(count)
+    ]
+
+def legacy_rows(rows):
+    """Ancien chemin : un dict par ligne (RealDictCursor) puis une copie"""
+    articles = []
+    for values in rows:
+        row = dict(zip(COLUMNS, values))
+        articles.append({
+            "article_id": row['article_id'],
+            "id_sujet": row['id_sujet'],
+            "num_article": row['num_article'],
+            "source": row['source'],
+            "contenu": row['contenu']
+        })
+    return articles
+
+def compact_rows(rows):
+    """Nouveau chemin : un objet Article par tuple"""
+    return [Article(*values) for values in rows]
+
+def measure(builder, rows, repeat: int = 5):
+    """Mesure le temps de construction, le pic d'allocation et la mémoire retenue"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        builder(rows)
+        best = min(best, time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    result = builder(rows)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, peak, retained
+
+def main():
+    """Lance le benchmark et affiche la comparaison"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rows = make_cursor_rows(count)
+
+    print(f"Benchmark sur {count} articles")
+    print(f"{'représentation':<22}{'temps (ms)':>12}{'pic (Ko)':>12}{'retenu (Ko)':>14}")
+    results = {}
+    for name, builder in (("dict + copie", legacy_rows), ("Article (__slots__)", compact_rows)):
+        elapsed, peak, retained = measure(builder, rows)
+        results[name] = (elapsed, peak, retained)
+        print(f"{name:<22}{elapsed * 1000:>12.2f}{peak / 1024:>12.0f}{retained / 1024:>14.0f}")
+
+    legacy, compact = results["dict + copie"], results["Article (__slots__)"]
+    print(f"\nGain mémoire retenue : {100 * (1 - compact[2] / legacy[2]):.0f}%")
+    print(f"Gain pic d'allocation : {100 * (1 - compact[1] / legacy[1]):.0f}%")
+    print(f"Gain temps : {100 * (1 - compact[0] / legacy[0]):.0f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Script de publication de l'index du corpus partagé entre workers
+
+Construit l'index (textes des articles, sujets, postings BM25) depuis la
+base, l'écrit dans SHARED_INDEX_DIR et bascule le pointeur de version :
+les workers en cours projettent la nouvelle version d'eux-mêmes.
+
+Exemples:
+    python build_shared_index.py
+    python build_shared_index.py --dir /dev/shm/chatrh_index
+"""
+
+import argparse
+import sys
+
+from app.tools.shared_index import publish_shared_index
+
+def main():
+    """Fonction principale de publication"""
+    parser = argparse.ArgumentParser(description="Publication de l'index du corpus partagé (mmap)")
+    parser.add_argument("--dir", help="Répertoire de l'index (SHARED_INDEX_DIR par défaut)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🚀 Publication de l'index partagé")
+    print("=" * 60)
+
+    try:
+        summary = publish_shared_index(args.dir)
+    except Exception as e:
+        print(f"❌ Erreur lors de la publication: {e}")
+        sys.exit(1)
+
+    print(f"\n✅ {summary['articles']} articles, {summary['sujets']} sujets, {summary['terms']} termes")
+    print(f"📚 {summary['path']}")
+    print(f"⏱️  Durée: {summary['duration_seconds']}s")
+
+if __name__ == "__main__":
+    main()
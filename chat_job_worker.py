@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Worker dédié des tâches /chat asynchrones (CHAT_JOB_STORE=postgres)
+
+Réclame les tâches en file dans public.chat_job et les exécute jusqu'à
+l'arrêt (Ctrl+C). Indispensable quand l'API tourne sur une fonction
+serverless (Vercel), gelée dès la réponse 202 : l'API enregistre les
+tâches, ce processus, lancé sur une machine qui reste active, les traite.
+Plusieurs workers peuvent tourner en même temps.
+
+Exemples:
+    CHAT_JOB_STORE=postgres python chat_job_worker.py
+    CHAT_JOB_STORE=postgres python chat_job_worker.py --workers 8
+"""
+
+import argparse
+import logging
+import sys
+
+from app.config import settings
+
+def main():
+    """Fonction principale du worker"""
+    parser = argparse.ArgumentParser(description="Worker des tâches /chat asynchrones")
+    parser.add_argument("--workers", type=int, help="Tâches exécutées en parallèle (CHAT_JOB_WORKERS par défaut)")
+    args = parser.parse_args()
+
+    if settings.CHAT_JOB_STORE != "postgres":
+        print("❌ CHAT_JOB_STORE=postgres est requis : les tâches en mémoire ne sont visibles que de l'API")
+        sys.exit(1)
+
+    # L'application enregistre le traitement des tâches (run_chat_job)
+    from app.main import chat_jobs
+
+    chat_jobs.workers = args.workers or settings.CHAT_JOB_WORKERS or 4
+    print("=" * 60)
+    print(f"🚀 Worker des tâches /chat ({chat_jobs.workers} en parallèle)")
+    print("=" * 60)
+
+    try:
+        chat_jobs.run_forever()
+    except KeyboardInterrupt:
+        logging.getLogger(__name__).info("Arrêt du worker des tâches")
+        print("\n✅ Worker arrêté")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Configuration gunicorn pour plusieurs workers uvicorn
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Avec SHARED_INDEX_ENABLED=True, le processus parent publie l'index du
+corpus une seule fois au démarrage ; chaque worker le projette en mémoire
+(mmap) au lieu d'en construire sa propre copie.
+"""
+
+import os
+
+from app.config import settings
+
+bind = f"{settings.API_HOST}:{settings.API_PORT}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+
+def on_starting(server):
+    """Publie l'index partagé avant le lancement des workers"""
+    if not settings.SHARED_INDEX_ENABLED:
+        return
+    from app.tools.shared_index import publish_shared_index
+
+    try:
+        summary = publish_shared_index()
+        server.log.info("Index partagé publié: %s (%s articles)", summary["path"], summary["articles"])
+    except Exception as e:
+        # Les workers utilisent la dernière version publiée, ou la recherche SQL
+        server.log.warning("Index partagé non publié: %s", e)
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Script de (re)construction des passages des articles
+
+Exemples:
+    python index_passages.py
+    python index_passages.py --sujet 1 --sujet 4
+"""
+
+import argparse
+import sys
+
+from app.db.passages import index_passages
+
+def main():
+    """Fonction principale d'indexation"""
+    parser = argparse.ArgumentParser(description="Découpage des articles en passages (public.article_passage)")
+    parser.add_argument("--sujet", type=int, action="append", help="ID de sujet à réindexer (répétable)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🚀 Indexation des passages")
+    print("=" * 60)
+
+    try:
+        summary = index_passages(set(args.sujet) if args.sujet else None)
+    except Exception as e:
+        print(f"❌ Erreur lors de l'indexation: {e}")
+        sys.exit(1)
+
+    print(f"\n✅ {summary['articles']} articles découpés en {summary['passages']} passages")
+    print(f"⏱️  Durée: {summary['duration_seconds']}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Script d'ingestion d'un corpus juridique (CSV / XLSX) dans PostgreSQL
+
+Exemples:
+    python ingest_corpus.py code_du_travail.xlsx
+    python ingest_corpus.py articles.csv --source "Code du travail 1997"
+    python ingest_corpus.py articles.csv --dry-run
+
+Colonnes reconnues: sujet (ou titre_sujet / id_sujet), description,
+num_article, source, contenu.
+"""
+
+import argparse
+import sys
+
+from app.config import settings
+from app.db.ingestion import ingest_files
+
+def main():
+    """Fonction principale d'ingestion"""
+    parser = argparse.ArgumentParser(description="Ingestion d'articles CSV / XLSX dans PostgreSQL")
+    parser.add_argument("files", nargs="+", help="Fichiers CSV ou XLSX à charger")
+    parser.add_argument("--source", help="Source par défaut si la colonne 'source' est absente")
+    parser.add_argument("--sujet", help="Sujet par défaut si la colonne 'sujet' est absente")
+    parser.add_argument("--batch-size", type=int, help="Nombre de lignes par lot COPY")
+    parser.add_argument("--dry-run", action="store_true", help="Valider les fichiers sans écrire en base")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🚀 Ingestion du corpus" + (" (simulation)" if args.dry_run else ""))
+    print("=" * 60)
+
+    try:
+        summary = ingest_files(
+            args.files,
+            default_source=args.source,
+            default_sujet=args.sujet,
+            batch_size=args.batch_size,
+            dry_run=args.dry_run
+        )
+    except Exception as e:
+        print(f"❌ Erreur lors de l'ingestion: {e}")
+        sys.exit(1)
+
+    print(f"\n📦 {summary['rows_read']} lignes lues, {summary['rows_valid']} valides, {summary['rejected']} rejetées")
+    if not args.dry_run:
+        print(f"✅ {summary['inserted']} articles insérés, {summary['updated']} mis à jour")
+        print(f"✅ {summary['sujets_created']} sujets créés")
+        print(f"🔄 Sujets rafraîchis: {summary['affected_sujets']}")
+    for error in summary["errors"]:
+        print(f"⚠️  {error}")
+    print(f"\n⏱️  Durée: {summary['duration_seconds']}s")
+
+    if settings.SHARED_INDEX_ENABLED and not args.dry_run and summary["inserted"] + summary["updated"]:
+        # Nouvelle version de l'index partagé : les workers basculent d'eux-mêmes
+        from app.db.replicas import primary_reads
+        from app.tools.shared_index import publish_shared_index
+        try:
+            with primary_reads():
+                published = publish_shared_index()
+            print(f"📚 Index partagé publié: {published['path']}")
+        except Exception as e:
+            print(f"⚠️  Index partagé non publié: {e}")
+
+    if summary["rejected"] and not summary["rows_valid"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -30,14 +30,32 @@ NEW_DB = {
     "password": os.getenv("NEW_DB_PASSWORD", "")
 }
 
+def insertable_columns(conn, table_name):
+    """Colonnes d'une table pouvant recevoir une valeur (hors colonnes générées)"""
+    schema, _, table = table_name.partition(".")
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = %s AND table_name = %s AND is_generated = 'NEVER' "
+            "ORDER BY ordinal_position",
+            (schema, table)
+        )
+        return [row[0] for row in cursor.fetchall()]
+
 def migrate_table(conn_old, conn_new, table_name):
     """Migre une table de l'ancienne vers la nouvelle base"""
     cursor_old = conn_old.cursor(cursor_factory=RealDictCursor)
     cursor_new = conn_new.cursor()
     
     try:
+        # Colonnes explicites, présentes dans les deux bases : les colonnes
+        # générées (num_key) sont recalculées par la nouvelle base
+        old_columns = set(insertable_columns(conn_old, table_name))
+        columns = [column for column in insertable_columns(conn_new, table_name) if column in old_columns]
+        columns_str = ', '.join(columns)
+        
         # Récupérer les données
-        cursor_old.execute(f"SELECT * FROM {table_name} ORDER BY 1")
+        cursor_old.execute(f"SELECT {columns_str} FROM {table_name} ORDER BY 1")
         rows = cursor_old.fetchall()
         
         if not rows:
@@ -46,9 +64,6 @@ def migrate_table(conn_old, conn_new, table_name):
         
         print(f"\n📦 Migration de {len(rows)} lignes de {table_name}...")
         
-        # Récupérer les colonnes
-        columns = list(rows[0].keys())
-        columns_str = ', '.join(columns)
         placeholders = ', '.join(['%s'] * len(columns))
         
         # Compter les insertions
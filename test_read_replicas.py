@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Script de test de la répartition des lectures sur les réplicas PostgreSQL
+
+À lancer contre deux instances locales, par exemple un primaire sur le
+port 5432 et un réplica (ou une seconde instance chargée avec le même
+corpus) sur le port 5433 :
+
+    DB_READ_REPLICAS=localhost:5433 python test_read_replicas.py
+"""
+
+import sys
+import os
+
+# Ajouter le répertoire au path
+sys.path.insert(0, os.path.dirname(__file__))
+
+def server_port(read_only: bool) -> int:
+    """Port du serveur qui répond à une connexion (primaire ou réplica)"""
+    from app.db import get_db_connection
+    connection = get_db_connection(read_only=read_only)
+    if not connection:
+        raise RuntimeError("Connexion à PostgreSQL impossible")
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT inet_server_port()")
+            return cursor.fetchone()[0]
+    finally:
+        connection.close()
+
+try:
+    from app.config import settings
+    from app.db import get_all_sujets, primary_reads, read_replicas, search_articles
+
+    print("=" * 60)
+    print("TEST DES RÉPLICAS EN LECTURE")
+    print("=" * 60)
+
+    if not read_replicas:
+        print("\n❌ DB_READ_REPLICAS n'est pas configuré (ex: DB_READ_REPLICAS=localhost:5433)")
+        sys.exit(1)
+
+    # Test 1: État des réplicas
+    print(f"\n1. Test: Vérification des réplicas (primaire {settings.DB_HOST}:{settings.DB_PORT})...")
+    read_replicas.check()
+    for replica in read_replicas.replicas:
+        state = "✅ sain" if replica.healthy else f"❌ écarté ({replica.error})"
+        print(f"   {replica.name}: {state}, retard {replica.lag_seconds}s, latence {replica.latency_ms} ms")
+    replica_ports = {int(replica.port) for replica in read_replicas.replicas if replica.healthy}
+    if not replica_ports:
+        raise RuntimeError("aucun réplica sain")
+
+    # Test 2: Les lectures partent sur un réplica
+    print("\n2. Test: Connexion en lecture...")
+    port = server_port(read_only=True)
+    assert port in replica_ports, f"lecture servie par le port {port}"
+    print(f"   ✅ Lecture servie par le réplica (port {port})")
+
+    # Test 3: Les écritures restent sur le primaire
+    print("\n3. Test: Connexion en écriture...")
+    port = server_port(read_only=False)
+    assert port == int(settings.DB_PORT), f"écriture servie par le port {port}"
+    print(f"   ✅ Écriture servie par le primaire (port {port})")
+
+    # Test 4: Répartition des lectures
+    print(f"\n4. Test: 20 lectures (stratégie {read_replicas.strategy})...")
+    before = {replica.name: replica.reads for replica in read_replicas.replicas}
+    for _ in range(10):
+        get_all_sujets()
+        search_articles("congé", limit=3)
+    for replica in read_replicas.replicas:
+        print(f"   {replica.name}: {replica.reads - before[replica.name]} lectures")
+
+    # Test 5: Lectures forcées sur le primaire
+    print("\n5. Test: Lectures sous primary_reads()...")
+    with primary_reads():
+        port = server_port(read_only=True)
+    assert port == int(settings.DB_PORT), f"lecture servie par le port {port}"
+    print(f"   ✅ Lecture servie par le primaire (port {port})")
+
+    # Test 6: Un réplica en retard est écarté
+    print("\n6. Test: Retard maximum dépassé...")
+    max_lag, read_replicas.max_lag = read_replicas.max_lag, -1
+    read_replicas.check()
+    port = server_port(read_only=True)
+    read_replicas.max_lag = max_lag
+    read_replicas.check()
+    assert port == int(settings.DB_PORT), f"lecture servie par le port {port}"
+    print(f"   ✅ Réplicas écartés, lecture servie par le primaire (port {port})")
+
+    print("\n" + "=" * 60)
+    print("✅ TOUS LES TESTS RÉUSSIS - Les réplicas fonctionnent !")
+    print("=" * 60)
+
+except Exception as e:
+    print(f"\n❌ ERREUR: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
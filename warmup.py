@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Script de préchauffage des caches à partir du journal des requêtes
+
+Rejoue la recherche d'articles des N requêtes les plus fréquentes, sans
+appel au LLM. Les caches remplis sont ceux de ce script, pas ceux de l'API
+en cours d'exécution : il sert à vérifier le journal et à mesurer le
+préchauffage. Pour préchauffer l'API, utiliser WARMUP_TOP_N (rejoué par
+chaque worker à son démarrage).
+
+Usage:
+    python warmup.py [N]
+"""
+
+import sys
+
+from app.config import settings
+from app.monitoring.query_log import query_log
+from app.tools.warmup import warm_up_caches
+
+def main():
+    """Fonction principale de préchauffage"""
+    top_n = int(sys.argv[1]) if len(sys.argv) > 1 else (settings.WARMUP_TOP_N or 50)
+
+    if query_log is None:
+        print("⚠️  Journal des requêtes désactivé (QUERY_LOG_ENABLED=False)")
+        sys.exit(1)
+
+    print(f"🔥 Préchauffage avec les {top_n} requêtes les plus fréquentes...")
+    for query, count in query_log.top_queries(min(top_n, 10)):
+        print(f"   {count:>5} × {query}")
+
+    summary = warm_up_caches(top_n)
+    print(f"\n✅ {summary['queries']} requêtes rejouées, {summary['articles']} articles mis en cache")
+    if summary["errors"]:
+        print(f"⚠️  {summary['errors']} erreurs")
+    print(f"⏱️  Durée: {summary['duration_seconds']}s")
+
+if __name__ == "__main__":
+    main()